@@ -0,0 +1,350 @@
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from indicators import RollingSum
+
+# Long-only daily backtests over the stored bars. A strategy decides its
+# position at each close and holds it over the next session, so both engines
+# share one accounting step (simulate) and differ only in how they produce the
+# position series: whole arrays at once, or one bar at a time.
+
+TRADING_DAYS = 252
+# Charged on every change of position, in basis points of equity.
+COST_BPS = 10.0
+# Symbols handed to a sweep worker per task.
+SWEEP_CHUNK = 8
+
+# Ready-made runs for the chart page: label -> (strategy, params).
+PRESETS = {
+    '20/50 SMA Crossover': ('sma_cross', {'fast': 20, 'slow': 50}),
+    '50/100 SMA Crossover': ('sma_cross', {'fast': 50, 'slow': 100}),
+    '10/20 SMA Crossover': ('sma_cross', {'fast': 10, 'slow': 20}),
+    '20-day High/Low Breakout': ('breakout', {'window': 20}),
+    '55-day High/Low Breakout': ('breakout', {'window': 55}),
+    '55-day Breakout, 10% Trailing Stop': ('breakout_stop', {'window': 55, 'stop': 10}),
+}
+
+
+def forward_fill(values):
+    """Forward fill of NaNs along a 1-d array; leading NaNs stay NaN."""
+    idx = np.where(np.isnan(values), 0, np.arange(len(values)))
+    np.maximum.accumulate(idx, out=idx)
+    return values[idx]
+
+
+def rolling_max(values, window):
+    """Max of every ``window``-long run of ``values``: ``len(values) - window + 1`` results.
+
+    Van Herk/Gil-Werman: running maxima forwards and backwards within blocks of
+    ``window``, so each result is the max of two lookups whatever the window.
+    """
+    n = len(values)
+    blocks = -(-n // window)
+    padded = np.full(blocks * window, -np.inf)
+    padded[:n] = values
+    padded = padded.reshape(blocks, window)
+    ahead = np.maximum.accumulate(padded, axis=1).ravel()
+    behind = np.maximum.accumulate(padded[:, ::-1], axis=1)[:, ::-1].ravel()
+    return np.maximum(behind[:n - window + 1], ahead[window - 1:n])
+
+
+class Bars:
+    """One symbol's daily highs, lows and closes, with the rolling series strategies share.
+
+    A sweep asks for the same SMA or channel under many parameter sets, so
+    each is computed once per symbol and kept.
+    """
+
+    def __init__(self, dates, high, low, close):
+        self.dates = dates
+        self.high = np.asarray(high, dtype=float)
+        self.low = np.asarray(low, dtype=float)
+        self.close = np.asarray(close, dtype=float)
+        self._cache = {}
+
+    @classmethod
+    def from_frame(cls, frame):
+        return cls(frame.index, frame['High'], frame['Low'], frame['Close'])
+
+    @classmethod
+    def from_matrix(cls, matrix, row):
+        """Row ``row`` of a UniverseMatrix, without the days it has no close for."""
+        close = matrix['Close'][row]
+        valid = ~np.isnan(close)
+        return cls(matrix.dates[valid], matrix['High'][row, valid], matrix['Low'][row, valid], close[valid])
+
+    def __len__(self):
+        return len(self.close)
+
+    def sma(self, window):
+        """Trailing mean over full windows only; NaN until ``window`` bars exist."""
+        key = ('sma', window)
+        if key not in self._cache:
+            out = np.full(len(self), np.nan)
+            if window <= len(self):
+                sums = np.cumsum(np.concatenate([[0.0], self.close]))
+                out[window - 1:] = (sums[window:] - sums[:-window]) / window
+            self._cache[key] = out
+        return self._cache[key]
+
+    def channel(self, window):
+        """Highest high and lowest low of the ``window`` sessions before each bar."""
+        key = ('channel', window)
+        if key not in self._cache:
+            upper, lower = np.full(len(self), np.nan), np.full(len(self), np.nan)
+            if window < len(self):
+                upper[window:] = rolling_max(self.high[:-1], window)
+                lower[window:] = -rolling_max(-self.low[:-1], window)
+            self._cache[key] = (upper, lower)
+        return self._cache[key]
+
+
+#Vectorized strategies_____________________________________________
+
+def sma_cross(bars, fast, slow):
+    """Long while the ``fast`` SMA is above the ``slow`` one."""
+    with np.errstate(invalid='ignore'):
+        return (bars.sma(fast) > bars.sma(slow)).astype(float)
+
+
+def breakout(bars, window):
+    """Long from a close above the prior ``window``-day high until a close below its low."""
+    upper, lower = bars.channel(window)
+    state = np.full(len(bars), np.nan)
+    with np.errstate(invalid='ignore'):
+        state[bars.close > upper] = 1.0
+        state[bars.close < lower] = 0.0
+    return np.nan_to_num(forward_fill(state))
+
+
+#Event-driven strategies_____________________________________________
+
+class Strategy:
+    """Sees one bar at a time and returns the position to hold after its close.
+
+    Subclass for rules that carry state a whole-array expression can't, such as
+    a stop that trails the highest close since entry.
+    """
+
+    def __init__(self, **params):
+        self.params = params
+        self.position = 0.0
+
+    def on_bar(self, high, low, close):
+        raise NotImplementedError
+
+
+class SmaCross(Strategy):
+    def __init__(self, fast, slow):
+        super().__init__(fast=fast, slow=slow)
+        self.fast = RollingSum(fast)
+        self.slow = RollingSum(slow)
+
+    def on_bar(self, high, low, close):
+        fast = self.fast.push(close) / len(self.fast)
+        slow = self.slow.push(close) / len(self.slow)
+        ready = len(self.fast) == self.fast.window and len(self.slow) == self.slow.window
+        self.position = 1.0 if ready and fast > slow else 0.0
+        return self.position
+
+
+class Breakout(Strategy):
+    def __init__(self, window):
+        super().__init__(window=window)
+        self.highs = deque(maxlen=window)
+        self.lows = deque(maxlen=window)
+
+    def on_bar(self, high, low, close):
+        if len(self.highs) == self.highs.maxlen:
+            if close > max(self.highs):
+                self.enter(close)
+            elif close < min(self.lows):
+                self.exit()
+        self.update(close)
+        self.highs.append(high)
+        self.lows.append(low)
+        return self.position
+
+    def enter(self, close):
+        self.position = 1.0
+
+    def exit(self):
+        self.position = 0.0
+
+    def update(self, close):
+        pass
+
+
+class BreakoutTrailingStop(Breakout):
+    """Breakout entries; exits on the channel low or a ``stop`` % fall from the best close since entry."""
+
+    def __init__(self, window, stop):
+        super().__init__(window)
+        self.params['stop'] = stop
+        self.stop = stop / 100.0
+        self.peak = None
+
+    def enter(self, close):
+        if not self.position:
+            self.peak = close
+        self.position = 1.0
+
+    def exit(self):
+        self.position = 0.0
+        self.peak = None
+
+    def update(self, close):
+        if self.position:
+            self.peak = max(self.peak, close)
+            if close < self.peak * (1 - self.stop):
+                self.exit()
+
+
+# Strategy name -> label, parameter names, and its implementation for each engine.
+STRATEGIES = {
+    'sma_cross': {'label': 'SMA Crossover', 'params': ('fast', 'slow'),
+                  'vectorized': sma_cross, 'events': SmaCross},
+    'breakout': {'label': 'High/Low Breakout', 'params': ('window',),
+                 'vectorized': breakout, 'events': Breakout},
+    'breakout_stop': {'label': 'Breakout with Trailing Stop', 'params': ('window', 'stop'),
+                      'vectorized': None, 'events': BreakoutTrailingStop},
+}
+
+
+#Engines_____________________________________________
+
+def run_events(bars, strategy):
+    """Feed ``strategy`` every bar in order and collect the positions it returns."""
+    positions = np.empty(len(bars))
+    on_bar = strategy.on_bar
+    for i, (high, low, close) in enumerate(zip(bars.high.tolist(), bars.low.tolist(), bars.close.tolist())):
+        positions[i] = on_bar(high, low, close)
+    return positions
+
+
+def positions_for(bars, strategy, params, engine='auto'):
+    """Daily positions of ``strategy``; ``auto`` takes the vectorized path when there is one."""
+    spec = STRATEGIES[strategy]
+    if engine == 'vectorized' or (engine == 'auto' and spec['vectorized'] is not None):
+        if spec['vectorized'] is None:
+            raise ValueError('%s has no vectorized implementation' % strategy)
+        return spec['vectorized'](bars, **params)
+    return run_events(bars, spec['events'](**params))
+
+
+def simulate(close, positions, cost_bps=COST_BPS):
+    """Equity curve (starting at 1) and daily returns of holding ``positions``.
+
+    The position taken at a close earns the next session's return; turnover
+    is charged on the day the position changes.
+    """
+    returns = np.zeros(len(close))
+    returns[1:] = close[1:] / close[:-1] - 1
+    held = np.zeros(len(close))
+    held[1:] = positions[:-1]
+    turnover = np.abs(np.diff(positions, prepend=0.0))
+    daily = held * returns - turnover * cost_bps / 10000
+    return np.cumprod(1 + daily), daily
+
+
+def statistics(equity, daily, positions):
+    """Summary of one run, in percent where it reads as one."""
+    n = len(equity)
+    if n < 2:
+        return {'Return %': 0.0, 'CAGR %': 0.0, 'Volatility %': 0.0, 'Sharpe': np.nan,
+                'Max Drawdown %': 0.0, 'Trades': 0, 'Win Rate %': np.nan, 'Exposure %': 0.0}
+    final = equity[-1]
+    years = (n - 1) / TRADING_DAYS
+    deviation = daily[1:].std(ddof=1)
+    drawdown = equity / np.maximum.accumulate(equity) - 1
+
+    # Round trips: from the close a position opens to the close it is flat again.
+    change = np.diff(positions, prepend=0.0, append=0.0)
+    entries = np.flatnonzero((change[:-1] > 0) & (positions > 0))
+    exits = np.flatnonzero((change[1:] < 0) & (positions > 0))
+    before = np.concatenate([[1.0], equity])
+    exit_equity = before[np.minimum(exits + 2, n)]
+    trade_returns = exit_equity[:len(entries)] / before[entries] - 1
+
+    return {
+        'Return %': (final - 1) * 100,
+        'CAGR %': (final ** (1 / years) - 1) * 100 if final > 0 else -100.0,
+        'Volatility %': deviation * np.sqrt(TRADING_DAYS) * 100,
+        'Sharpe': daily[1:].mean() / deviation * np.sqrt(TRADING_DAYS) if deviation > 0 else np.nan,
+        'Max Drawdown %': drawdown.min() * 100,
+        'Trades': len(entries),
+        'Win Rate %': (trade_returns > 0).mean() * 100 if len(entries) else np.nan,
+        'Exposure %': (positions[:-1] > 0).mean() * 100,
+    }
+
+
+class BacktestResult:
+    def __init__(self, symbol, strategy, params, dates, equity, benchmark, positions, stats):
+        self.symbol = symbol
+        self.strategy = strategy
+        self.params = params
+        self.dates = dates
+        self.equity = equity
+        self.benchmark = benchmark
+        self.positions = positions
+        self.stats = stats
+
+    def frame(self):
+        """Strategy and buy-and-hold equity, rebased to 100."""
+        return pd.DataFrame({'Strategy': self.equity * 100, 'Buy & Hold': self.benchmark * 100},
+                            index=pd.DatetimeIndex(self.dates, name='Date'))
+
+
+def run_backtest(history, strategy, params, symbol=None, engine='auto', cost_bps=COST_BPS):
+    """Backtest ``strategy`` on one symbol's daily ``history`` (High, Low, Close)."""
+    bars = Bars.from_frame(history)
+    positions = positions_for(bars, strategy, params, engine)
+    equity, daily = simulate(bars.close, positions, cost_bps)
+    benchmark = bars.close / bars.close[0] if len(bars) else bars.close
+    return BacktestResult(symbol, strategy, dict(params), bars.dates, equity, benchmark, positions,
+                          statistics(equity, daily, positions))
+
+
+#Parameter sweeps_____________________________________________
+
+def parameter_grid(**ranges):
+    """``parameter_grid(fast=(10, 20), slow=(50, 100))`` -> every combination as a dict."""
+    names = list(ranges)
+    return [dict(zip(names, values)) for values in itertools.product(*ranges.values())]
+
+
+def _sweep_chunk(task):
+    strategy, grid, chunk, engine, cost_bps = task
+    rows = []
+    for symbol, bars in chunk:
+        for params in grid:
+            positions = positions_for(bars, strategy, params, engine)
+            equity, daily = simulate(bars.close, positions, cost_bps)
+            row = {'Symbol': symbol}
+            row.update(params)
+            row.update(statistics(equity, daily, positions))
+            rows.append(row)
+    return rows
+
+
+def sweep(matrix, strategy, grid, processes=None, engine='auto', cost_bps=COST_BPS, chunk=SWEEP_CHUNK):
+    """Statistics of every parameter set in ``grid`` on every symbol of a UniverseMatrix.
+
+    Symbols are split into chunks and run across a pool of ``processes``
+    worker processes (``1`` runs in this process). Each worker gets only its
+    symbols' bars and returns statistics rows, never equity curves.
+    """
+    bars = [(symbol, Bars.from_matrix(matrix, i)) for i, symbol in enumerate(matrix.symbols)]
+    tasks = [(strategy, grid, bars[i:i + chunk], engine, cost_bps) for i in range(0, len(bars), chunk)]
+    if processes == 1:
+        chunks = map(_sweep_chunk, tasks)
+        rows = [row for rows in chunks for row in rows]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            rows = [row for rows in pool.map(_sweep_chunk, tasks) for row in rows]
+    columns = ['Symbol'] + list(STRATEGIES[strategy]['params'])
+    return pd.DataFrame(rows).set_index(columns) if rows else pd.DataFrame(columns=columns)
@@ -0,0 +1,122 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from bulk import bulk_fetch
+
+log = logging.getLogger(__name__)
+
+FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume', 'VWAP')
+
+
+class UniverseMatrix:
+    """Daily bars for many symbols as aligned ``symbols x days`` float arrays.
+
+    Days missing for a symbol (not yet listed, suspended) are NaN, so every
+    statistic below is NaN-aware and computed for all symbols in one pass.
+    ``failures`` maps the symbols that could not be loaded to their errors;
+    they have no row, so callers that keep a matrix should retry them.
+    """
+
+    def __init__(self, symbols, dates, fields, failures=None):
+        self.symbols = list(symbols)
+        self.dates = pd.DatetimeIndex(dates)
+        self.fields = fields
+        self.failures = dict(failures or {})
+        self.row = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+    @classmethod
+    def from_frames(cls, frames, fields=FIELDS, failures=None):
+        frames = {symbol: frame for symbol, frame in frames.items() if len(frame)}
+        symbols = sorted(frames)
+        stamps = {symbol: np.asarray(frames[symbol].index, dtype='datetime64[ns]') for symbol in symbols}
+        dates = np.unique(np.concatenate(list(stamps.values()))) if stamps else np.array([], 'datetime64[ns]')
+        arrays = {field: np.full((len(symbols), len(dates)), np.nan) for field in fields}
+        for i, symbol in enumerate(symbols):
+            frame = frames[symbol]
+            cols = dates.searchsorted(stamps[symbol])
+            for field in fields:
+                arrays[field][i, cols] = frame[field].to_numpy(float)
+        return cls(symbols, dates, arrays, failures)
+
+    @classmethod
+    def from_store(cls, store, symbols, start, end, max_workers=16):
+        result = bulk_fetch(symbols, start, end, store.get_history, max_workers=max_workers)
+        if result.failures:
+            log.warning('%d of %d symbols failed to load: %s', len(result.failures), len(symbols),
+                        ', '.join(sorted(result.failures)[:10]))
+        return cls.from_frames(result.frames, failures=result.failures)
+
+    def __getitem__(self, field):
+        return self.fields[field]
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def extend(self, other, keep=None):
+        """Append the days of ``other`` newer than ours, aligned to our symbols.
+
+        With ``keep``, only the newest ``keep`` days are retained.
+        """
+        cols = np.flatnonzero(other.dates > self.dates[-1]) if len(self.dates) else np.arange(len(other.dates))
+        rows = [other.row.get(symbol) for symbol in self.symbols]
+        fields = {}
+        for field, values in self.fields.items():
+            added = np.full((len(self.symbols), len(cols)), np.nan)
+            for i, r in enumerate(rows):
+                if r is not None:
+                    added[i] = other[field][r, cols]
+            fields[field] = np.hstack([values, added])
+        dates = self.dates.append(other.dates[cols])
+        if keep is not None and len(dates) > keep:
+            dates = dates[-keep:]
+            fields = {field: values[:, -keep:] for field, values in fields.items()}
+        return UniverseMatrix(self.symbols, dates, fields, dict(self.failures, **other.failures))
+
+    def since(self, start):
+        """Column slice from ``start`` onwards; the arrays are views, not copies."""
+        col = self.dates.searchsorted(pd.Timestamp(start))
+        return UniverseMatrix(self.symbols, self.dates[col:],
+                              {field: values[:, col:] for field, values in self.fields.items()}, self.failures)
+
+
+def rolling_mean(values, window):
+    """Row-wise trailing mean over ``window`` columns, ignoring NaNs (min_periods=1)."""
+    valid = ~np.isnan(values)
+    sums = np.cumsum(np.where(valid, values, 0.0), axis=1)
+    counts = np.cumsum(valid, axis=1)
+    if window < values.shape[1]:
+        sums[:, window:] = sums[:, window:] - sums[:, :-window]
+        counts[:, window:] = counts[:, window:] - counts[:, :-window]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def last_valid(values):
+    """Last non-NaN value of each row."""
+    valid = ~np.isnan(values)
+    idx = values.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)
+    out = values[np.arange(len(values)), idx]
+    out[~valid.any(axis=1)] = np.nan
+    return out
+
+
+def batch_stats(matrix, start=None, sma_windows=(10, 20, 50, 100)):
+    """The card and overlay statistics for every symbol at once.
+
+    SMAs are taken over the full matrix and reported at the latest bar; the
+    high, low and averages cover the window from ``start`` like the cards do.
+    """
+    window = matrix.since(start) if start is not None else matrix
+    with np.errstate(all='ignore'):
+        out = {
+            'Close': last_valid(matrix['Close']),
+            'High': np.nanmax(window['High'], axis=1),
+            'Low': np.nanmin(window['Low'], axis=1),
+            'Average Volume': np.nanmean(window['Volume'], axis=1).round(2),
+            'Average VWAP': np.nanmean(window['VWAP'], axis=1).round(2),
+        }
+    for n in sma_windows:
+        out['SMA_%d' % n] = last_valid(rolling_mean(matrix['Close'], n))
+    return pd.DataFrame(out, index=pd.Index(matrix.symbols, name='Symbol'))
@@ -0,0 +1,61 @@
+"""Universe-wide card statistics: one vectorized pass vs a pandas loop per symbol.
+
+    python benchmarks/bench_batch.py --days 365
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pandas as pd
+
+from batch import UniverseMatrix, batch_stats
+from fakes import synthetic_history
+
+
+def per_symbol(frames, start):
+    rows = {}
+    for symbol, frame in frames.items():
+        window = frame.loc[pd.Timestamp(start):]
+        row = {'High': window.High.max(), 'Low': window.Low.min(),
+               'Average Volume': window.Volume.mean().round(2), 'Average VWAP': window.VWAP.mean().round(2)}
+        for n in (10, 20, 50, 100):
+            row['SMA_%d' % n] = frame.Close.rolling(n, min_periods=1).mean().iloc[-1]
+        rows[symbol] = row
+    return pd.DataFrame.from_dict(rows, orient='index')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--window', type=int, default=90)
+    args = parser.parse_args()
+
+    symbols = list(pd.read_csv(os.path.join(ROOT, 'ind_nifty500list.csv'))['Symbol'])
+    end = datetime.date.today()
+    frames = {}
+    for symbol in symbols:
+        frame = synthetic_history(symbol, end - datetime.timedelta(days=args.days), end)
+        frame.index = pd.to_datetime(frame.index)
+        frames[symbol] = frame
+    start = end - datetime.timedelta(days=args.window)
+
+    t0 = time.perf_counter()
+    matrix = UniverseMatrix.from_frames(frames)
+    t1 = time.perf_counter()
+    batch_stats(matrix, start)
+    t2 = time.perf_counter()
+    per_symbol(frames, start)
+    t3 = time.perf_counter()
+    print('symbols=%d days=%d' % (len(matrix), len(matrix.dates)))
+    print('align      %8.1f ms' % ((t1 - t0) * 1000))
+    print('batch      %8.1f ms' % ((t2 - t1) * 1000))
+    print('per-symbol %8.1f ms' % ((t3 - t2) * 1000))
+
+
+if __name__ == '__main__':
+    main()
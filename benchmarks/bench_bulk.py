@@ -0,0 +1,42 @@
+"""Throughput of bulk_fetch against a fake fetcher with simulated latency.
+
+    python benchmarks/bench_bulk.py --latency 0.2 --workers 1 8 32
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pandas as pd
+
+from bulk import bulk_fetch, bulk_fetch_async
+from fakes import FakeFetcher
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--timeout', type=float, default=30.0)
+    args = parser.parse_args()
+
+    symbols = list(pd.read_csv(os.path.join(ROOT, 'ind_nifty500list.csv'))['Symbol'])[:args.symbols]
+    end = datetime.date.today()
+    start = end - datetime.timedelta(days=365)
+    for workers in args.workers:
+        result = bulk_fetch(symbols, start, end, FakeFetcher(args.latency), workers, args.timeout)
+        print('threads  workers=%-3d %s' % (workers, result.summary()))
+        with ThreadPoolExecutor(workers) as pool:
+            result = asyncio.run(bulk_fetch_async(symbols, start, end, FakeFetcher(args.latency),
+                                                  workers, args.timeout, executor=pool))
+        print('asyncio  workers=%-3d %s' % (workers, result.summary()))
+
+
+if __name__ == '__main__':
+    main()
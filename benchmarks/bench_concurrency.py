@@ -0,0 +1,145 @@
+"""Throughput of update_page under concurrent users while upstream fetches are slow.
+
+Simulated users click through random views through the Flask server. A
+fraction of the views hit symbols the store has never seen, so they wait on
+a fetcher with ``--latency`` seconds of delay. The server is modelled as
+``--workers`` request slots, like a gunicorn pool of sync workers.
+
+In ``sync`` mode each request waits for its page build, the behaviour before
+builds moved to the job queue. In ``async`` mode a request waits at most
+PAGE_WAIT, answers with a loading state, and the user polls for the result.
+
+    python benchmarks/bench_concurrency.py --users 32 --workers 4 --latency 1.0
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault('STOCKVIEW_STORE', tempfile.mkdtemp())
+os.environ.setdefault('STOCKVIEW_CACHE', tempfile.mkdtemp())
+
+import numpy as np
+
+import main_wo_custom as dashboard
+from benchmarks.dash_client import DashClient
+from fakes import FakeFetcher
+from market import last_closed_session
+from planner import superset_start
+
+BUTTONS = list(dashboard.TIMEFRAMES)
+SHORT = ['1week', '1month', '3month', '6month', '1year']
+
+
+class Server:
+    """``workers`` request slots in front of the Dash app."""
+
+    def __init__(self, workers):
+        self.slots = threading.Semaphore(workers)
+        self.local = threading.local()
+        self.responses = 0
+        self._lock = threading.Lock()
+
+    def client(self):
+        if not hasattr(self.local, 'client'):
+            self.local.client = DashClient(dashboard.app)
+        return self.local.client
+
+    def call(self, values, state, changed):
+        with self.slots:
+            status, _, data = self.client().call('update_page', values, state, changed=[changed])
+        with self._lock:
+            self.responses += 1
+        assert status in (200, 204), status
+        return data['response'] if data else {}
+
+
+def view(server, symbol, button, chart_state):
+    """One page view as the browser performs it: a click, then polls until the chart arrives."""
+    values = [symbol] + [1 if b == button else None for b in BUTTONS] + [None, None, None]
+    response = server.call(values, [chart_state, None], '%s.n_clicks' % button)
+    polls = 0
+    while 'chart-state' not in response:
+        request = response.get('page-request', {}).get('data')
+        if request is None:
+            raise RuntimeError('page build failed for %s %s' % (symbol, button))
+        time.sleep(dashboard.PAGE_POLL_MS / 1000.0)
+        polls += 1
+        values = [symbol] + [None] * len(BUTTONS) + [None, None, polls]
+        response = server.call(values, [chart_state, request], 'page-poll.n_intervals')
+    return response['chart-state']['data']
+
+
+def run(mode, args, warm, cold):
+    dashboard.PAGE_WAIT = None if mode == 'sync' else args.page_wait
+    dashboard.page_cache.clear()
+    server = Server(args.workers)
+    latencies = {'warm': [], 'cold': []}
+    lock = threading.Lock()
+
+    def user(seed):
+        rng = random.Random(seed)
+        chart_state = None
+        for _ in range(args.views):
+            kind = 'cold' if rng.random() < args.cold else 'warm'
+            symbol = rng.choice(cold if kind == 'cold' else warm)
+            t0 = time.perf_counter()
+            chart_state = view(server, symbol, rng.choice(SHORT), chart_state)
+            with lock:
+                latencies[kind].append(time.perf_counter() - t0)
+
+    threads = [threading.Thread(target=user, args=(i,)) for i in range(args.users)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    views = sum(len(v) for v in latencies.values())
+    row = {'mode': mode, 'elapsed': elapsed, 'rps': server.responses / elapsed, 'views/s': views / elapsed}
+    for kind, values in latencies.items():
+        if values:
+            row['%s p50' % kind] = np.percentile(values, 50) * 1000
+            row['%s p95' % kind] = np.percentile(values, 95) * 1000
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=32)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--views', type=int, default=10, help='page views per user')
+    parser.add_argument('--cold', type=float, default=0.2, help='share of views on never-fetched symbols')
+    parser.add_argument('--latency', type=float, default=1.0, help='upstream fetch delay, seconds')
+    parser.add_argument('--page-wait', type=float, default=dashboard.PAGE_WAIT)
+    args = parser.parse_args()
+
+    symbols = dashboard.registry.symbols()
+    warm = symbols[:50]
+    end = last_closed_session()
+    dashboard.store.fetcher = FakeFetcher()
+    for symbol in warm:
+        dashboard.store.ensure(symbol, superset_start(end), end)
+    dashboard.store.fetcher = FakeFetcher(latency=args.latency)
+
+    # Each mode gets its own never-fetched symbols, so both pay the same cold fetches.
+    rest = symbols[50:]
+    half = len(rest) // 2
+    rows = [run('sync', args, warm, rest[:half]), run('async', args, warm, rest[half:])]
+
+    columns = ['mode', 'elapsed', 'rps', 'views/s', 'warm p50', 'warm p95', 'cold p50', 'cold p95']
+    print(' '.join('%10s' % c for c in columns))
+    for row in rows:
+        print(' '.join('%10s' % row[c] if isinstance(row.get(c), str) else '%10.2f' % row.get(c, float('nan'))
+                       for c in columns))
+    print('page jobs:', dashboard.page_jobs.stats())
+
+
+if __name__ == '__main__':
+    main()
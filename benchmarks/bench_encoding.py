@@ -0,0 +1,80 @@
+"""Chart data encodings compared by payload bytes and JSON encode time.
+
+Encodes one candlestick plus four SMA overlays for histories of increasing
+length three ways: JSON number lists with ISO dates (what Patch updates sent
+before), a plotly.py figure dict built from pandas columns, and
+chart_encoding's float32 / epoch-millisecond typed arrays.
+
+    python benchmarks/bench_encoding.py
+"""
+import datetime
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.utils import PlotlyJSONEncoder
+
+from chart_encoding import epoch_ms, typed_array
+from fakes import synthetic_history
+
+YEARS = (1, 5, 10, 20)
+REPEAT = 20
+
+
+def history(years):
+    end = datetime.date.today()
+    frame = synthetic_history('RELIANCE', end - datetime.timedelta(days=365 * years), end)
+    frame.index = pd.to_datetime(frame.index)
+    for n in (10, 20, 50, 100):
+        frame['SMA_%d' % n] = frame.Close.rolling(n, min_periods=1).mean()
+    return frame
+
+
+def json_lists(frame):
+    x = [d.isoformat() for d in frame.index]
+    data = [{'x': x, 'open': frame.Open.tolist(), 'high': frame.High.tolist(),
+             'low': frame.Low.tolist(), 'close': frame.Close.tolist()}]
+    data += [{'x': x, 'y': frame['SMA_%d' % n].tolist()} for n in (10, 20, 50, 100)]
+    return json.dumps(data)
+
+
+def plotly_default(frame):
+    fig = go.Figure([go.Candlestick(x=frame.index, open=frame.Open, high=frame.High,
+                                    low=frame.Low, close=frame.Close)])
+    for n in (10, 20, 50, 100):
+        fig.add_trace(go.Scatter(x=frame.index, y=frame['SMA_%d' % n]))
+    return json.dumps(fig.to_dict()['data'], cls=PlotlyJSONEncoder)
+
+
+def typed(frame):
+    x = epoch_ms(frame.index)
+    data = [{'x': x, 'open': typed_array(frame.Open), 'high': typed_array(frame.High),
+             'low': typed_array(frame.Low), 'close': typed_array(frame.Close)}]
+    data += [{'x': x, 'y': typed_array(frame['SMA_%d' % n])} for n in (10, 20, 50, 100)]
+    return json.dumps(data)
+
+
+def measure(encode, frame):
+    t0 = time.perf_counter()
+    for _ in range(REPEAT):
+        body = encode(frame)
+    return len(body), (time.perf_counter() - t0) / REPEAT * 1000
+
+
+def main():
+    print('%-6s %-6s %-16s %10s %9s' % ('years', 'bars', 'encoding', 'bytes', 'ms'))
+    for years in YEARS:
+        frame = history(years)
+        for name, encode in (('json lists', json_lists), ('plotly figure', plotly_default), ('typed arrays', typed)):
+            size, ms = measure(encode, frame)
+            print('%-6d %-6d %-16s %10d %9.2f' % (years, len(frame), name, size, ms))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""Bulk export throughput and memory: /export for the whole universe in each format.
+
+Seeds a store with ``--years`` of synthetic bars for ``--symbols`` symbols,
+then downloads them through /export on a bare Flask app, consuming the body
+chunk by chunk. Each format runs in its own process so its peak RSS is its
+own; ``materialize`` builds the same CSV as one table in memory, for
+comparison. The downloaded body is read back to check the row count.
+
+    python benchmarks/bench_export.py --symbols 500 --years 10
+"""
+import argparse
+import datetime
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pandas as pd
+
+FORMATS = ('csv', 'parquet', 'arrow', 'materialize')
+
+
+def rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def read_back(fmt, body):
+    import pyarrow as pa
+    if fmt == 'csv':
+        return len(pd.read_csv(io.BytesIO(body)))
+    if fmt == 'parquet':
+        return pd.read_parquet(io.BytesIO(body)).shape[0]
+    return pa.ipc.open_stream(body).read_all().num_rows
+
+
+def child(args):
+    from flask import Flask
+
+    import pyarrow as pa
+    from pyarrow import csv
+
+    from export import mount_export, symbol_table
+    from store import OHLCVStore
+
+    store = OHLCVStore(args.store, fetcher=None)
+    symbols = store.symbols()[:args.symbols]
+    server = Flask(__name__)
+    mount_export(server, store, symbols)
+    baseline = rss_mb()
+    t0 = time.perf_counter()
+    if args.format == 'materialize':
+        table = pa.concat_tables([symbol_table(store, s, args.start, args.end) for s in symbols])
+        sink = io.BytesIO()
+        csv.write_csv(table, sink, csv.WriteOptions(quoting_style='none'))
+        body = sink.getvalue()
+        chunks, rows = 1, table.num_rows
+    else:
+        url = '/export?symbols=all&start=%s&end=%s&format=%s' % (args.start, args.end, args.format)
+        response = server.test_client().get(url, buffered=False)
+        assert response.status_code == 200, response.status_code
+        size, chunks, kept = 0, 0, []
+        for chunk in response.response:
+            size += len(chunk)
+            chunks += 1
+            if args.verify:
+                kept.append(chunk if isinstance(chunk, bytes) else chunk.encode())
+        response.close()
+        body = b''.join(kept)
+        rows = None
+    seconds = time.perf_counter() - t0
+    size = len(body) if args.format == 'materialize' else size
+    peak = rss_mb() - baseline
+    if args.verify and args.format != 'materialize':
+        rows = read_back(args.format, body)
+    print(json.dumps({'seconds': seconds, 'bytes': size, 'chunks': chunks, 'rows': rows, 'peak_mb': peak}))
+
+
+def seed(root, count, start, end):
+    from fakes import synthetic_history
+    from store import OHLCVStore
+
+    symbols = list(pd.read_csv(os.path.join(ROOT, 'ind_nifty500list.csv'))['Symbol'])[:count]
+    store = OHLCVStore(root, fetcher=synthetic_history)
+    for symbol in symbols:
+        store.ensure(symbol, start, end)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=list(FORMATS))
+    parser.add_argument('--store', help='existing store directory (default: seed a temporary one)')
+    parser.add_argument('--verify', action='store_true', help='keep the body and count its rows')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--format', help=argparse.SUPPRESS)
+    parser.add_argument('--start', help=argparse.SUPPRESS)
+    parser.add_argument('--end', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        args.start, args.end = datetime.date.fromisoformat(args.start), datetime.date.fromisoformat(args.end)
+        return child(args)
+
+    from market import last_closed_session
+
+    end = last_closed_session()
+    start = end - datetime.timedelta(days=365 * args.years)
+    store = args.store
+    if store is None:
+        store = tempfile.mkdtemp()
+        t0 = time.perf_counter()
+        seed(store, args.symbols, start - datetime.timedelta(days=200), end)
+        print('seeded %d symbols in %.1fs' % (args.symbols, time.perf_counter() - t0))
+
+    print('%-12s %9s %10s %8s %10s %9s %10s' % ('format', 'seconds', 'MB', 'chunks', 'rows', 'MB/s', 'peak MB'))
+    for fmt in args.formats:
+        command = [sys.executable, os.path.abspath(__file__), '--child', '--store', store, '--format', fmt,
+                   '--symbols', str(args.symbols), '--years', str(args.years),
+                   '--start', start.isoformat(), '--end', end.isoformat()]
+        if args.verify:
+            command.append('--verify')
+        out = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        r = json.loads(out.strip().splitlines()[-1])
+        mb = r['bytes'] / 1e6
+        print('%-12s %9.2f %10.1f %8d %10s %9.1f %10.1f' % (fmt, r['seconds'], mb, r['chunks'], r['rows'] or '-',
+                                                          mb / r['seconds'], r['peak_mb']))
+
+
+if __name__ == '__main__':
+    main()
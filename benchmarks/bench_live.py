@@ -0,0 +1,89 @@
+"""Live mode cost: tick aggregation rate and per-poll work for many open charts.
+
+Replays a synthetic session for ``--symbols`` symbols into the dashboard's
+LiveAggregator one simulated minute at a time. After each minute, every
+subscribed chart polls update_page's live callback through the Flask server.
+Reports aggregation throughput, poll latency and the bytes each poll sends
+(extendData), next to the size of re-sending the whole figure.
+
+    python benchmarks/bench_live.py --symbols 500 --subscribers 300 --minutes 60
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault('STOCKVIEW_STORE', tempfile.mkdtemp())
+os.environ.setdefault('STOCKVIEW_CACHE', tempfile.mkdtemp())
+
+import numpy as np
+
+import main_wo_custom as dashboard
+from benchmarks.dash_client import DashClient
+from fakes import TickReplay, synthetic_ticks
+from market import last_closed_session
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--subscribers', type=int, default=300)
+    parser.add_argument('--minutes', type=int, default=60, help='session minutes to replay')
+    parser.add_argument('--interval', choices=['1m', '5m'], default='1m')
+    args = parser.parse_args()
+
+    symbols = dashboard.registry.symbols()[:args.symbols]
+    ticks = synthetic_ticks(symbols, last_closed_session())
+    first = ticks.ts.iloc[0] - ticks.ts.iloc[0] % 60
+    candles = dashboard.live_candles
+    candles.reset()
+    # The callback only checks that a feed exists; ticks are pushed below minute by minute.
+    dashboard.live_feed = TickReplay(ticks.iloc[:0], candles.on_ticks)
+
+    client = DashClient(dashboard.app)
+    subscribed = symbols[:args.subscribers]
+    cursors = {}
+    for symbol in subscribed:
+        _, _, data = client.call('update_live', [True, symbol, args.interval, None], [None],
+                                 changed=['live-mode.value'])
+        cursors[symbol] = data['response']['live-cursor']['data']
+
+    aggregate_seconds, poll_seconds, poll_bytes, minute_seconds = 0.0, [], [], []
+    n_ticks = 0
+    for minute in range(args.minutes):
+        lo, hi = first + minute * 60, first + (minute + 1) * 60
+        batch = ticks[(ticks.ts >= lo) & (ticks.ts < hi)]
+        t0 = time.perf_counter()
+        candles.on_ticks(batch.symbol.tolist(), batch.ts.tolist(), batch.price.tolist(), batch.qty.tolist())
+        aggregate_seconds += time.perf_counter() - t0
+        n_ticks += len(batch)
+
+        started = time.perf_counter()
+        for symbol in subscribed:
+            t0 = time.perf_counter()
+            status, body, data = client.call('update_live', [True, symbol, args.interval, minute + 1],
+                                             [cursors[symbol]], changed=['live-tick.n_intervals'])
+            poll_seconds.append(time.perf_counter() - t0)
+            poll_bytes.append(len(body))
+            if status == 200:
+                cursors[symbol] = data['response']['live-cursor']['data']
+        minute_seconds.append(time.perf_counter() - started)
+
+    _, full, _ = client.call('update_live', [True, subscribed[0], args.interval, None], [None],
+                             changed=['live-mode.value'])
+    ms = np.asarray(poll_seconds) * 1000
+    print('aggregated %d ticks in %.3fs: %.0f ticks/s' % (n_ticks, aggregate_seconds, n_ticks / aggregate_seconds))
+    print('%d polls: p50 %.2f ms, p95 %.2f ms, p99 %.2f ms' % (len(ms), np.percentile(ms, 50),
+                                                              np.percentile(ms, 95), np.percentile(ms, 99)))
+    print('poll payload: mean %.0f bytes; full figure after %d minutes: %d bytes'
+          % (np.mean(poll_bytes), args.minutes, len(full)))
+    print('serving all %d charts once: mean %.3fs per simulated minute'
+          % (len(subscribed), np.mean(minute_seconds)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Callback response size per interaction: Patch updates vs full figure rebuilds.
+
+Replays a click sequence through the Flask server against the offline fake
+fetcher and reports the bytes each response carries, both as actually sent
+(partial updates) and as a full render of the same view would have been.
+
+    python benchmarks/bench_payload.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault('STOCKVIEW_STORE', tempfile.mkdtemp())
+os.environ.setdefault('STOCKVIEW_CACHE', tempfile.mkdtemp())
+
+import main_wo_custom as dashboard
+from benchmarks.dash_client import DashClient
+from fakes import FakeFetcher
+
+BUTTONS = list(dashboard.TIMEFRAMES)
+SEQUENCE = [('RELIANCE', '1week'), ('RELIANCE', '1month'), ('RELIANCE', '3month'),
+            ('RELIANCE', '6month'), ('RELIANCE', '1year'), ('RELIANCE', '1month'),
+            ('RELIANCE', '1week'), ('TCS', '3month'), ('TCS', '1year'), ('TCS', '1week'),
+            ('TCS', '5year'), ('TCS', '10year'), ('TCS', 'max'), ('TCS', '1year')]
+
+
+def click(client, symbol, button, state):
+    values = [symbol] + [1 if b == button else None for b in BUTTONS] + [None, None, None]
+    t0 = time.perf_counter()
+    status, body, data = client.call('update_page', values, [state, None], changed=['%s.n_clicks' % button])
+    elapsed = time.perf_counter() - t0
+    assert status == 200, status
+    return body, data['response'].get('chart-state', {}).get('data'), elapsed
+
+
+def main():
+    dashboard.store.fetcher = FakeFetcher()
+    client = DashClient(dashboard.app)
+    for symbol, button in SEQUENCE:
+        # Warm the store and page cache; slow builds answer with a loading state first.
+        while click(client, symbol, button, None)[1] is None:
+            time.sleep(0.05)
+
+    print('%-10s %-8s %12s %12s %9s' % ('symbol', 'window', 'sent bytes', 'full bytes', 'ms'))
+    state = None
+    total_sent = total_full = 0
+    for symbol, button in SEQUENCE:
+        body, state, elapsed = click(client, symbol, button, state)
+        full, _, _ = click(client, symbol, button, None)
+        total_sent += len(body)
+        total_full += len(full)
+        print('%-10s %-8s %12d %12d %9.2f' % (symbol, button, len(body), len(full), elapsed * 1000))
+    print('%-19s %12d %12d' % ('total', total_sent, total_full))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""Worker cold start: import-to-first-response time of the dashboard.
+
+``cold`` starts a fresh interpreter per run, like a new container or a
+non-preloaded gunicorn worker. ``fork`` imports the app once with
+STOCKVIEW_PRELOAD=1 (what gunicorn.conf.py does in the master) and forks a
+child per run, like a preloaded gunicorn worker. Each run times the import,
+the browser's first page load (/, /_dash-layout, /_dash-dependencies) and the
+first chart callback; the median of ``--runs`` is reported.
+
+    python benchmarks/bench_startup.py --mode both --runs 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+PHASES = ('import', 'page', 'callback', 'total')
+
+
+def first_responses(started, imported):
+    """Time the first page load and chart callback; ``started``/``imported`` are perf_counter stamps."""
+    import main_wo_custom as dashboard
+    from benchmarks.dash_client import DashClient
+    from fakes import synthetic_history
+
+    dashboard.store.fetcher = synthetic_history
+    t0 = time.perf_counter()
+    client = DashClient(dashboard.app)
+    for path in ('/_dash-layout', '/_dash-dependencies'):
+        assert client.client.get(path).status_code == 200, path
+    t1 = time.perf_counter()
+    clicks = [1 if key == '1year' else None for key in dashboard.TIMEFRAMES]
+    status, _, data = client.call('update_page', ['TCS'] + clicks + [None, None, None], [None, None],
+                                  changed=['1year.n_clicks'])
+    assert status == 200 and 'chart' in data['response'], status
+    t2 = time.perf_counter()
+    return {'import': imported - started, 'page': t1 - t0, 'callback': t2 - t1, 'total': t2 - started}
+
+
+def child():
+    started = time.perf_counter()
+    import main_wo_custom  # noqa: F401
+    imported = time.perf_counter()
+    print(json.dumps(first_responses(started, imported)))
+
+
+def cold_run():
+    started = time.perf_counter()
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), '--child'], env=os.environ,
+                         check=True, capture_output=True, text=True).stdout
+    timings = json.loads(out.strip().splitlines()[-1])
+    # Interpreter start-up happens before the child's clock starts.
+    timings['process'] = time.perf_counter() - started
+    return timings
+
+
+def fork_runs(runs):
+    os.environ['STOCKVIEW_PRELOAD'] = '1'
+    t0 = time.perf_counter()
+    import main_wo_custom  # noqa: F401
+    print('master preload: %.0f ms' % ((time.perf_counter() - t0) * 1000))
+    results = []
+    for _ in range(runs):
+        read, write = os.pipe()
+        started = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read)
+            timings = first_responses(started, time.perf_counter())
+            os.write(write, json.dumps(timings).encode())
+            os._exit(0)
+        os.close(write)
+        with os.fdopen(read) as pipe:
+            results.append(json.loads(pipe.read()))
+        os.waitpid(pid, 0)
+    return results
+
+
+def report(label, results):
+    print(label)
+    for phase in PHASES + (('process',) if 'process' in results[0] else ()):
+        values = sorted(r[phase] * 1000 for r in results)
+        print('  %-9s median %7.1f ms  (min %7.1f, max %7.1f)' % (phase, values[len(values) // 2],
+                                                                values[0], values[-1]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mode', choices=['cold', 'fork', 'both'], default='both')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    os.environ.setdefault('STOCKVIEW_STORE', tempfile.mkdtemp())
+    os.environ.setdefault('STOCKVIEW_CACHE', tempfile.mkdtemp())
+    if args.child:
+        return child()
+    # Bars already stored, so the first callback times rendering rather than an upstream fetch.
+    # Imported here: the child must not have loaded anything before its clock starts.
+    from fakes import synthetic_history
+    from planner import plan_range
+    from store import OHLCVStore
+    store = OHLCVStore(os.environ['STOCKVIEW_STORE'], fetcher=synthetic_history)
+    store.get_history('TCS', *plan_range('1year'))
+
+    if args.mode in ('cold', 'both'):
+        report('cold interpreter (%d runs)' % args.runs, [cold_run() for _ in range(args.runs)])
+    if args.mode in ('fork', 'both'):
+        report('forked from a preloaded master (%d runs)' % args.runs, fork_runs(args.runs))
+
+
+if __name__ == '__main__':
+    main()
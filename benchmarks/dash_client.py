@@ -0,0 +1,34 @@
+"""Drive Dash callbacks through the Flask ``server`` the way the browser does."""
+import json
+
+
+class DashClient:
+    def __init__(self, app):
+        self.app = app
+        self.client = app.server.test_client()
+        self.client.get('/')
+        self._by_name = {entry['callback'].__name__: (output, entry)
+                         for output, entry in app.callback_map.items()}
+
+    def payload(self, callback, values, state=(), changed=None):
+        """Request body for ``callback`` with input values in declaration order."""
+        output, entry = self._by_name[callback]
+        outputs = [dict(zip(('id', 'property'), part.rsplit('.', 1)))
+                   for part in output.strip('.').split('...')]
+        inputs = [dict(spec, value=v) for spec, v in zip(entry['inputs'], values)]
+        states = [dict(spec, value=v) for spec, v in zip(entry['state'], state)]
+        return {
+            'output': output,
+            'outputs': outputs if output.startswith('..') else outputs[0],
+            'inputs': inputs,
+            'state': states,
+            'changedPropIds': changed or ['%(id)s.%(property)s' % inputs[0]],
+        }
+
+    def call(self, callback, values, state=(), changed=None):
+        """POST one callback; returns (status, response bytes, decoded response or None)."""
+        response = self.client.post('/_dash-update-component',
+                                    json=self.payload(callback, values, state, changed))
+        body = response.get_data()
+        data = json.loads(body) if response.status_code == 200 else None
+        return response.status_code, body, data
@@ -0,0 +1,363 @@
+"""Load test for update_page: latency, throughput, memory and payload per timeframe.
+
+Drives the callback either directly (``--mode direct``, the Python function
+under a Dash callback context) or through the Flask server (``--mode http``)
+from ``--concurrency`` threads. The requests mix symbols and timeframes.
+nsepy is replaced by a RecordedFetcher replaying fixtures under
+``--fixtures``. Missing fixtures are recorded once from the synthetic
+generator, or from nsepy with ``--upstream nsepy``.
+
+Fetch (store reads), compute (page model) and render (callback outputs) are
+timed separately, in a sequential pass of ``--stage-requests`` views run
+with the page cache off after the measured phase; with the cache on, the
+measured phase is all cache hits and never fetches or computes. Results are
+written as JSON; ``--compare`` flags metrics that regressed against an
+earlier run by more than ``--threshold``.
+
+    python benchmarks/loadtest.py --mode http --concurrency 8 --save data/bench/head.json
+    python benchmarks/loadtest.py --compare data/bench/head.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault('STOCKVIEW_STORE', tempfile.mkdtemp())
+os.environ.setdefault('STOCKVIEW_CACHE', tempfile.mkdtemp())
+
+import dash
+import numpy as np
+import plotly
+from dash._callback_context import context_value
+from dash._utils import AttributeDict
+
+import main_wo_custom as dashboard
+from benchmarks.dash_client import DashClient
+from fakes import RecordedFetcher, synthetic_history
+from planner import window_start
+
+BUTTONS = list(dashboard.TIMEFRAMES)
+# Relative click frequency per timeframe; short windows dominate real use.
+DEFAULT_MIX = {'1week': 4, '1month': 4, '3month': 3, '6month': 2, '1year': 3, '5year': 1,
+               '10year': 1, 'max': 1}
+STAGES = ('fetch', 'compute', 'render')
+
+
+def percentiles(samples):
+    if not samples:
+        return {'count': 0}
+    ms = np.asarray(samples) * 1000
+    return {'count': len(ms), 'mean': float(ms.mean()), 'p50': float(np.percentile(ms, 50)),
+            'p95': float(np.percentile(ms, 95)), 'p99': float(np.percentile(ms, 99))}
+
+
+# Stage timing______________________________________________
+class StageTimer:
+    """Wraps the store read, page model and page render to time each stage.
+
+    The fetch time spent inside a page build is subtracted from its compute
+    time, so the stages don't overlap.
+    """
+
+    def __init__(self):
+        self.samples = {stage: [] for stage in STAGES}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _add(self, stage, seconds):
+        with self._lock:
+            self.samples[stage].append(seconds)
+
+    def install(self):
+        get_history, page_model, render_page = (dashboard.store.get_history, dashboard.page_model,
+                                                dashboard.render_page)
+
+        def timed_get_history(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return get_history(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - t0
+                self._local.fetch = getattr(self._local, 'fetch', 0.0) + elapsed
+                self._add('fetch', elapsed)
+
+        def timed_page_model(*args, **kwargs):
+            self._local.fetch = 0.0
+            t0 = time.perf_counter()
+            try:
+                return page_model(*args, **kwargs)
+            finally:
+                self._add('compute', time.perf_counter() - t0 - self._local.fetch)
+
+        def timed_render_page(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return render_page(*args, **kwargs)
+            finally:
+                self._add('render', time.perf_counter() - t0)
+
+        dashboard.store.get_history = timed_get_history
+        dashboard.page_model = timed_page_model
+        dashboard.render_page = timed_render_page
+
+    def clear(self):
+        with self._lock:
+            for samples in self.samples.values():
+                samples.clear()
+
+    def report(self):
+        return {stage: percentiles(samples) for stage, samples in self.samples.items()}
+
+
+# Drivers___________________________________________________
+def output_ids():
+    output = next(key for key, entry in dashboard.app.callback_map.items()
+                  if entry['callback'].__name__ == 'update_page')
+    return [part.rsplit('.', 1)[0] for part in output.strip('.').split('...')]
+
+
+class DirectDriver:
+    """Calls the update_page function in-process, serializing outputs as Dash would."""
+
+    def __init__(self):
+        self.ids = output_ids()
+        self.fn = getattr(dashboard.update_page, '__wrapped__', dashboard.update_page)
+
+    def call(self, values, state, changed):
+        ctx = AttributeDict(triggered_inputs=[{'prop_id': changed, 'value': 1}])
+        token = context_value.set(ctx)
+        try:
+            outputs = self.fn(*values, *state)
+        except dash.exceptions.PreventUpdate:
+            return {}, 0
+        finally:
+            context_value.reset(token)
+        response = {i: {'data' if i in ('chart-state', 'page-request') else 'value': o}
+                    for i, o in zip(self.ids, outputs) if o is not dash.no_update}
+        body = json.dumps(response, cls=plotly.utils.PlotlyJSONEncoder)
+        return response, len(body)
+
+
+class HttpDriver:
+    """POSTs to /_dash-update-component through the Flask test client, one per thread."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def call(self, values, state, changed):
+        if not hasattr(self._local, 'client'):
+            self._local.client = DashClient(dashboard.app)
+        status, body, data = self._local.client.call('update_page', values, state, changed=[changed])
+        if status not in (200, 204):
+            raise RuntimeError('HTTP %d' % status)
+        return (data['response'] if data else {}), len(body)
+
+
+def view(driver, symbol, button):
+    """One page view from a fresh page: click, then poll while the build runs.
+
+    Returns (latency seconds, response bytes, responses).
+    """
+    t0 = time.perf_counter()
+    values = [symbol] + [1 if b == button else None for b in BUTTONS] + [None, None, None]
+    response, size = driver.call(values, [None, None], '%s.n_clicks' % button)
+    calls, polls = 1, 0
+    while 'chart-state' not in response:
+        request = response.get('page-request', {}).get('data')
+        if request is None:
+            raise RuntimeError('page build failed for %s %s' % (symbol, button))
+        time.sleep(dashboard.PAGE_POLL_MS / 1000.0)
+        polls += 1
+        values = [symbol] + [None] * len(BUTTONS) + [None, None, polls]
+        response, polled = driver.call(values, [None, request], 'page-poll.n_intervals')
+        size += polled
+        calls += 1
+    return time.perf_counter() - t0, size, calls
+
+
+# Run________________________________________________________
+def workload(symbols, mix, requests, seed):
+    rng = random.Random(seed)
+    buttons = list(mix)
+    weights = [mix[b] for b in buttons]
+    return [(rng.choice(symbols), rng.choices(buttons, weights)[0]) for _ in range(requests)]
+
+
+def prepare(args, symbols):
+    upstream = synthetic_history
+    if args.upstream == 'nsepy':
+        import nsepy
+        upstream = nsepy.get_history
+    fetcher = RecordedFetcher(args.fixtures, upstream=upstream)
+    end = datetime.date.today()
+    for symbol in symbols:
+        if not os.path.exists(fetcher.path(symbol)):
+            fetcher.record(symbol, window_start('max', end), end)
+    dashboard.store.fetcher = RecordedFetcher(args.fixtures, latency=args.latency)
+
+
+def peak_rss_mb():
+    # ru_maxrss is kilobytes on Linux, bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024.0 * 1024.0) if sys.platform == 'darwin' else peak / 1024.0
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, cwd=ROOT).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(args):
+    symbols = dashboard.registry.symbols()[:args.symbols]
+    prepare(args, symbols)
+    if not args.page_cache:
+        dashboard.page_cache.max_entries = 0
+    driver = DirectDriver() if args.mode == 'direct' else HttpDriver()
+    timer = StageTimer()
+    timer.install()
+
+    mix = {b: w for b, w in DEFAULT_MIX.items() if b in args.timeframes}
+    # Warm-up touches every (symbol, timeframe) once so the store is populated and
+    # the measured phase sees steady-state behaviour.
+    for symbol in symbols:
+        for button in mix:
+            view(driver, symbol, button)
+    timer.clear()
+
+    latency = {b: [] for b in mix}
+    payload = {b: [] for b in mix}
+    lock = threading.Lock()
+    calls = [0]
+
+    def one(item):
+        symbol, button = item
+        seconds, size, n = view(driver, symbol, button)
+        with lock:
+            latency[button].append(seconds)
+            payload[button].append(size)
+            calls[0] += n
+
+    items = workload(symbols, mix, args.requests, args.seed)
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(one, items))
+    elapsed = time.perf_counter() - t0
+
+    if args.page_cache:
+        # Stages from their own pass that builds every page model, so fetch and compute have samples.
+        timer.clear()
+        dashboard.page_cache.max_entries = 0
+        dashboard.page_cache.clear()
+        for symbol, button in items[:args.stage_requests]:
+            view(driver, symbol, button)
+
+    everything = [s for samples in latency.values() for s in samples]
+    summary = dict(percentiles(everything), elapsed=elapsed, throughput=len(everything) / elapsed,
+                   responses=calls[0], peak_rss_mb=peak_rss_mb())
+    timeframes = {b: dict(percentiles(latency[b]), bytes_mean=float(np.mean(payload[b])) if payload[b] else 0.0,
+                          bytes_max=int(max(payload[b], default=0)))
+                  for b in mix}
+    return {
+        'meta': {'label': args.label, 'git': git_revision(), 'time': datetime.datetime.now().isoformat(),
+                 'python': platform.python_version(), 'platform': platform.platform(),
+                 'args': {k: v for k, v in vars(args).items() if k not in ('save', 'compare')}},
+        'summary': summary,
+        'timeframes': timeframes,
+        'stages': timer.report(),
+    }
+
+
+# Reporting_________________________________________________
+def print_report(result):
+    s = result['summary']
+    print('%d views in %.2fs: %.1f views/s, %d responses, peak RSS %.0f MB'
+          % (s['count'], s['elapsed'], s['throughput'], s['responses'], s['peak_rss_mb']))
+    print('%-10s %7s %9s %9s %9s %11s' % ('', 'count', 'p50 ms', 'p95 ms', 'p99 ms', 'bytes'))
+    rows = [('all', s)] + list(result['timeframes'].items()) + list(result['stages'].items())
+    for name, row in rows:
+        if not row.get('count'):
+            continue
+        print('%-10s %7d %9.2f %9.2f %9.2f %11s' % (name, row['count'], row['p50'], row['p95'], row['p99'],
+                                                    '%.0f' % row['bytes_mean'] if 'bytes_mean' in row else ''))
+
+
+# Metrics where bigger is worse, and the ones where bigger is better.
+WORSE_IF_HIGHER = ('p50', 'p95', 'p99', 'mean', 'bytes_mean', 'peak_rss_mb')
+WORSE_IF_LOWER = ('throughput',)
+
+
+def compare(base, head, threshold):
+    """Print relative change of every shared metric; return the regressed ones."""
+    regressions = []
+    sections = [('summary', {'all': base['summary']}, {'all': head['summary']}),
+                ('timeframes', base['timeframes'], head['timeframes']),
+                ('stages', base['stages'], head['stages'])]
+    print('\ncompared with %s (%s)' % (base['meta'].get('label') or '-', base['meta'].get('git') or '?'))
+    for section, old_rows, new_rows in sections:
+        for name in new_rows:
+            old, new = old_rows.get(name, {}), new_rows[name]
+            for metric in WORSE_IF_HIGHER + WORSE_IF_LOWER:
+                if not old.get(metric) or metric not in new:
+                    continue
+                change = new[metric] / old[metric] - 1
+                worse = change if metric in WORSE_IF_HIGHER else -change
+                flag = 'REGRESSION' if worse > threshold else ''
+                if flag:
+                    regressions.append((section, name, metric, change))
+                print('%-10s %-10s %-12s %11.2f -> %11.2f %+7.1f%% %s'
+                      % (section, name, metric, old[metric], new[metric], change * 100, flag))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mode', choices=['direct', 'http'], default='http')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--symbols', type=int, default=20)
+    parser.add_argument('--timeframes', nargs='+', default=list(DEFAULT_MIX), choices=BUTTONS)
+    parser.add_argument('--latency', type=float, default=0.0, help='simulated upstream delay, seconds')
+    parser.add_argument('--no-page-cache', dest='page_cache', action='store_false',
+                        help='rebuild every page model in the measured phase too')
+    parser.add_argument('--stage-requests', type=int, default=200,
+                        help='views in the uncached pass that times the stages')
+    parser.add_argument('--fixtures', default='data/fixtures')
+    parser.add_argument('--upstream', choices=['synthetic', 'nsepy'], default='synthetic',
+                        help='source used to record missing fixtures')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--label', default='')
+    parser.add_argument('--save', help='write results as JSON to this path')
+    parser.add_argument('--compare', help='earlier results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10, help='relative change counted as a regression')
+    args = parser.parse_args()
+
+    result = run(args)
+    print_report(result)
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, 'w') as fh:
+            json.dump(result, fh, indent=2)
+    if args.compare:
+        with open(args.compare) as fh:
+            base = json.load(fh)
+        if compare(base, result, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
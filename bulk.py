@@ -0,0 +1,93 @@
+import asyncio
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import pandas as pd
+
+
+class FetchTimeout(Exception):
+    pass
+
+
+class BulkResult:
+    """Frames fetched by a bulk download plus the symbols that failed."""
+
+    def __init__(self, frames, failures, elapsed):
+        self.frames = frames
+        self.failures = failures
+        self.elapsed = elapsed
+
+    @property
+    def symbols_per_second(self):
+        done = len(self.frames) + len(self.failures)
+        return done / self.elapsed if self.elapsed else float('inf')
+
+    def stacked(self):
+        """One frame indexed by (Symbol, Date)."""
+        if not self.frames:
+            return pd.DataFrame()
+        return pd.concat(self.frames, names=['Symbol', 'Date'])
+
+    def summary(self):
+        return ('%d ok, %d failed in %.2fs (%.1f symbols/s)'
+                % (len(self.frames), len(self.failures), self.elapsed, self.symbols_per_second))
+
+
+def bulk_fetch(symbols, start, end, fetcher, max_workers=16, timeout=30.0, executor=None):
+    """Fetch many symbols concurrently on a thread pool.
+
+    ``fetcher`` has the ``nse.get_history`` signature (the store's
+    ``get_history`` works too). A symbol that raises or runs longer than
+    ``timeout`` seconds is recorded in ``failures`` instead of aborting the
+    batch; a timed-out call is abandoned, not interrupted.
+    """
+    started = {}
+
+    def run(symbol):
+        started[symbol] = time.monotonic()
+        return fetcher(symbol, start, end)
+
+    t0 = time.perf_counter()
+    pool = executor or ThreadPoolExecutor(max_workers, thread_name_prefix='bulk')
+    frames, failures = {}, {}
+    try:
+        pending = {pool.submit(run, symbol): symbol for symbol in symbols}
+        while pending:
+            done, _ = wait(pending, timeout=0.05, return_when=FIRST_COMPLETED)
+            for future in done:
+                symbol = pending.pop(future)
+                try:
+                    frames[symbol] = future.result()
+                except Exception as exc:
+                    failures[symbol] = exc
+            now = time.monotonic()
+            for future, symbol in list(pending.items()):
+                if symbol in started and now - started[symbol] > timeout:
+                    future.cancel()
+                    failures[symbol] = FetchTimeout('%s exceeded %.1fs' % (symbol, timeout))
+                    del pending[future]
+    finally:
+        if executor is None:
+            pool.shutdown(wait=False, cancel_futures=True)
+    return BulkResult(frames, failures, time.perf_counter() - t0)
+
+
+async def bulk_fetch_async(symbols, start, end, fetcher, max_workers=16, timeout=30.0, executor=None):
+    """asyncio flavour of :func:`bulk_fetch` for callers already on an event loop."""
+    loop = asyncio.get_running_loop()
+    limit = asyncio.Semaphore(max_workers)
+    frames, failures = {}, {}
+
+    async def one(symbol):
+        async with limit:
+            try:
+                call = loop.run_in_executor(executor, fetcher, symbol, start, end)
+                frames[symbol] = await asyncio.wait_for(call, timeout)
+            except asyncio.TimeoutError:
+                failures[symbol] = FetchTimeout('%s exceeded %.1fs' % (symbol, timeout))
+            except Exception as exc:
+                failures[symbol] = exc
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(symbol) for symbol in symbols))
+    return BulkResult(frames, failures, time.perf_counter() - t0)
@@ -0,0 +1,255 @@
+import contextlib
+import fcntl
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+
+from market import market_now, next_close
+from metrics import CACHE_LOOKUPS
+
+# Expired entries, and lock files idle this long, are swept out on the first
+# set after this many seconds.
+SWEEP_SECONDS = 600
+
+
+def seconds_to_close():
+    """TTL that expires a cached value when the next daily bar settles."""
+    return max(1.0, (next_close() - market_now()).total_seconds())
+
+
+class CacheBackend:
+    """Interface for caches shared between callbacks and worker processes.
+
+    A backend stores picklable values under hashable keys and provides a named
+    lock that is exclusive across every process using the same backend. The
+    methods map directly onto a Redis-style service (GET, SET with EX, DEL and
+    a SET NX PX lock), so a networked implementation can be dropped in later.
+    Expired entries are removed by ``sweep``, which ``set`` runs every
+    SWEEP_SECONDS, so keys that are never read again don't pile up.
+    """
+
+    _next_sweep = 0.0
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def lock(self, name):
+        raise NotImplementedError
+
+    def sweep(self):
+        """Remove every expired entry; returns how many were removed."""
+        raise NotImplementedError
+
+    def hold(self, name):
+        """Take ``name`` for the rest of this process's life, if no other process has it.
+
+        Returns a lease (keep a reference to it) or None. Used to elect one
+        process for work that must not run in every worker.
+        """
+        raise NotImplementedError
+
+    def _maybe_sweep(self):
+        now = time.time()
+        if now >= self._next_sweep:
+            self._next_sweep = now + SWEEP_SECONDS
+            self.sweep()
+
+    def get_or_compute(self, key, compute, ttl=None):
+        """Return the cached value, computing it at most once across all workers.
+
+        Concurrent callers for the same cold key wait on the key's lock; the
+        first one computes and stores the value and the rest read it back.
+        """
+        value = self.get(key)
+        if value is not None:
+            CACHE_LOOKUPS.inc(cache='shared', result='hit')
+            return value
+        with self.lock(key):
+            value = self.get(key)
+            if value is None:
+                CACHE_LOOKUPS.inc(cache='shared', result='miss')
+                value = compute()
+                self.set(key, value, ttl)
+            else:
+                CACHE_LOOKUPS.inc(cache='shared', result='hit')
+            return value
+
+
+class MemoryBackend(CacheBackend):
+    """Single-process backend, useful with one worker or the dev server."""
+
+    def __init__(self):
+        self._data = {}
+        # name -> [lock, holders and waiters]; dropped when the last one leaves.
+        self._locks = {}
+        self._held = set()
+        self._guard = threading.Lock()
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires is not None and time.time() >= expires:
+            self._data.pop(key, None)
+            return None
+        return value
+
+    def set(self, key, value, ttl=None):
+        self._data[key] = (value, time.time() + ttl if ttl else None)
+        self._maybe_sweep()
+
+    def delete(self, key):
+        self._data.pop(key, None)
+
+    @contextlib.contextmanager
+    def lock(self, name):
+        with self._guard:
+            entry = self._locks.setdefault(name, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._guard:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[name]
+
+    def sweep(self):
+        now = time.time()
+        expired = [key for key, (_, expires) in list(self._data.items()) if expires is not None and now >= expires]
+        for key in expired:
+            self._data.pop(key, None)
+        return len(expired)
+
+    def hold(self, name):
+        with self._guard:
+            if name in self._held:
+                return None
+            self._held.add(name)
+            return name
+
+
+class FileBackend(CacheBackend):
+    """Backend shared by every process on one host through a directory.
+
+    Values are pickled into one file per key and replaced atomically, after a
+    small ``(key, expires)`` header that ``sweep`` reads without loading the
+    value. Locks are ``flock`` locks on per-key lock files, which also
+    serialize threads within a process because each acquisition opens its own
+    file description. ``sweep`` deletes lock files idle for SWEEP_SECONDS.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(os.path.join(root, 'locks'), exist_ok=True)
+
+    @staticmethod
+    def _digest(key):
+        return hashlib.sha1(repr(key).encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.root, self._digest(key) + '.pkl')
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'rb') as fh:
+                stored_key, expires = pickle.load(fh)
+                if stored_key != key:
+                    return None
+                if expires is not None and time.time() >= expires:
+                    fh.close()
+                    self.delete(key)
+                    return None
+                return pickle.load(fh)
+        except (FileNotFoundError, EOFError, ValueError, pickle.UnpicklingError):
+            return None
+
+    def set(self, key, value, ttl=None):
+        expires = time.time() + ttl if ttl else None
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as fh:
+            pickle.dump((key, expires), fh, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._path(key))
+        self._maybe_sweep()
+
+    def delete(self, key):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self._path(key))
+
+    def sweep(self):
+        # Entries are read header-only; a .tmp left by a writer that died is dropped after a sweep interval.
+        now, removed = time.time(), 0
+        for entry in os.scandir(self.root):
+            if entry.name.endswith('.tmp'):
+                expired = entry.stat().st_mtime < now - SWEEP_SECONDS
+            elif entry.name.endswith('.pkl'):
+                try:
+                    with open(entry.path, 'rb') as fh:
+                        _, expires = pickle.load(fh)
+                except (FileNotFoundError, EOFError, ValueError, pickle.UnpicklingError):
+                    expires = now
+                expired = expires is not None and now >= expires
+            else:
+                continue
+            if expired:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(entry.path)
+                    removed += 1
+        for entry in os.scandir(os.path.join(self.root, 'locks')):
+            with contextlib.suppress(FileNotFoundError):
+                if entry.stat().st_mtime < now - SWEEP_SECONDS:
+                    self._remove_idle_lock(entry.path)
+        return removed
+
+    @staticmethod
+    def _remove_idle_lock(path):
+        # Only unlink while holding the lock; lock() notices the file it waited on is gone and retries.
+        with open(path, 'a') as fh:
+            try:
+                fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return
+            os.remove(path)
+
+    def hold(self, name):
+        # The kernel drops the flock when the holder exits, so a restarted worker can take over.
+        fh = open(os.path.join(self.root, '%s.lease' % name), 'a')
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            fh.close()
+            return None
+        return fh
+
+    @contextlib.contextmanager
+    def lock(self, name):
+        path = os.path.join(self.root, 'locks', self._digest(name) + '.lock')
+        while True:
+            fh = open(path, 'a')
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                current = os.stat(path)
+            except FileNotFoundError:
+                current = None
+            if current is not None and current.st_ino == os.fstat(fh.fileno()).st_ino:
+                break
+            fh.close()
+        with fh:
+            # Marks the file as in use for sweep.
+            os.utime(fh.fileno())
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
@@ -0,0 +1,38 @@
+import base64
+
+import numpy as np
+
+# Chart arrays are sent as plotly.js typed-array specs ({'dtype', 'bdata'}),
+# i.e. base64 of the raw little-endian buffer, instead of JSON number lists.
+# plotly.js has no 64-bit integer typed arrays, so timestamps go out as
+# float64 epoch milliseconds, which a date axis reads directly and which
+# represent every millisecond timestamp exactly.
+
+# Prices are narrowed to float32 unless that moves any value by more than this.
+PRICE_TOLERANCE = 0.005
+
+
+def _spec(array, dtype):
+    return {'dtype': dtype, 'bdata': base64.b64encode(np.ascontiguousarray(array).tobytes()).decode('ascii')}
+
+
+def typed_array(values, tolerance=PRICE_TOLERANCE):
+    """float32 typed array, or float64 when float32 would lose more than ``tolerance``."""
+    wide = np.asarray(values, dtype='<f8')
+    narrow = wide.astype('<f4')
+    with np.errstate(invalid='ignore'):
+        error = np.nanmax(np.abs(narrow - wide), initial=0.0)
+    if error > tolerance:
+        return _spec(wide, 'f8')
+    return _spec(narrow, 'f4')
+
+
+def epoch_ms(index):
+    """Dates as float64 milliseconds since the Unix epoch (use with ``xaxis.type='date'``)."""
+    stamps = np.asarray(index, dtype='datetime64[ms]').astype('<i8')
+    return _spec(stamps.astype('<f8'), 'f8')
+
+
+def decode(spec):
+    """Inverse of the encoders, for tests and benchmarks."""
+    return np.frombuffer(base64.b64decode(spec['bdata']), dtype='<' + spec['dtype'])
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+from batch import UniverseMatrix
+
+# Most symbols one comparison chart shows.
+MAX_SYMBOLS = 8
+TRADING_DAYS = 252
+
+
+def forward_fill(values):
+    """Row-wise forward fill of NaNs; leading NaNs stay NaN."""
+    valid = ~np.isnan(values)
+    idx = np.where(valid, np.arange(values.shape[1]), 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    return values[np.arange(len(values))[:, None], idx]
+
+
+class Comparison:
+    """Several symbols on one trading-day index, rebased to 100 at the first shared day.
+
+    Everything is a ``symbols x days`` array, so one more symbol adds one row
+    to each operation rather than another pass per pair. ``failures`` holds
+    the symbols that could not be loaded and are left out.
+    """
+
+    def __init__(self, symbols, dates, closes, failures=None):
+        self.symbols = list(symbols)
+        self.dates = dates
+        self.closes = closes
+        self.failures = dict(failures or {})
+
+    @classmethod
+    def from_matrix(cls, matrix):
+        closes = forward_fill(matrix['Close'])
+        if not len(matrix) or not closes.size:
+            return cls(matrix.symbols, matrix.dates[:0], closes[:, :0], matrix.failures)
+        # First day every symbol has a price: later listings shorten the common window.
+        valid = ~np.isnan(closes)
+        start = int(np.max(np.argmax(valid, axis=1))) if valid.any(axis=1).all() else closes.shape[1]
+        return cls(matrix.symbols, matrix.dates[start:], closes[:, start:], matrix.failures)
+
+    @classmethod
+    def load(cls, store, symbols, start, end):
+        """Fetch ``symbols`` concurrently through the store and align them."""
+        return cls.from_matrix(UniverseMatrix.from_store(store, list(symbols), start, end))
+
+    def rebased(self):
+        return self.closes / self.closes[:, :1] * 100
+
+    def returns(self):
+        return self.closes[:, 1:] / self.closes[:, :-1] - 1
+
+    def correlation(self):
+        returns = self.returns()
+        if returns.shape[1] < 2:
+            return pd.DataFrame(np.nan, index=self.symbols, columns=self.symbols)
+        with np.errstate(all='ignore'):
+            corr = np.corrcoef(returns)
+        return pd.DataFrame(np.atleast_2d(corr), index=self.symbols, columns=self.symbols)
+
+    def summary(self):
+        """Total return and annualized volatility per symbol, in percent."""
+        returns = self.returns()
+        with np.errstate(all='ignore'):
+            total = (self.closes[:, -1] / self.closes[:, 0] - 1) * 100 if self.closes.size else np.nan
+            volatility = returns.std(axis=1, ddof=1) * np.sqrt(TRADING_DAYS) * 100
+        return pd.DataFrame({'Return %': total, 'Volatility %': volatility},
+                            index=pd.Index(self.symbols, name='Symbol')).round(2)
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+# Long ranges are aggregated into coarser candles so a chart never carries
+# more than roughly CHART_POINT_BUDGET points, however much history exists.
+CHART_POINT_BUDGET = 400
+
+# Candle resolutions from finest to coarsest, with the trading sessions each spans.
+RULES = (('D', 1), ('W-FRI', 5), ('ME', 21), ('QE', 63))
+
+
+def choose_rule(n_bars, budget=CHART_POINT_BUDGET):
+    """Finest resolution that fits ``n_bars`` daily bars into ``budget`` candles."""
+    for rule, sessions in RULES:
+        if n_bars / sessions <= budget:
+            return rule
+    return RULES[-1][0]
+
+
+def resample_ohlcv(frame, rule):
+    """Aggregate daily bars into ``rule`` candles, labelled by their last trading day.
+
+    VWAP is re-weighted by volume; buckets without any bar are dropped.
+    """
+    if rule == 'D' or frame.empty:
+        return frame
+    last_day = pd.Series(frame.index, index=frame.index)
+    traded = frame.VWAP * frame.Volume
+    grouped = frame.groupby(pd.Grouper(freq=rule))
+    out = pd.DataFrame({
+        'Open': grouped.Open.first(),
+        'High': grouped.High.max(),
+        'Low': grouped.Low.min(),
+        'Close': grouped.Close.last(),
+        'Volume': grouped.Volume.sum(),
+        'VWAP': traded.groupby(pd.Grouper(freq=rule)).sum() / grouped.Volume.sum(),
+        'Date': last_day.groupby(pd.Grouper(freq=rule)).last(),
+    }).dropna(subset=['Close'])
+    return out.set_index('Date')
+
+
+def lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets: indices of ``threshold`` points that keep the line's shape.
+
+    NaNs are dropped first. ``x`` must be numeric and increasing.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    keep = np.flatnonzero(~np.isnan(y))
+    if threshold >= len(keep) or threshold < 3:
+        return keep
+    xs, ys = x[keep], y[keep]
+    n = len(keep)
+    picked = np.empty(threshold, dtype=np.int64)
+    picked[0], picked[-1] = 0, n - 1
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_lo, nxt_hi = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = xs[nxt_lo:nxt_hi].mean()
+        avg_y = ys[nxt_lo:nxt_hi].mean()
+        area = np.abs((xs[a] - avg_x) * (ys[lo:hi] - ys[a]) - (xs[a] - xs[lo:hi]) * (avg_y - ys[a]))
+        a = lo + int(np.argmax(area))
+        picked[i + 1] = a
+    return keep[picked]
+
+
+def lttb_series(series, threshold=CHART_POINT_BUDGET):
+    """Downsample a date-indexed line series with LTTB."""
+    if len(series) <= threshold:
+        return series
+    x = np.asarray(series.index, dtype='datetime64[ns]').astype(np.int64)
+    return series.iloc[lttb(x, series.to_numpy(float), threshold)]
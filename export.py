@@ -0,0 +1,200 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from dateutil.relativedelta import relativedelta
+
+from batch import rolling_mean
+from indicators import SMA_WINDOWS, VWAP_WINDOW
+from market import last_closed_session
+from metrics import timed
+from planner import RANGE_SEPARATOR, WINDOWS, custom_window, window_bounds
+
+# Bulk download of stored daily bars with the chart's overlays, for one symbol
+# or the whole universe. Responses are generators yielding one symbol at a
+# time, read straight from the store's parquet files, so an export of any size
+# holds a single symbol's rows. Only bars already in the store are exported;
+# the prefetcher keeps the universe there.
+
+BAR_COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume', 'VWAP')
+INDICATOR_COLUMNS = tuple('SMA_%d' % n for n in SMA_WINDOWS) + ('VWAP_%d' % VWAP_WINDOW,)
+COLUMNS = ('Symbol', 'Date') + BAR_COLUMNS + INDICATOR_COLUMNS
+# Calendar days read ahead of the range, so the longest SMA has full windows from the first row.
+WARMUP = relativedelta(days=max(SMA_WINDOWS) * 7 // 5 + 30)
+
+# format -> (mimetype, file extension)
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+}
+
+
+def parse_request(args, universe, end=None):
+    """(symbols, start, end, format) from the query string; raises ValueError on bad input.
+
+    ``symbols`` is a comma-separated list or ``all``; the range is ``window``
+    (a planner window name, default 1year) or explicit ``start``/``end`` dates.
+    """
+    fmt = args.get('format', 'csv')
+    if fmt not in FORMATS:
+        raise ValueError('format must be one of %s' % ', '.join(FORMATS))
+    requested = [s.strip().upper() for s in args.get('symbols', '').split(',') if s.strip()]
+    if not requested:
+        raise ValueError('symbols is required (comma-separated, or all)')
+    if requested == ['ALL']:
+        symbols = list(universe)
+    else:
+        known = set(universe)
+        unknown = [s for s in requested if s not in known]
+        if unknown:
+            raise ValueError('unknown symbols: %s' % ', '.join(unknown))
+        symbols = list(dict.fromkeys(requested))
+    if args.get('start') or args.get('end'):
+        try:
+            window = custom_window(datetime.date.fromisoformat(args.get('start', '')),
+                                   datetime.date.fromisoformat(args.get('end', '')))
+        except ValueError:
+            raise ValueError('start and end must both be YYYY-MM-DD dates')
+    else:
+        window = args.get('window', '1year')
+        if window not in WINDOWS and RANGE_SEPARATOR not in window:
+            raise ValueError('window must be one of %s' % ', '.join(WINDOWS))
+    start, end = window_bounds(window, end or last_closed_session())
+    return symbols, start, end, fmt
+
+
+SCHEMA = pa.schema([(name, {'Symbol': pa.string(), 'Date': pa.date32(), 'Volume': pa.int64()}.get(name, pa.float64()))
+                    for name in COLUMNS])
+
+
+def overlays(bars):
+    """SMA and rolling VWAP columns, matching indicators.pandas_reference (min_periods=1)."""
+    close = bars['Close'].to_numpy(float)[None, :]
+    out = {'SMA_%d' % n: rolling_mean(close, n)[0] for n in SMA_WINDOWS}
+    typical = ((bars['High'] + bars['Low'] + bars['Close']) / 3).to_numpy(float)
+    volume = bars['Volume'].to_numpy(float)
+    # Equal windows, so the ratio of rolling means is the ratio of rolling sums.
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out['VWAP_%d' % VWAP_WINDOW] = (rolling_mean((typical * volume)[None, :], VWAP_WINDOW)[0]
+                                        / rolling_mean(volume[None, :], VWAP_WINDOW)[0])
+    return out
+
+
+def symbol_table(store, symbol, start, end):
+    """Export rows of ``symbol`` for ``[start, end]`` as an Arrow table, or None without bars."""
+    bars = store.read(symbol, start - WARMUP, end, columns=list(BAR_COLUMNS))
+    first = bars.index.searchsorted(pd.Timestamp(start))
+    if first == len(bars):
+        return None
+    columns = {'Symbol': pa.array([symbol] * (len(bars) - first), pa.string()),
+               'Date': pa.array(bars.index[first:].to_numpy('datetime64[D]'), pa.date32())}
+    for name in BAR_COLUMNS:
+        columns[name] = bars[name].to_numpy()[first:]
+    for name, values in overlays(bars).items():
+        columns[name] = values[first:]
+    return pa.table(columns, schema=SCHEMA)
+
+
+def symbol_tables(store, symbols, start, end):
+    for symbol in symbols:
+        with timed('export'):
+            table = symbol_table(store, symbol, start, end)
+        if table is not None:
+            yield table
+
+
+class ChunkSink:
+    """Write-only file for pyarrow writers; ``drain`` hands back what was written since the last call.
+
+    ``tell`` keeps counting across drains, as parquet's footer records offsets.
+    """
+
+    closed = False
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
+
+
+def encode_csv(tables):
+    # Arrow's CSV writer is ~10x faster than DataFrame.to_csv; symbols never need quoting.
+    from pyarrow import csv
+    yield ','.join(COLUMNS) + '\n'
+    options = csv.WriteOptions(include_header=False, quoting_style='none')
+    sink = ChunkSink()
+    for table in tables:
+        csv.write_csv(table, sink, options)
+        yield sink.drain()
+
+
+def encode_parquet(tables):
+    """One row group per symbol; the footer goes out after the last one."""
+    from pyarrow import parquet
+    sink = ChunkSink()
+    writer = parquet.ParquetWriter(sink, SCHEMA)
+    for table in tables:
+        writer.write_table(table)
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def encode_arrow(tables):
+    """Arrow IPC stream format: the schema, then one record batch per symbol."""
+    sink = ChunkSink()
+    writer = pa.ipc.new_stream(sink, SCHEMA)
+    yield sink.drain()
+    for table in tables:
+        writer.write_table(table)
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+ENCODERS = {'csv': encode_csv, 'parquet': encode_parquet, 'arrow': encode_arrow}
+
+
+def mount_export(server, store, universe):
+    """Mount GET /export on the Flask ``server``, streaming from ``store``.
+
+        /export?symbols=TCS,INFY&window=5year&format=parquet
+        /export?symbols=all&start=2020-01-01&end=2020-12-31&format=csv
+    """
+    from flask import Response, request
+
+    universe = list(universe)
+
+    @server.route('/export')
+    def export():
+        try:
+            symbols, start, end, fmt = parse_request(request.args, universe)
+        except ValueError as err:
+            return Response('%s\n' % err, status=400, mimetype='text/plain')
+        mimetype, extension = FORMATS[fmt]
+        body = ENCODERS[fmt](symbol_tables(store, symbols, start, end))
+        filename = 'stockview_%s_%s.%s' % (start.isoformat(), end.isoformat(), extension)
+        return Response(body, mimetype=mimetype,
+                        headers={'Content-Disposition': 'attachment; filename=%s' % filename})
+
+    return server
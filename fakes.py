@@ -0,0 +1,209 @@
+import datetime
+import os
+import threading
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+# Offline stand-ins for nse.get_history. They return frames shaped like the
+# nsepy output so the store and callbacks can run without network access.
+
+COLUMNS = ['Symbol', 'Series', 'Prev Close', 'Open', 'High', 'Low', 'Last', 'Close',
+           'VWAP', 'Volume', 'Turnover', 'Trades', 'Deliverable Volume', '%Deliverble']
+
+# All synthetic series share one calendar so that a given day always has the same bar.
+EPOCH = datetime.date(2000, 1, 3)
+
+
+def synthetic_history(symbol, start, end):
+    """Deterministic random-walk daily bars for ``symbol`` between start and end."""
+    days = np.arange(np.datetime64(EPOCH), np.datetime64(end) + 1)
+    days = pd.DatetimeIndex(days[np.is_busday(days)])
+    if len(days) == 0:
+        return pd.DataFrame(columns=COLUMNS, index=pd.Index([], name='Date'))
+    rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+    # Generate from the epoch so the series is stable regardless of the window asked for.
+    steps = rng.normal(0.0001, 0.015, len(days))
+    close = 100 * (1 + zlib.crc32(symbol.encode()) % 50) * np.exp(np.cumsum(steps))
+    open_ = close * (1 + rng.normal(0, 0.006, len(days)))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.008, len(days))))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.008, len(days))))
+    volume = rng.integers(50_000, 5_000_000, len(days))
+    vwap = (high + low + close) / 3
+    keep = slice(days.searchsorted(pd.Timestamp(start)), len(days))
+    close, open_, high, low, volume, vwap = (a[keep] for a in (close, open_, high, low, volume, vwap))
+    frame = pd.DataFrame({
+        'Symbol': symbol,
+        'Series': 'EQ',
+        'Prev Close': np.concatenate([[close[0]], close[:-1]]).round(2),
+        'Open': open_.round(2),
+        'High': high.round(2),
+        'Low': low.round(2),
+        'Last': close.round(2),
+        'Close': close.round(2),
+        'VWAP': vwap.round(2),
+        'Volume': volume,
+        'Turnover': (vwap * volume).round(2),
+        'Trades': volume // 40,
+        'Deliverable Volume': volume // 2,
+        '%Deliverble': 0.5,
+    }, index=pd.Index(days[keep].date, name='Date'))
+    return frame
+
+
+class FakeFetcher:
+    """Callable replacement for nse.get_history with optional simulated latency.
+
+    Every call is recorded in ``calls`` as ``(symbol, start, end)``.
+    """
+
+    def __init__(self, latency=0.0, history=synthetic_history):
+        self.latency = latency
+        self.history = history
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, symbol, start, end):
+        with self._lock:
+            self.calls.append((symbol, start, end))
+        if self.latency:
+            time.sleep(self.latency)
+        return self.history(symbol, start, end)
+
+
+class RecordedFetcher:
+    """Replays nse.get_history responses saved as ``<root>/<SYMBOL>.parquet``.
+
+    With ``upstream`` set (``nse.get_history`` to record a live session, or
+    ``synthetic_history``), ranges not yet recorded are fetched from it and
+    merged into the recording. Without it, unrecorded days come back empty,
+    as nsepy does for days with no trading.
+    """
+
+    def __init__(self, root, upstream=None, latency=0.0):
+        self.root = root
+        self.upstream = upstream
+        self.latency = latency
+        self.calls = []
+        self._frames = {}
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, symbol):
+        return os.path.join(self.root, symbol + '.parquet')
+
+    def _recording(self, symbol):
+        frame = self._frames.get(symbol)
+        if frame is None and os.path.exists(self.path(symbol)):
+            frame = self._frames[symbol] = pd.read_parquet(self.path(symbol))
+        return frame
+
+    def record(self, symbol, start, end):
+        fetched = self.upstream(symbol, start, end).copy()
+        fetched.index = pd.DatetimeIndex(pd.to_datetime(fetched.index), name='Date')
+        with self._lock:
+            frame = self._recording(symbol)
+            if frame is not None:
+                fetched = pd.concat([frame, fetched])
+                fetched = fetched[~fetched.index.duplicated(keep='last')].sort_index()
+            fetched.to_parquet(self.path(symbol))
+            self._frames[symbol] = fetched
+        return fetched
+
+    def __call__(self, symbol, start, end):
+        with self._lock:
+            self.calls.append((symbol, start, end))
+            frame = self._recording(symbol)
+        lo, hi = pd.Timestamp(start), pd.Timestamp(end)
+        if self.upstream is not None and (frame is None or frame.empty or lo < frame.index[0]
+                                          or hi > frame.index[-1]):
+            frame = self.record(symbol, start, end)
+        if self.latency:
+            time.sleep(self.latency)
+        if frame is None:
+            return pd.DataFrame(columns=COLUMNS, index=pd.Index([], name='Date'))
+        return frame.loc[lo:hi]
+
+
+def synthetic_ticks(symbols, day, per_minute=6, seed=0):
+    """One session of random-walk ticks for ``symbols`` on ``day``, sorted by time.
+
+    Columns are ``ts`` (exchange-local epoch seconds), ``symbol``, ``price``
+    and ``qty``. Each symbol starts from its synthetic close of the day before.
+    """
+    # Imported here: live.py is only needed by the streaming stand-ins.
+    from live import exchange_seconds
+    from market import MARKET_CLOSE, MARKET_OPEN
+
+    open_ts = exchange_seconds(datetime.datetime.combine(day, MARKET_OPEN))
+    seconds = exchange_seconds(datetime.datetime.combine(day, MARKET_CLOSE)) - open_ts
+    rng = np.random.default_rng(seed)
+    n = seconds // 60 * per_minute
+    parts = []
+    for symbol in symbols:
+        history = synthetic_history(symbol, day - datetime.timedelta(days=7), day - datetime.timedelta(days=1))
+        base = float(history.Close.iloc[-1]) if len(history) else 100.0
+        ts = open_ts + np.sort(rng.integers(0, seconds, n))
+        price = (base * np.exp(np.cumsum(rng.normal(0, 0.0008, n)))).round(2)
+        parts.append(pd.DataFrame({'ts': ts, 'symbol': symbol, 'price': price,
+                                   'qty': rng.integers(1, 500, n)}))
+    return pd.concat(parts, ignore_index=True).sort_values('ts', kind='stable', ignore_index=True)
+
+
+class TickReplay:
+    """Replays recorded ticks into ``sink(symbols, ts, prices, qtys)`` from a background thread.
+
+    ``speed`` is a multiple of real time (60 plays a session minute per
+    second); 0 replays as fast as the sink accepts. Ticks sharing a second
+    are delivered as one batch, e.g. to ``LiveAggregator.on_ticks``.
+    """
+
+    def __init__(self, ticks, sink, speed=1.0, loop=False):
+        self.ticks = ticks
+        self.sink = sink
+        self.speed = speed
+        self.loop = loop
+        self.emitted = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_file(cls, path, sink, **kwargs):
+        ticks = pd.read_parquet(path) if path.endswith('.parquet') else pd.read_csv(path)
+        return cls(ticks, sink, **kwargs)
+
+    def run(self):
+        ts = self.ticks.ts.to_numpy()
+        # Batch boundaries: one batch per distinct second.
+        edges = np.flatnonzero(np.diff(ts)) + 1
+        columns = [self.ticks[c].tolist() for c in ('symbol', 'ts', 'price', 'qty')]
+        while True:
+            started, first_ts = time.monotonic(), ts[0] if len(ts) else 0
+            for lo, hi in zip(np.r_[0, edges], np.r_[edges, len(ts)]):
+                if self._stop.is_set():
+                    return
+                if self.speed:
+                    delay = (ts[lo] - first_ts) / self.speed - (time.monotonic() - started)
+                    if delay > 0 and self._stop.wait(delay):
+                        return
+                self.sink(*(c[lo:hi] for c in columns))
+                self.emitted += hi - lo
+            if not self.loop:
+                return
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name='tick-replay', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
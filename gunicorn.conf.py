@@ -0,0 +1,24 @@
+"""gunicorn settings for the dashboard.
+
+    gunicorn -c gunicorn.conf.py main_wo_custom:server
+
+The master imports the app once (preload_app) with STOCKVIEW_PRELOAD=1, so
+main_wo_custom.preload() runs there and forked workers share the registry,
+layout and loaded modules copy-on-write. Threads don't survive fork, so each
+worker starts its threads in post_fork; only the worker holding the shared
+cache's prefetch lease (a non-blocking flock) actually prefetches, so nsepy
+sees one rate limiter however many workers there are.
+"""
+import os
+
+os.environ.setdefault('STOCKVIEW_PRELOAD', '1')
+
+bind = os.environ.get('STOCKVIEW_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', '4'))
+threads = int(os.environ.get('STOCKVIEW_THREADS', '4'))
+preload_app = True
+
+
+def post_fork(server, worker):
+    import main_wo_custom
+    main_wo_custom.start_background()
@@ -0,0 +1,250 @@
+import math
+import threading
+from collections import OrderedDict, deque
+
+import numpy as np
+import pandas as pd
+
+# Streaming indicators. Each keeps O(1)-per-bar state (ring buffers and running
+# sums) so a new daily bar costs the same regardless of window length. Outputs
+# follow the pandas reference in ``pandas_reference`` (``min_periods=1``
+# rolling windows, ``adjust=False`` EWMs), to floating-point tolerance.
+
+SMA_WINDOWS = (10, 20, 50, 100)
+EMA_SPANS = (12, 26)
+VWAP_WINDOW = 20
+BOLLINGER_WINDOW = 20
+BOLLINGER_K = 2.0
+RSI_PERIOD = 14
+# Symbols whose engines IndicatorBook keeps; the least recently used are dropped.
+BOOK_SYMBOLS = 64
+
+
+class RollingSum:
+    """Windowed sum over a ring buffer.
+
+    Running sums drift as values are added and removed, so the total is
+    recomputed from the buffer once per full window, keeping updates
+    amortised O(1).
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.buffer = deque(maxlen=window)
+        self.total = 0.0
+        self._since_resync = 0
+
+    def push(self, value):
+        if len(self.buffer) == self.window:
+            self.total -= self.buffer[0]
+        self.buffer.append(value)
+        self.total += value
+        self._since_resync += 1
+        if self._since_resync >= self.window:
+            self.total = math.fsum(self.buffer)
+            self._since_resync = 0
+        return self.total
+
+    def __len__(self):
+        return len(self.buffer)
+
+
+class SMA:
+    def __init__(self, window):
+        self.sum = RollingSum(window)
+
+    def push(self, close):
+        return self.sum.push(close) / len(self.sum)
+
+
+class EMA:
+    def __init__(self, span):
+        self.alpha = 2.0 / (span + 1)
+        self.value = None
+
+    def push(self, close):
+        if self.value is None:
+            self.value = close
+        else:
+            self.value = self.alpha * close + (1 - self.alpha) * self.value
+        return self.value
+
+
+class RollingVWAP:
+    """Volume-weighted typical price over the last ``window`` bars."""
+
+    def __init__(self, window):
+        self.price_volume = RollingSum(window)
+        self.volume = RollingSum(window)
+
+    def push(self, high, low, close, volume):
+        typical = (high + low + close) / 3
+        pv = self.price_volume.push(typical * volume)
+        v = self.volume.push(volume)
+        return pv / v if v else math.nan
+
+
+class Bollinger:
+    """Rolling mean +/- k sample standard deviations.
+
+    Sums are taken about the first close seen to avoid the cancellation a
+    raw sum-of-squares suffers at price levels in the thousands.
+    """
+
+    def __init__(self, window, k):
+        self.k = k
+        self.shift = None
+        self.sum = RollingSum(window)
+        self.sumsq = RollingSum(window)
+
+    def push(self, close):
+        if self.shift is None:
+            self.shift = close
+        d = close - self.shift
+        s = self.sum.push(d)
+        sq = self.sumsq.push(d * d)
+        n = len(self.sum)
+        mean = self.shift + s / n
+        if n < 2:
+            return mean, math.nan, math.nan
+        std = math.sqrt(max(sq - s * s / n, 0.0) / (n - 1))
+        return mean, mean + self.k * std, mean - self.k * std
+
+
+class RSI:
+    """Wilder's RSI: EWMs of gains and losses with alpha = 1 / period."""
+
+    def __init__(self, period):
+        self.alpha = 1.0 / period
+        self.prev = None
+        self.gain = None
+        self.loss = None
+
+    def push(self, close):
+        prev, self.prev = self.prev, close
+        if prev is None:
+            return math.nan
+        change = close - prev
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        if self.gain is None:
+            self.gain, self.loss = gain, loss
+        else:
+            self.gain = self.alpha * gain + (1 - self.alpha) * self.gain
+            self.loss = self.alpha * loss + (1 - self.alpha) * self.loss
+        if self.loss == 0:
+            return 100.0 if self.gain > 0 else math.nan
+        return 100.0 - 100.0 / (1.0 + self.gain / self.loss)
+
+
+def indicator_columns():
+    columns = ['SMA_%d' % n for n in SMA_WINDOWS]
+    columns += ['EMA_%d' % n for n in EMA_SPANS]
+    columns += ['VWAP_%d' % VWAP_WINDOW]
+    columns += ['BB_MID_%d' % BOLLINGER_WINDOW, 'BB_UPPER_%d' % BOLLINGER_WINDOW, 'BB_LOWER_%d' % BOLLINGER_WINDOW]
+    columns += ['RSI_%d' % RSI_PERIOD]
+    return columns
+
+
+class IndicatorEngine:
+    """All overlay indicators for one symbol, extended one bar at a time."""
+
+    def __init__(self):
+        self.smas = [SMA(n) for n in SMA_WINDOWS]
+        self.emas = [EMA(n) for n in EMA_SPANS]
+        self.vwap = RollingVWAP(VWAP_WINDOW)
+        self.bollinger = Bollinger(BOLLINGER_WINDOW, BOLLINGER_K)
+        self.rsi = RSI(RSI_PERIOD)
+        self.first_date = None
+        self.last_date = None
+        self._count = 0
+        self._dates = np.empty(64, dtype='datetime64[ns]')
+        self._values = np.empty((64, len(indicator_columns())))
+        self._frame = None
+
+    def update(self, date, high, low, close, volume):
+        row = [sma.push(close) for sma in self.smas]
+        row += [ema.push(close) for ema in self.emas]
+        row.append(self.vwap.push(high, low, close, volume))
+        row.extend(self.bollinger.push(close))
+        row.append(self.rsi.push(close))
+        if self.first_date is None:
+            self.first_date = date
+        self.last_date = date
+        if self._count == len(self._dates):
+            # Amortised O(1) append: grow the output columns geometrically.
+            self._dates = np.resize(self._dates, 2 * self._count)
+            self._values = np.resize(self._values, (2 * self._count, self._values.shape[1]))
+        self._dates[self._count] = np.datetime64(date, 'ns')
+        self._values[self._count] = row
+        self._count += 1
+        self._frame = None
+        return row
+
+    def extend(self, history):
+        """Feed the bars of ``history`` newer than the last one seen; return how many."""
+        if self.last_date is not None:
+            history = history.loc[history.index > self.last_date]
+        columns = (history.index, history.High.to_numpy(float), history.Low.to_numpy(float),
+                   history.Close.to_numpy(float), history.Volume.to_numpy(float))
+        for date, high, low, close, volume in zip(*columns):
+            self.update(date, high, low, close, volume)
+        return len(history)
+
+    def frame(self):
+        if self._frame is None:
+            self._frame = pd.DataFrame(self._values[:self._count],
+                                       index=pd.DatetimeIndex(self._dates[:self._count], name='Date'),
+                                       columns=indicator_columns(), copy=False)
+        return self._frame
+
+
+class IndicatorBook:
+    """Per-symbol engines kept alive between callbacks, for at most ``max_symbols`` symbols."""
+
+    def __init__(self, max_symbols=BOOK_SYMBOLS):
+        self.max_symbols = max_symbols
+        self._engines = OrderedDict()
+        self._lock = threading.Lock()
+
+    def for_symbol(self, symbol, history):
+        """Indicator frame covering ``history``, computing only bars not seen before.
+
+        The frame may start before ``history`` if a longer one was seen earlier.
+        """
+        with self._lock:
+            engine = self._engines.get(symbol)
+            if history.empty:
+                return pd.DataFrame(columns=indicator_columns(), index=history.index)
+            # A history that starts earlier (e.g. the store back-filled, or a multi-year
+            # window was asked for) needs a fresh run; a later start is a slice of it.
+            if engine is None or history.index[0] < engine.first_date:
+                engine = self._engines[symbol] = IndicatorEngine()
+            self._engines.move_to_end(symbol)
+            while len(self._engines) > self.max_symbols:
+                self._engines.popitem(last=False)
+            engine.extend(history)
+            return engine.frame()
+
+
+def pandas_reference(history):
+    """Vectorized pandas computation the streaming engine must reproduce."""
+    close = history.Close.astype(float)
+    out = pd.DataFrame(index=history.index)
+    for n in SMA_WINDOWS:
+        out['SMA_%d' % n] = close.rolling(n, min_periods=1).mean()
+    for n in EMA_SPANS:
+        out['EMA_%d' % n] = close.ewm(span=n, adjust=False).mean()
+    typical = (history.High + history.Low + history.Close) / 3
+    volume = history.Volume.astype(float)
+    out['VWAP_%d' % VWAP_WINDOW] = ((typical * volume).rolling(VWAP_WINDOW, min_periods=1).sum()
+                                    / volume.rolling(VWAP_WINDOW, min_periods=1).sum())
+    mid = close.rolling(BOLLINGER_WINDOW, min_periods=1).mean()
+    std = close.rolling(BOLLINGER_WINDOW, min_periods=1).std()
+    out['BB_MID_%d' % BOLLINGER_WINDOW] = mid
+    out['BB_UPPER_%d' % BOLLINGER_WINDOW] = mid + BOLLINGER_K * std
+    out['BB_LOWER_%d' % BOLLINGER_WINDOW] = mid - BOLLINGER_K * std
+    delta = close.diff()
+    gain = delta.clip(lower=0).ewm(alpha=1.0 / RSI_PERIOD, adjust=False).mean()
+    loss = (-delta.clip(upper=0)).ewm(alpha=1.0 / RSI_PERIOD, adjust=False).mean()
+    out['RSI_%d' % RSI_PERIOD] = 100 - 100 / (1 + gain / loss)
+    return out
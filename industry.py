@@ -0,0 +1,187 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from batch import UniverseMatrix
+
+# Trailing windows, in sessions, used for sector extremes and the constituent heatmap.
+YEAR_SESSIONS = 252
+HEATMAP_WINDOWS = {'1D': 1, '1W': 5, '1M': 21, '3M': 63}
+# Seconds before a build that left symbols out is attempted again.
+RETRY_SECONDS = 15 * 60
+
+
+class IndustryAggregates:
+    """Per-industry index levels and extremes, maintained incrementally.
+
+    Membership is a dense ``industries x symbols`` weight matrix, so every
+    daily update is two matrix-vector products regardless of how many
+    sectors there are. Equal-weighted indices give each constituent the same
+    weight; market-weighted ones use ``weights`` (e.g. free-float market cap)
+    and fall back to each symbol's average traded value (VWAP x volume) when
+    no weights are supplied.
+    """
+
+    def __init__(self, industries, weights=None):
+        self.industry_of = dict(industries)
+        self.weights = weights
+        self.symbols = []
+        self.names = sorted(set(self.industry_of.values()))
+        self.dates = []
+        self.closes = None
+        self.levels = {'equal': np.empty((len(self.names), 0)), 'market': np.empty((len(self.names), 0))}
+        self._membership = {}
+        self._members = {}
+        self._last_close = None
+
+    @property
+    def last_date(self):
+        return self.dates[-1] if self.dates else None
+
+    def build(self, matrix):
+        """Initialise from a full history matrix."""
+        self.symbols = [s for s in matrix.symbols if s in self.industry_of]
+        rows = [matrix.row[s] for s in self.symbols]
+        closes = matrix['Close'][rows]
+        member = np.zeros((len(self.names), len(self.symbols)))
+        position = {name: i for i, name in enumerate(self.names)}
+        self._members = {name: [] for name in self.names}
+        for j, symbol in enumerate(self.symbols):
+            member[position[self.industry_of[symbol]], j] = 1.0
+            self._members[self.industry_of[symbol]].append(j)
+        if self.weights:
+            weight = np.array([self.weights.get(s, 0.0) for s in self.symbols])
+        else:
+            with np.errstate(all='ignore'):
+                traded = np.nanmean(matrix['VWAP'][rows] * matrix['Volume'][rows], axis=1)
+            weight = np.nan_to_num(traded)
+        self._membership = {'equal': member, 'market': member * weight}
+
+        self.dates = list(matrix.dates)
+        self.closes = closes
+        returns = np.full_like(closes, np.nan)
+        returns[:, 1:] = closes[:, 1:] / closes[:, :-1] - 1
+        for kind, weights in self._membership.items():
+            sector = self._sector_returns(weights, returns)
+            sector[:, 0] = 0.0
+            self.levels[kind] = 100 * np.cumprod(1 + sector, axis=1)
+        self._last_close = self._forward_last(closes)
+        return self
+
+    @staticmethod
+    def _forward_last(closes):
+        valid = ~np.isnan(closes)
+        idx = closes.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)
+        return closes[np.arange(len(closes)), idx]
+
+    @staticmethod
+    def _sector_returns(weights, returns):
+        valid = ~np.isnan(returns)
+        total = weights @ np.where(valid, returns, 0.0)
+        norm = weights @ valid
+        with np.errstate(all='ignore'):
+            return np.where(norm > 0, total / norm, 0.0)
+
+    def append_day(self, date, closes):
+        """Fold one new session into every index; ``closes`` aligns with ``self.symbols``."""
+        closes = np.asarray(closes, dtype=float)
+        with np.errstate(all='ignore'):
+            returns = (closes / self._last_close - 1)[:, None]
+        for kind, weights in self._membership.items():
+            level = self.levels[kind][:, -1:] * (1 + self._sector_returns(weights, returns))
+            self.levels[kind] = np.hstack([self.levels[kind], level])
+        self.closes = np.hstack([self.closes, closes[:, None]])
+        self._last_close = np.where(np.isnan(closes), self._last_close, closes)
+        self.dates.append(pd.Timestamp(date))
+
+    def refresh(self, matrix):
+        """Append the sessions in ``matrix`` newer than the last one folded in."""
+        rows = [matrix.row.get(s) for s in self.symbols]
+        added = 0
+        for col, date in enumerate(matrix.dates):
+            if date <= self.last_date:
+                continue
+            closes = np.array([matrix['Close'][r, col] if r is not None else np.nan for r in rows])
+            self.append_day(date, closes)
+            added += 1
+        return added
+
+    # Lookups_____________________________________________________
+    def index_series(self, industry, kind='equal'):
+        i = self.names.index(industry)
+        return pd.Series(self.levels[kind][i], index=pd.DatetimeIndex(self.dates), name=industry)
+
+    def extremes(self, industry, kind='equal'):
+        """52-week high/low of the sector index and constituents at their own extremes."""
+        level = self.levels[kind][self.names.index(industry), -YEAR_SESSIONS:]
+        rows = self._rows(industry)
+        closes = self.closes[rows, -YEAR_SESSIONS:]
+        with np.errstate(all='ignore'):
+            at_high = int(np.sum(closes[:, -1] >= np.nanmax(closes, axis=1)))
+            at_low = int(np.sum(closes[:, -1] <= np.nanmin(closes, axis=1)))
+        return {'high': level.max(), 'low': level.min(), 'at_high': at_high, 'at_low': at_low,
+                'constituents': len(rows)}
+
+    def _rows(self, industry):
+        return self._members[industry]
+
+    def constituent_returns(self, industry):
+        """Trailing returns of each constituent over HEATMAP_WINDOWS, in percent."""
+        rows = self._rows(industry)
+        closes = self.closes[rows]
+        out = {}
+        for label, n in HEATMAP_WINDOWS.items():
+            if closes.shape[1] > n:
+                with np.errstate(all='ignore'):
+                    out[label] = (closes[:, -1] / closes[:, -1 - n] - 1) * 100
+        return pd.DataFrame(out, index=[self.symbols[j] for j in rows])
+
+
+class IndustryBoard:
+    """Builds the aggregates from the store and keeps them current.
+
+    Building reads a year and more of bars for the whole universe, so
+    ``refresh`` belongs off the request path (the prefetcher's ``on_warm``
+    or a background job); requests only read ``aggregates``, which stays
+    None until the first build. Symbols that fail to load leave the
+    aggregates incomplete, and a refresh RETRY_SECONDS later rebuilds them
+    from scratch rather than extending them.
+    """
+
+    def __init__(self, store, industries, lookback_start, weights=None):
+        self.store = store
+        self.industries = dict(industries)
+        self.lookback_start = lookback_start
+        self.weights = weights
+        self.aggregates = None
+        self.through = None
+        self._failures = {}
+        self._attempted = 0.0
+        self._lock = threading.Lock()
+
+    def needs_refresh(self, end):
+        if self.aggregates is None or end > self.through:
+            return True
+        return bool(self._failures) and time.monotonic() - self._attempted >= RETRY_SECONDS
+
+    def refresh(self, end):
+        """Aggregates including every session up to ``end`` (a settled trading day)."""
+        with self._lock:
+            if not self.needs_refresh(end):
+                return self.aggregates
+            self._attempted = time.monotonic()
+            if self.aggregates is None or self._failures:
+                matrix = UniverseMatrix.from_store(self.store, list(self.industries),
+                                                   self.lookback_start(end), end)
+                if not len(matrix):
+                    raise RuntimeError('no bars could be loaded for any of %d symbols' % len(self.industries))
+                self.aggregates = IndustryAggregates(self.industries, self.weights).build(matrix)
+            else:
+                since = self.aggregates.last_date.date()
+                matrix = UniverseMatrix.from_store(self.store, self.aggregates.symbols, since, end)
+                self.aggregates.refresh(matrix)
+            self._failures = matrix.failures
+            self.through = end
+            return self.aggregates
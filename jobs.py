@@ -0,0 +1,70 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+
+class JobQueue:
+    """Background executor for slow page builds, keyed so duplicates coalesce.
+
+    ``run`` starts the job for ``key`` unless one is already in flight, in
+    which case the caller joins it. Either way it waits at most ``wait``
+    seconds, so a request thread is never held on upstream I/O longer than
+    that; callers poll again with the same key until the future is done.
+
+    Successful jobs leave the queue as soon as they finish (their result is
+    expected to be cached by the job itself). A failed job stays until one
+    caller has collected it, so the error is reported once before a retry;
+    with ``hold``, so does a successful one, for results that must not be
+    cached but still have to reach the caller's next poll.
+    """
+
+    def __init__(self, max_workers=8):
+        self.submitted = 0
+        self.coalesced = 0
+        self._jobs = {}
+        self._held = set()
+        # Re-entrant: a job that finishes before add_done_callback returns runs
+        # _finished on the submitting thread, still inside run's lock.
+        self._lock = threading.RLock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='page-job')
+
+    def run(self, key, fn, wait_for=0.0, hold=False):
+        with self._lock:
+            future = self._jobs.get(key)
+            if future is not None and future.done():
+                return self._collect(key, future)
+            if future is None:
+                future = self._jobs[key] = self._executor.submit(fn)
+                if hold:
+                    self._held.add(future)
+                future.add_done_callback(lambda f: self._finished(key, f))
+                self.submitted += 1
+            else:
+                self.coalesced += 1
+        wait([future], timeout=wait_for)
+        if future.done():
+            # Finished within this caller's wait: it collects the result (or error) now.
+            with self._lock:
+                if self._jobs.get(key) is future:
+                    self._collect(key, future)
+        return future
+
+    def _collect(self, key, future):
+        del self._jobs[key]
+        self._held.discard(future)
+        return future
+
+    def _finished(self, key, future):
+        with self._lock:
+            if future.cancelled() or (future.exception() is None and future not in self._held):
+                if self._jobs.get(key) is future:
+                    del self._jobs[key]
+
+    def pending(self):
+        with self._lock:
+            return sum(not f.done() for f in self._jobs.values())
+
+    def stats(self):
+        return {'submitted': self.submitted, 'coalesced': self.coalesced, 'pending': self.pending()}
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,141 @@
+import datetime
+import threading
+
+import numpy as np
+
+from market import MARKET_TZ
+
+# Candle lengths, in seconds, kept for every streamed symbol.
+INTERVALS = {'1m': 60, '5m': 300}
+# Closed candles kept per symbol and interval: a full 09:15-15:30 session of
+# 1-minute candles (375) with room to spare.
+RING_CAPACITY = 400
+FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def exchange_seconds(moment):
+    """Epoch seconds of ``moment`` read as exchange wall-clock time.
+
+    Ticks carry exchange-local timestamps, so charts (which treat epoch
+    milliseconds as UTC) label candles 09:15-15:30 rather than in UTC.
+    """
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(MARKET_TZ).replace(tzinfo=None)
+    return int((moment - _EPOCH).total_seconds())
+
+
+class CandleRing:
+    """Fixed-size ring of closed OHLCV candles plus the one still forming.
+
+    ``closed`` counts every candle ever closed; candle ``i`` sits in slot
+    ``i % capacity`` until ``capacity`` newer ones overwrite it. Readers keep
+    the start of the last closed candle they have as a cursor and ask only
+    for candles that start after it. A timestamp, unlike the count, means
+    the same thing in every process folding the same feed, whenever each
+    one started.
+    """
+
+    def __init__(self, seconds, capacity=RING_CAPACITY):
+        self.seconds = seconds
+        self.capacity = capacity
+        self.start = np.zeros(capacity, dtype=np.int64)
+        self.values = np.zeros((len(FIELDS), capacity))
+        self.closed = 0
+        # [bucket start, open, high, low, close, volume] as plain floats: the hot path.
+        self.current = None
+
+    def add(self, ts, price, qty=0):
+        bucket = ts - ts % self.seconds
+        current = self.current
+        if current is not None and bucket == current[0]:
+            if price > current[2]:
+                current[2] = price
+            if price < current[3]:
+                current[3] = price
+            current[4] = price
+            current[5] += qty
+            return
+        if current is not None:
+            if bucket < current[0]:
+                return  # late tick for a candle already closed
+            slot = self.closed % self.capacity
+            self.start[slot] = current[0]
+            self.values[:, slot] = current[1:]
+            self.closed += 1
+        self.current = [bucket, price, price, price, price, qty]
+
+    def since(self, cursor=None):
+        """(new cursor, closed candles starting after ``cursor``, forming candle).
+
+        ``cursor`` is a candle start in epoch seconds, None for every candle
+        held. The forming candle is left out if it does not start after the
+        cursor, i.e. the reader already has it as closed from another process.
+        """
+        slots = np.arange(max(self.closed - self.capacity, 0), self.closed) % self.capacity
+        if cursor is not None:
+            slots = slots[self.start[slots].searchsorted(cursor, side='right'):]
+        closed = {'x': (self.start[slots] * 1000).tolist()}
+        for i, field in enumerate(FIELDS):
+            closed[field] = self.values[i, slots].tolist()
+        if len(slots):
+            cursor = int(self.start[slots[-1]])
+        current = None
+        if self.current is not None and (cursor is None or self.current[0] > cursor):
+            current = dict(zip(('x',) + FIELDS, [self.current[0] * 1000] + self.current[1:]))
+        return cursor, closed, current
+
+
+class LiveAggregator:
+    """Folds a tick stream into per-symbol candle rings for every interval.
+
+    One tick costs a dict lookup and a few float compares per interval, so a
+    feed covering hundreds of symbols stays cheap; readers copy out only the
+    candles that changed since their cursor.
+    """
+
+    def __init__(self, intervals=INTERVALS, capacity=RING_CAPACITY):
+        self.intervals = dict(intervals)
+        self.capacity = capacity
+        self.ticks = 0
+        self._rings = {}
+        self._lock = threading.Lock()
+
+    def _rings_for(self, symbol):
+        rings = self._rings.get(symbol)
+        if rings is None:
+            rings = self._rings[symbol] = {label: CandleRing(seconds, self.capacity)
+                                           for label, seconds in self.intervals.items()}
+        return rings
+
+    def on_tick(self, symbol, ts, price, qty=0):
+        with self._lock:
+            for ring in self._rings_for(symbol).values():
+                ring.add(ts, price, qty)
+            self.ticks += 1
+
+    def on_ticks(self, symbols, ts, prices, qtys):
+        """Fold a batch of ticks (parallel sequences) under one lock acquisition."""
+        with self._lock:
+            for symbol, t, price, qty in zip(symbols, ts, prices, qtys):
+                for ring in self._rings_for(symbol).values():
+                    ring.add(t, price, qty)
+            self.ticks += len(symbols)
+
+    def since(self, symbol, interval, cursor=None):
+        """(new cursor, closed candles, forming candle) for ``symbol``; see CandleRing.since."""
+        with self._lock:
+            rings = self._rings.get(symbol)
+            if rings is None:
+                return cursor, {field: [] for field in ('x',) + FIELDS}, None
+            return rings[interval].since(cursor)
+
+    def symbols(self):
+        with self._lock:
+            return sorted(self._rings)
+
+    def reset(self):
+        with self._lock:
+            self._rings.clear()
+            self.ticks = 0
@@ -1,20 +1,143 @@
 import datetime
-from dateutil.relativedelta import relativedelta
-import nsepy as nse
+import functools
+import gc
+import os
 import dash
 from dash import dcc
 from dash import html
-from dash.dependencies import Input, Output
+from dash import Patch
+from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
-import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
 
+from backtest import PRESETS, run_backtest
+from cache_backend import FileBackend, seconds_to_close
+from chart_encoding import epoch_ms, typed_array
+from comparison import MAX_SYMBOLS, Comparison
+from downsample import choose_rule, lttb_series, resample_ohlcv
+from export import mount_export
+from fakes import TickReplay, synthetic_ticks
+from indicators import IndicatorBook
+from industry import IndustryBoard
+from jobs import JobQueue
+from live import LiveAggregator
+from market import last_closed_session
+from metrics import Gauge, mount_metrics, timed
+from planner import RANGE_SEPARATOR, custom_window, load_plan, plan_range, superset_start, window_bounds, window_start
+from prefetch import PrefetchScheduler
+from registry import SymbolRegistry
+from render_cache import RenderCache
+from screener import FACTORS, SCREENS, Screener, parse_query
+from search import SymbolSearch
+from store import OHLCVStore
+
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.DARKLY])
 server = app.server
 
-df = pd.read_csv('ind_nifty500list.csv', usecols=['Company Name', 'Industry', 'Symbol'])
-zipped_ind = pd.DataFrame(zip(df['Symbol'], df['Industry']))
+# Shared by every gunicorn worker on the host: single-flight fetch locks and computed indicators.
+shared_cache = FileBackend(os.environ.get('STOCKVIEW_CACHE', 'data/cache'))
+
+
+def nse_history(symbol, start, end):
+    # nsepy (with requests and bs4) is imported on the first upstream fetch, not at start-up.
+    from nsepy import get_history
+    return get_history(symbol, start, end)
+
+
+# Daily bars are persisted locally; nsepy is only asked for ranges not stored yet.
+store = OHLCVStore(os.environ.get('STOCKVIEW_STORE', 'data/ohlcv'), fetcher=nse_history,
+                   backend=shared_cache)
+page_cache = RenderCache()
+indicator_book = IndicatorBook()
+# Page builds that have to fetch from nsepy run here; a request waits at most
+# PAGE_WAIT seconds for one before answering with a loading state and polling.
+page_jobs = JobQueue()
+PAGE_WAIT = 0.1
+PAGE_POLL_MS = 500
+
+# Every timeframe the nav offers, in button order: planner window name -> button
+# text, card labels and which SMA overlays it shows. The buttons, the callback
+# inputs and the cards are all generated from this; the look-back itself is
+# planner.WINDOWS. Custom date ranges get an entry from timeframe_info().
+TIMEFRAMES = {
+    '1week': {'button': '1W', 'label': '1 Week', 'span': '1 Week', 'smas': ()},
+    '1month': {'button': '1M', 'label': '1 Month', 'span': '1 Month', 'smas': (10, 20)},
+    '3month': {'button': '3M', 'label': '3 Month', 'span': '3 Months', 'smas': (10, 20, 50)},
+    '6month': {'button': '6M', 'label': '6 Month', 'span': '6 Months', 'smas': (10, 20, 50, 100)},
+    'ytd': {'button': 'YTD', 'label': 'YTD', 'span': 'Year to Date', 'smas': (10, 20, 50, 100)},
+    '1year': {'button': '1Y', 'label': '1 Year', 'span': '1 Year', 'smas': (10, 20, 50, 100)},
+    '5year': {'button': '5Y', 'label': '5 Year', 'span': '5 Years', 'smas': (10, 20, 50, 100)},
+    '10year': {'button': '10Y', 'label': '10 Year', 'span': '10 Years', 'smas': (10, 20, 50, 100)},
+    'max': {'button': 'MAX', 'label': 'All Time', 'span': 'All Time', 'smas': (10, 20, 50, 100)},
+}
+SMA_WINDOWS = (10, 20, 50, 100)
+COMPARE_WINDOWS = ('1month', '3month', '6month', '1year', '5year')
+BACKTEST_WINDOWS = ('1year', '5year', '10year', 'max')
+SMA_COLORS = {10: '#a5f2f1', 20: '#f0ee8d', 50: '#f5a887', 100: '#78e874'}
+
+# Loaded once; constant-time symbol/ISIN/name lookups and symbol -> industry mapping.
+registry = SymbolRegistry.from_csv('ind_nifty500list.csv')
+# The stock dropdown is filled server-side from what the user types, capped at SEARCH_LIMIT.
+symbol_search = SymbolSearch(registry)
+SEARCH_LIMIT = 20
+
+# Sector indices and extremes, folded forward incrementally as new daily bars land.
+# Built in the background (prefetch pass or a page job), never inside a request.
+industry_board = IndustryBoard(store, registry.industry_map(), superset_start)
+
+# Factor table for the screener, rebuilt from the store's trailing year and then
+# advanced one session per close, in the background; queries never touch the store.
+screener = Screener(store, registry.industry_map(), superset_start)
+SCREENER_LIMIT = 50
+
+# Keeps every NIFTY 500 symbol warm in the store so first clicks don't wait on nsepy. One
+# process on the host wins the shared cache's 'prefetch' lease and does it for all workers;
+# the others build their board and screener from the warm store on first use.
+prefetcher = PrefetchScheduler(store, registry.symbols(), elect=lambda: shared_cache.hold('prefetch'),
+                               on_warm=[lambda: industry_board.refresh(last_closed_session()),
+                                        lambda: screener.refresh(last_closed_session())])
+
+# Intraday candles folded from a tick stream. STOCKVIEW_LIVE=synthetic replays a
+# generated session, a .csv/.parquet path replays recorded ticks, and unset
+# leaves live mode off. STOCKVIEW_LIVE_SPEED is a multiple of real time.
+live_candles = LiveAggregator()
+live_feed = None
+LIVE_POLL_MS = 1000
+if os.environ.get('STOCKVIEW_LIVE'):
+    source = os.environ['STOCKVIEW_LIVE']
+    speed = float(os.environ.get('STOCKVIEW_LIVE_SPEED', '1'))
+    if source == 'synthetic':
+        live_feed = TickReplay(synthetic_ticks(registry.symbols(), last_closed_session()),
+                               live_candles.on_ticks, speed=speed)
+    else:
+        live_feed = TickReplay.from_file(source, live_candles.on_ticks, speed=speed)
+
+# Prometheus text on /metrics; STOCKVIEW_TRACE=1 also logs one JSON line per callback request.
+mount_metrics(server, trace=os.environ.get('STOCKVIEW_TRACE') == '1')
+Gauge('stockview_page_cache_hit_ratio', 'Share of page lookups served from the render cache.',
+      lambda: page_cache.stats()['hit_ratio'])
+Gauge('stockview_page_cache_entries', 'Page models held by the render cache.', lambda: len(page_cache))
+Gauge('stockview_page_cache_bytes', 'Approximate memory held by the render cache.',
+      lambda: page_cache.stats()['bytes'])
+Gauge('stockview_page_jobs_pending', 'Background page builds still running.', page_jobs.pending)
+# Only the worker holding the prefetch lease reports progress; staleness is read from the shared store.
+Gauge('stockview_prefetch_leader', 'Whether this worker runs the prefetcher.',
+      lambda: prefetcher.progress()['leader'])
+Gauge('stockview_prefetch_symbols_done', 'Symbols finished in the current or last prefetch pass.',
+      lambda: prefetcher.progress()['done'])
+Gauge('stockview_prefetch_symbols_failed', 'Symbols that failed in the current or last prefetch pass.',
+      lambda: len(prefetcher.progress()['failed']))
+Gauge('stockview_store_staleness_max_days', 'Most days any stored symbol lags the last closed session.',
+      lambda: prefetcher.staleness_summary()['max_days'])
+Gauge('stockview_store_staleness_p95_days', '95th percentile of days stored symbols lag the last closed session.',
+      lambda: prefetcher.staleness_summary()['p95_days'])
+Gauge('stockview_store_symbols_missing', 'Universe symbols with no stored bars yet.',
+      lambda: prefetcher.staleness_summary()['missing'])
+
+# Streaming CSV/Parquet/Arrow download of stored bars and overlays on /export.
+mount_export(server, store, registry.symbols())
 
 NAV_STYLE = {
     'padding':'1rem',
@@ -22,77 +145,6 @@ NAV_STYLE = {
     'height':'100'
 }
 
-app.layout = html.Div([
-    dbc.Container([
-    dbc.Row([
-        dbc.Col([
-            html.H1('StockView', style={'fontSize':35, 'textAlign':'center'})
-        ], width=12)
-    ]),
-    dbc.Row([
-        dbc.Col([
-            dbc.Nav([
-                dbc.Container([
-                dbc.Row([
-                    dbc.Col([
-                        dbc.NavItem(dcc.Dropdown(
-                            id='stock-search',
-                            options=[{'label':x, 'value':y} for x,y in zip(df['Company Name'], df['Symbol'])],
-                            clearable=True,
-                            placeholder='Search Stock',
-                            multi=False,
-                            style={'textAlign':'left', 'color':'black'}
-                        ))
-                    ], width=6),
-                    dbc.Col([
-                        dbc.NavItem(dbc.Button('1W', outline=True, color='danger',
-                                               className='mr-1', id='1week', active='exact'))
-                    ], width={'size':1, 'offset':1}),
-                    dbc.Col([
-                        dbc.NavItem(dbc.Button('1M', outline=True, color='danger',
-                                               className='mr-1', id='1month', active='exact'))
-                    ], width=1),
-                    dbc.Col([
-                        dbc.NavItem(dbc.Button('3M', outline=True, color='danger',
-                                               className='mr-1', id='3month', active='exact'))
-                    ], width=1),
-                    dbc.Col([
-                        dbc.NavItem(dbc.Button('6M', outline=True, color='danger',
-                                               className='mr-1', id='6month', active='exact'))
-                    ], width=1),
-                    dbc.Col([
-                        dbc.NavItem(dbc.Button('1Y', outline=True, color='danger',
-                                               className='mr-1', id='1year', active='exact'))
-                    ], width=1),
-
-                ], id='dpr-row')
-                    ])
-            ], justified=True, fill=True, style=NAV_STYLE),
-            ])
-        ]),
-    html.Br(),
-
-    dbc.Row(children=[
-        dbc.Col([
-            dbc.Card(id='ticker'),
-        ], width=3),
-        dbc.Col([
-            dbc.Card(id='industry'),
-        ], width=3),
-        dbc.Col([
-            dbc.Card(id='time-max'),
-        ], width=3),
-        dbc.Col([
-            dbc.Card(id='time-min')
-        ], width=3)
-    ], id='card-row'),
-    html.Br(),
-    dbc.Row([
-        dbc.Col(children=[], width=8),
-        dbc.Col(children=[], width=4)
-    ], id='graph-row', style={'columnCount':2})
-])])
-
 #Designs_____________________________________________
 card_col = 'black'
 ticker_card_font_col = '#e69c15'
@@ -109,508 +161,842 @@ paper_bgcolor = 'black'
 linecolor = 'white'
 #______________________________________________________
 
+# Built on the first page load (or by preload()) rather than at import, then reused.
+@functools.lru_cache(maxsize=None)
+def serve_layout():
+    return html.Div([
+        dbc.Container([
+        dbc.Row([
+            dbc.Col([
+                html.H1('StockView', style={'fontSize':35, 'textAlign':'center'})
+            ], width=12)
+        ]),
+        dbc.Row([
+            dbc.Col([
+                dbc.Nav([
+                    dbc.Container([
+                    dbc.Row([
+                        dbc.Col([
+                            dbc.NavItem(dcc.Dropdown(
+                                id='stock-search',
+                                options=[],
+                                clearable=True,
+                                placeholder='Search Stock',
+                                multi=False,
+                                style={'textAlign':'left', 'color':'black'}
+                            ))
+                        ], width=3),
+                    ] + [
+                        dbc.Col([
+                            dbc.NavItem(dbc.Button(tf['button'], outline=True, color='danger',
+                                                   className='mr-1', id=key, active='exact'))
+                        ], width=1)
+                        for key, tf in TIMEFRAMES.items()
+                    ], id='dpr-row'),
+                    dbc.Row([
+                        dbc.Col([
+                            dcc.DatePickerRange(
+                                id='custom-range',
+                                min_date_allowed=window_start('max', datetime.date.today()),
+                                display_format='DD MMM YYYY',
+                                start_date_placeholder_text='From',
+                                end_date_placeholder_text='To',
+                                clearable=True
+                            )
+                        ], width={'size':5, 'offset':3})
+                    ])
+                        ])
+                ], justified=True, fill=True, style=NAV_STYLE),
+                ])
+            ]),
+        html.Br(),
+
+        # Static page body: callbacks only send the values that change, never the components.
+        html.Div([
+        dbc.Row(children=[
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader('Ticker'),
+                    dbc.CardBody(id='ticker-value', style={'fontSize':ticker_card_font_size, 'color':ticker_card_font_col})
+                ], id='ticker', style={'textAlign':'center','height':130}, color=card_bg_color),
+            ], width=3),
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader('Industry'),
+                    dbc.CardBody(id='industry-value', style={'fontSize':ind_card_font_size, 'color':ind_card_font_col})
+                ], id='industry', style={'textAlign':'center', 'height':130}, color=card_bg_color),
+            ], width=3),
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader(id='time-max-header'),
+                    dbc.CardBody(id='time-max-value', style={'fontSize':high_card_font_size, 'color':high_card_font_col})
+                ], id='time-max', style={'textAlign':'center', 'height':130}, color=card_bg_color),
+            ], width=3),
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader(id='time-min-header'),
+                    dbc.CardBody(id='time-min-value', style={'fontSize':low_card_font_size, 'color':low_card_font_col})
+                ], id='time-min', style={'textAlign':'center', 'height':130}, color=card_bg_color)
+            ], width=3)
+        ], id='card-row'),
+        html.Br(),
+        dbc.Row([
+            dbc.Col([
+                dcc.Graph(id='chart', figure={}),
+            ], width=8),
+            dbc.Col([
+                dbc.Card([
+                    dbc.ListGroup([
+                        dbc.ListGroupItem('52 Week High'),
+                        dbc.ListGroupItem(id='high-52w', style={'fontSize': ticker_card_font_size, 'color':high_card_font_col}, color=card_bg_color),
+                        dbc.ListGroupItem('52 Week Low'),
+                        dbc.ListGroupItem(id='low-52w', style={'fontSize': ticker_card_font_size, 'color':low_card_font_col}, color=card_bg_color),
+                        dbc.ListGroupItem(id='avg-volume-header'),
+                        dbc.ListGroupItem(id='avg-volume', style={'fontSize': ticker_card_font_size, 'color':ind_card_font_col}, color=card_bg_color),
+                        dbc.ListGroupItem(id='avg-vwap-header'),
+                        dbc.ListGroupItem(id='avg-vwap', style={'fontSize': ticker_card_font_size, 'color':ticker_card_font_col}, color=card_bg_color)
+                    ])
+                ], style={'textAlign':'center'})
+            ], width=4)
+        ], id='graph-row', style={'columnCount':2}),
+        html.Br(),
+        dbc.Row([
+            dbc.Col([
+                dbc.Switch(id='live-mode', label='Live', value=False, disabled=live_feed is None)
+            ], width=2),
+            dbc.Col([
+                dbc.RadioItems(
+                    id='live-interval',
+                    options=[{'label':'1 Min', 'value':'1m'},
+                             {'label':'5 Min', 'value':'5m'}],
+                    value='1m',
+                    inline=True
+                )
+            ], width=4)
+        ]),
+        html.Div([
+            dcc.Graph(id='live-chart', figure={})
+        ], id='live-row', hidden=True),
+        # Polls for new candles; each tick sends only those through extendData.
+        dcc.Interval(id='live-tick', interval=LIVE_POLL_MS, disabled=True),
+        dcc.Store(id='live-cursor'),
+        html.Br(),
+        dbc.Row([
+            dbc.Col([
+                dcc.Dropdown(
+                    id='backtest-strategy',
+                    options=[{'label':label, 'value':label} for label in PRESETS],
+                    clearable=True,
+                    placeholder='Backtest a Strategy',
+                    style={'textAlign':'left', 'color':'black'}
+                )
+            ], width=4),
+            dbc.Col([
+                dbc.RadioItems(
+                    id='backtest-window',
+                    options=[{'label':TIMEFRAMES[tf]['label'], 'value':tf} for tf in BACKTEST_WINDOWS],
+                    value='5year',
+                    inline=True
+                )
+            ], width={'size':6, 'offset':2})
+        ]),
+        html.Br(),
+        dbc.Row(children=[], id='backtest-row'),
+        dcc.Interval(id='backtest-poll', interval=PAGE_POLL_MS, disabled=True),
+        ], id='page-body', hidden=True),
+        # Loading/error status while a page build runs in the background.
+        html.Div(id='page-status'),
+        dcc.Interval(id='page-poll', interval=PAGE_POLL_MS, disabled=True),
+        # The view that was asked for, so the poll knows which build to pick up.
+        dcc.Store(id='page-request'),
+        # What the chart currently holds, so the next click can be sent as a Patch.
+        dcc.Store(id='chart-state'),
+        html.Br(),
+        dbc.Row([
+            dbc.Col([
+                dcc.Dropdown(
+                    id='industry-search',
+                    options=[{'label':x, 'value':x} for x in registry.industries()],
+                    clearable=True,
+                    placeholder='Search Industry',
+                    style={'textAlign':'left', 'color':'black'}
+                )
+            ], width=6),
+            dbc.Col([
+                dbc.RadioItems(
+                    id='industry-weighting',
+                    options=[{'label':'Equal Weight', 'value':'equal'},
+                             {'label':'Market Weight', 'value':'market'}],
+                    value='equal',
+                    inline=True
+                )
+            ], width={'size':4, 'offset':2})
+        ]),
+        html.Br(),
+        dbc.Row(children=[], id='industry-row'),
+        dcc.Interval(id='industry-poll', interval=PAGE_POLL_MS, disabled=True),
+        html.Br(),
+        dbc.Row([
+            dbc.Col([
+                dcc.Dropdown(
+                    id='compare-search',
+                    options=[],
+                    clearable=True,
+                    placeholder='Compare Stocks (up to %d)' % MAX_SYMBOLS,
+                    multi=True,
+                    style={'textAlign':'left', 'color':'black'}
+                )
+            ], width=6),
+            dbc.Col([
+                dbc.RadioItems(
+                    id='compare-window',
+                    options=[{'label':TIMEFRAMES[tf]['label'], 'value':tf} for tf in COMPARE_WINDOWS],
+                    value='1year',
+                    inline=True
+                )
+            ], width={'size':5, 'offset':1})
+        ]),
+        html.Br(),
+        dbc.Row(children=[], id='compare-row'),
+        dcc.Interval(id='compare-poll', interval=PAGE_POLL_MS, disabled=True),
+        html.Br(),
+        dbc.Row([
+            dbc.Col([
+                dcc.Dropdown(
+                    id='screener-preset',
+                    options=[{'label':label, 'value':query} for label, query in SCREENS.items()],
+                    clearable=True,
+                    placeholder='Screens',
+                    style={'textAlign':'left', 'color':'black'}
+                )
+            ], width=3),
+            dbc.Col([
+                dbc.Input(id='screener-query', placeholder='e.g. from_high_52w >= -5 and volume_ratio > 2',
+                          debounce=True),
+                html.Small('Factors: %s, industry' % ', '.join(FACTORS))
+            ], width=6),
+            dbc.Col([
+                dcc.Dropdown(
+                    id='screener-sort',
+                    options=[{'label':label, 'value':name} for name, label in FACTORS.items()],
+                    value='volume_ratio',
+                    clearable=False,
+                    style={'textAlign':'left', 'color':'black'}
+                )
+            ], width=3)
+        ]),
+        html.Br(),
+        dbc.Row(children=[], id='screener-row'),
+        dcc.Interval(id='screener-poll', interval=PAGE_POLL_MS, disabled=True)
+    ])])
+
+
+app.layout = serve_layout
+
+
+@app.callback(
+    Output('stock-search', 'options'),
+    [Input('stock-search', 'search_value')],
+    [State('stock-search', 'value')]
+)
+def search_stocks(search_value, value):
+    if not search_value:
+        raise PreventUpdate
+    return search_options(search_value, [value] if value else [])
+
+
+@app.callback(
+    Output('compare-search', 'options'),
+    [Input('compare-search', 'search_value')],
+    [State('compare-search', 'value')]
+)
+def search_compare(search_value, value):
+    if not search_value:
+        raise PreventUpdate
+    return search_options(search_value, value or [])
+
+
+def search_options(search_value, selected):
+    options = symbol_search.options(search_value, SEARCH_LIMIT)
+    # Keep the current selection among the options or the dropdown clears it.
+    shown = {o['value'] for o in options}
+    for symbol in selected:
+        record = registry.get(symbol)
+        if record and symbol not in shown:
+            options.append({'label':record.name, 'value':record.symbol})
+    return options
+
+
 @app.callback(
-    [Output('card-row', 'children'),
-    Output('graph-row', 'children')],
-    [Input('stock-search', 'value'),
-     Input('1week', 'n_clicks'),
-     Input('1month', 'n_clicks'),
-     Input('3month', 'n_clicks'),
-     Input('6month', 'n_clicks'),
-     Input('1year', 'n_clicks')
-     ]
+    [Output('page-body', 'hidden'),
+     Output('ticker-value', 'children'),
+     Output('industry-value', 'children'),
+     Output('time-max-header', 'children'),
+     Output('time-max-value', 'children'),
+     Output('time-min-header', 'children'),
+     Output('time-min-value', 'children'),
+     Output('chart', 'figure'),
+     Output('high-52w', 'children'),
+     Output('low-52w', 'children'),
+     Output('avg-volume-header', 'children'),
+     Output('avg-volume', 'children'),
+     Output('avg-vwap-header', 'children'),
+     Output('avg-vwap', 'children'),
+     Output('chart-state', 'data'),
+     Output('page-status', 'children'),
+     Output('page-request', 'data'),
+     Output('page-poll', 'disabled')],
+    [Input('stock-search', 'value')] +
+    [Input(key, 'n_clicks') for key in TIMEFRAMES] +
+    [Input('custom-range', 'start_date'),
+     Input('custom-range', 'end_date'),
+     Input('page-poll', 'n_intervals')],
+    [State('chart-state', 'data'),
+     State('page-request', 'data')]
 )
-def update_page(value, btn1, btn2, btn3, btn4, btn5):
+@timed('callback')
+def update_page(value, *args):
+    # After the symbol: one n_clicks per TIMEFRAMES button, then the inputs and state below.
+    start_date, end_date, n_intervals, state, request = args[len(TIMEFRAMES):]
 
     changed_id = [p['prop_id'] for p in dash.callback_context.triggered][0]
-    if value:
-
-#1WEEK________________________________________________________________________________________________________________
-        if '1week' in changed_id:
-            end = datetime.date.today()
-            diff = relativedelta(weeks=1)
-            start = end - diff
-            frame = nse.get_history(value, start, end)
-
-            # Cards____________________
-            card1 = dbc.Card([
-                dbc.CardHeader('Ticker'),
-                dbc.CardBody(value, style={'fontSize':ticker_card_font_size, 'color':ticker_card_font_col})
-            ], id='ticker', style={'textAlign':'center','height':130}, color=card_bg_color)
-
-            card2 = dbc.Card([
-                dbc.CardHeader('Industry'),
-                dbc.CardBody(zipped_ind.loc[zipped_ind[0]==value, 1], style={'fontSize':ind_card_font_size,
-                                                                             'color':ind_card_font_col})
-            ], id='industry', style={'textAlign':'center', 'height':130}, color=card_bg_color)
-
-            card3 = dbc.Card([
-                dbc.CardHeader('1 Week High'),
-                dbc.CardBody(frame['High'].max(), style={'fontSize':high_card_font_size, 'color':high_card_font_col})
-            ], id='time-max', style={'textAlign':'center', 'height':130}, color=card_bg_color)
-
-            card4 = dbc.Card([
-                dbc.CardHeader('1 Week Low'),
-                dbc.CardBody(frame['Low'].min(), style={'fontSize':low_card_font_size, 'color':low_card_font_col})
-            ], id='time-min', style={'textAlign':'center', 'height':130}, color=card_bg_color)
-
-            row1 = dbc.Container([
-                dbc.Row(children=[
-                    dbc.Col([
-                        card1,
-                    ], width=3),
-                    dbc.Col([
-                        card2,
-                    ], width=3),
-                    dbc.Col([
-                        card3,
-                    ], width=3),
-                    dbc.Col([
-                        card4
-                    ], width=3)
-                ], id='card-row')])
-
-            #Graph____________________________
-            fig = go.Figure(data=[go.Candlestick(
-                x=frame.index,
-                open=frame.Open,
-                high=frame.High,
-                low=frame.Low,
-                close=frame.Close
-            )])
-            fig.update_xaxes(showgrid=False, linecolor=linecolor)
-            fig.update_yaxes(showgrid=False, linecolor=linecolor)
-            fig.update_layout({'plot_bgcolor':plot_bgcolor, 'paper_bgcolor':paper_bgcolor},
-                              xaxis_rangeslider_visible=False, yaxis=dict(color=linecolor),
-                              xaxis=dict(color=linecolor))
-            ending = datetime.date.today()
-            difference = relativedelta(weeks=52)
-            starting = ending - difference
-            new = nse.get_history(value, starting, ending)
-            row2 = dbc.Container([
-                dbc.Row([
-                    dbc.Col([
-                        dcc.Graph(id='chart', figure=fig),
-                    ], width=8),
-                    dbc.Col([
-                        dbc.Card([
-                            dbc.ListGroup([
-                                dbc.ListGroupItem('52 Week High'),
-                                dbc.ListGroupItem(new.High.max(), style={'fontSize': ticker_card_font_size, 'color':high_card_font_col}, color=card_bg_color),
-                                dbc.ListGroupItem('52 Week Low'),
-                                dbc.ListGroupItem(new.Low.min(), style={'fontSize': ticker_card_font_size, 'color':low_card_font_col}, color=card_bg_color),
-                                dbc.ListGroupItem('Average Volume (1 Week)'),
-                                dbc.ListGroupItem(frame.Volume.mean().round(2), style={'fontSize': ticker_card_font_size, 'color':ind_card_font_col}, color=card_bg_color),
-                                dbc.ListGroupItem('Average VWAP (1 Week)'),
-                                dbc.ListGroupItem(frame.VWAP.mean().round(2), style={'fontSize': ticker_card_font_size, 'color':ticker_card_font_col}, color=card_bg_color)
-                            ])
-                        ], style={'textAlign':'center'})
-                    ], width=4)
-                ], id='graph-row', style={'columnCount':2})
-            ])
-
-            return row1, row2
-
-# 1MONTH________________________________________________________________________________________________________________
-        if '1month' in changed_id:
-            end = datetime.date.today()
-            diff = relativedelta(months=1)
-            start = end - diff
-            frame = nse.get_history(value, start, end)
-            frame['SMA_10'] = frame.Close.rolling(10, min_periods=1).mean()
-            frame['SMA_20'] = frame.Close.rolling(20, min_periods=1).mean()
-
-            # Cards____________________
-            card1 = dbc.Card([
-                dbc.CardHeader('Ticker'),
-                dbc.CardBody(value, style={'fontSize':ticker_card_font_size, 'color':ticker_card_font_col})
-            ], id='ticker', style={'textAlign':'center','height':130}, color=card_bg_color)
-
-            card2 = dbc.Card([
-                dbc.CardHeader('Industry'),
-                dbc.CardBody(zipped_ind.loc[zipped_ind[0]==value, 1], style={'fontSize':ind_card_font_size,
-                                                                             'color':ind_card_font_col})
-            ], id='industry', style={'textAlign':'center', 'height':130}, color=card_bg_color)
-
-            card3 = dbc.Card([
-                dbc.CardHeader('1 Month High'),
-                dbc.CardBody(frame['High'].max(), style={'fontSize':high_card_font_size, 'color':high_card_font_col})
-            ], id='time-max', style={'textAlign':'center', 'height':130}, color=card_bg_color)
-
-            card4 = dbc.Card([
-                dbc.CardHeader('1 Month Low'),
-                dbc.CardBody(frame['Low'].min(), style={'fontSize':low_card_font_size, 'color':low_card_font_col})
-            ], id='time-min', style={'textAlign':'center', 'height':130}, color=card_bg_color)
-
-            row1 = dbc.Container([
-                dbc.Row(children=[
-                    dbc.Col([
-                        card1,
-                    ], width=3),
-                    dbc.Col([
-                        card2,
-                    ], width=3),
-                    dbc.Col([
-                        card3,
-                    ], width=3),
-                    dbc.Col([
-                        card4
-                    ], width=3)
-                ], id='card-row')])
-
-            #Graph__________________________________________
-            fig = go.Figure(data=[go.Candlestick(
-                x=frame.index,
-                open=frame.Open,
-                high=frame.High,
-                low=frame.Low,
-                close=frame.Close,
-                showlegend = False
-            )])
-            fig.update_xaxes(showgrid=False, linecolor=linecolor)
-            fig.update_yaxes(showgrid=False, linecolor=linecolor)
-            fig.update_layout({'plot_bgcolor': plot_bgcolor, 'paper_bgcolor': paper_bgcolor},
-                              xaxis_rangeslider_visible=False, yaxis=dict(color=linecolor),
-                              xaxis=dict(color=linecolor), legend_title_text='Select Moving Average',
-                              legend=dict(title_font_family='Times New Roman', font=dict(size=12, color='white'), bordercolor='white', borderwidth=2))
-            fig.add_trace(go.Scatter(x=frame.index, y=frame['SMA_10'], name='10 SMA', line=dict(color='#a5f2f1'), visible='legendonly'))
-            fig.add_trace(go.Scatter(x=frame.index, y=frame['SMA_20'], name='20 SMA', line=dict(color='#f0ee8d'), visible='legendonly'))
-
-            ending = datetime.date.today()
-            difference = relativedelta(weeks=52)
-            starting = ending - difference
-            new = nse.get_history(value, starting, ending)
-
-            row2 = dbc.Container([
-                dbc.Row([
-                    dbc.Col([
-                        dcc.Graph(id='chart', figure=fig),
-                    ], width=8),
-                    dbc.Col([
-                        dbc.Card([
-                            dbc.ListGroup([
-                                dbc.ListGroupItem('52 Week High'),
-                                dbc.ListGroupItem(new.High.max(), style={'fontSize':ticker_card_font_size, 'color':high_card_font_col}, color=card_bg_color),
-                                dbc.ListGroupItem('52 Week Low'),
-                                dbc.ListGroupItem(new.Low.min(), style={'fontSize':ticker_card_font_size, 'color':low_card_font_col}, color=card_bg_color),
-                                dbc.ListGroupItem('Average Volume (1 Month)'),
-                                dbc.ListGroupItem(frame.Volume.mean().round(2), style={'fontSize':ticker_card_font_size, 'color':ind_card_font_col}, color=card_bg_color),
-                                dbc.ListGroupItem('Average VWAP (1 Month)'),
-                                dbc.ListGroupItem(frame.VWAP.mean().round(2), style={'fontSize':ticker_card_font_size, 'color':ticker_card_font_col}, color=card_bg_color)
-                            ])
-                        ], style={'textAlign':'center'})
-                    ], width=4)
-                ], id='graph-row', style={'columnCount':2})
-            ])
-
-
-
-            return row1, row2
-
-# 3 MONTHS________________________________________________________________________________________________________________
-        if '3month' in changed_id:
-            end = datetime.date.today()
-            diff = relativedelta(months=3)
-            start = end - diff
-            frame = nse.get_history(value, start, end)
-            frame['SMA_10'] = frame['Close'].rolling(10,min_periods=1).mean()
-            frame['SMA_20'] = frame['Close'].rolling(20, min_periods=1).mean()
-            frame['SMA_50'] = frame['Close'].rolling(50, min_periods=1).mean()
-
-            # Cards____________________
-            card1 = dbc.Card([
-                dbc.CardHeader('Ticker'),
-                dbc.CardBody(value, style={'fontSize':ticker_card_font_size, 'color':ticker_card_font_col})
-            ], id='ticker', style={'textAlign':'center','height':130}, color=card_bg_color)
-
-            card2 = dbc.Card([
-                dbc.CardHeader('Industry'),
-                dbc.CardBody(zipped_ind.loc[zipped_ind[0]==value, 1], style={'fontSize':ind_card_font_size, 'color':ind_card_font_col})
-            ], id='industry', style={'textAlign':'center', 'height':130}, color=card_bg_color)
-
-            card3 = dbc.Card([
-                dbc.CardHeader('3 Month High'),
-                dbc.CardBody(frame['High'].max(), style={'fontSize':high_card_font_size, 'color':high_card_font_col})
-            ], id='time-max', style={'textAlign':'center', 'height':130}, color=card_bg_color)
-
-            card4 = dbc.Card([
-                dbc.CardHeader('3 Month Low'),
-                dbc.CardBody(frame['Low'].min(), style={'fontSize':low_card_font_size, 'color':low_card_font_col})
-            ], id='time-min', style={'textAlign':'center', 'height':130}, color=card_bg_color)
-
-            row1 = dbc.Container([
-                dbc.Row(children=[
-                    dbc.Col([
-                        card1,
-                    ], width=3),
-                    dbc.Col([
-                        card2,
-                    ], width=3),
-                    dbc.Col([
-                        card3,
-                    ], width=3),
-                    dbc.Col([
-                        card4
-                    ], width=3)
-                ], id='card-row')])
-
-            # Graph__________________________________________
-            fig = go.Figure(data=[go.Candlestick(
-                x=frame.index,
-                open=frame.Open,
-                high=frame.High,
-                low=frame.Low,
-                close=frame.Close,
-                showlegend=False
-            )])
-            fig.update_xaxes(showgrid=False, linecolor=linecolor)
-            fig.update_yaxes(showgrid=False, linecolor=linecolor)
-            fig.update_layout({'plot_bgcolor': plot_bgcolor, 'paper_bgcolor': paper_bgcolor},
-                              xaxis_rangeslider_visible=False, yaxis=dict(color=linecolor),
-                              xaxis=dict(color=linecolor), legend_title_text='Select Moving Average',
-                              legend=dict(title_font_family='Times New Roman', font=dict(size=12, color='white'), bordercolor='white', borderwidth=2))
-            fig.add_trace(go.Scatter(x=frame.index, y=frame['SMA_10'], name='10 SMA', line=dict(color='#a5f2f1'), visible='legendonly'))
-            fig.add_trace(go.Scatter(x=frame.index, y=frame['SMA_20'], name='20 SMA', line=dict(color='#f0ee8d'), visible='legendonly'))
-            fig.add_trace(go.Scatter(x=frame.index, y=frame['SMA_50'], name='50 SMA', line=dict(color='#f5a887'), visible='legendonly'))
-
-            ending = datetime.date.today()
-            difference = relativedelta(weeks=52)
-            starting = ending - difference
-            new = nse.get_history(value, starting, ending)
-
-            row2 = dbc.Container([
-                dbc.Row([
-                    dbc.Col([
-                        dcc.Graph(id='chart', figure=fig),
-                    ], width=8),
-                    dbc.Col([
-                        dbc.Card([
-                            dbc.ListGroup([
-                                dbc.ListGroupItem('52 Week High'),
-                                dbc.ListGroupItem(new.High.max(), style={'fontSize': ticker_card_font_size,
-                                                                         'color': high_card_font_col}, color=card_bg_color),
-                                dbc.ListGroupItem('52 Week Low'),
-                                dbc.ListGroupItem(new.Low.min(), style={'fontSize': ticker_card_font_size,
-                                                                        'color': low_card_font_col}, color=card_bg_color),
-                                dbc.ListGroupItem('Average Volume (3 Months)'),
-                                dbc.ListGroupItem(frame.Volume.mean().round(2),
-                                                  style={'fontSize': ticker_card_font_size,
-                                                         'color': ind_card_font_col}, color=card_bg_color),
-                                dbc.ListGroupItem('Average VWAP (3 Months)'),
-                                dbc.ListGroupItem(frame.VWAP.mean().round(2), style={'fontSize': ticker_card_font_size,
-                                                                                     'color': ticker_card_font_col}, color=card_bg_color)
-                            ])
-                        ], style=dict(textAlign='center'))
-                    ], width=4)
-                ], id='graph-row', style={'columnCount':2})
-            ])
-            return row1, row2
-
-# 6 MONTHS________________________________________________________________________________________________________________
-        if '6month' in changed_id:
-            end = datetime.date.today()
-            diff = relativedelta(months=6)
-            start = end - diff
-            frame = nse.get_history(value, start, end)
-            frame['SMA_10'] = frame.Close.rolling(10, min_periods=1).mean()
-            frame['SMA_20'] = frame.Close.rolling(20, min_periods=1).mean()
-            frame['SMA_50'] = frame.Close.rolling(50, min_periods=1).mean()
-            frame['SMA_100'] = frame.Close.rolling(100, min_periods=1).mean()
-
-            # Cards____________________
-            card1 = dbc.Card([
-                dbc.CardHeader('Ticker'),
-                dbc.CardBody(value, style={'fontSize':ticker_card_font_size, 'color':ticker_card_font_col})
-            ], id='ticker', style={'textAlign':'center','height':130}, color=card_bg_color)
-
-            card2 = dbc.Card([
-                dbc.CardHeader('Industry'),
-                dbc.CardBody(zipped_ind.loc[zipped_ind[0]==value, 1], style={'fontSize':ind_card_font_size, 'color':ind_card_font_col})
-            ], id='industry', style={'textAlign':'center', 'height':130}, color=card_bg_color)
-
-            card3 = dbc.Card([
-                dbc.CardHeader('6 Month High'),
-                dbc.CardBody(frame['High'].max(), style={'fontSize':high_card_font_size, 'color':high_card_font_col})
-            ], id='time-max', style={'textAlign':'center', 'height':130}, color=card_bg_color)
-
-            card4 = dbc.Card([
-                dbc.CardHeader('6 Month Low'),
-                dbc.CardBody(frame['Low'].min(), style={'fontSize':low_card_font_size, 'color':low_card_font_col})
-            ], id='time-min', style={'textAlign':'center', 'height':130}, color=card_bg_color)
-
-            row1 = dbc.Container([
-                dbc.Row(children=[
-                    dbc.Col([
-                        card1,
-                    ], width=3),
-                    dbc.Col([
-                        card2,
-                    ], width=3),
-                    dbc.Col([
-                        card3,
-                    ], width=3),
-                    dbc.Col([
-                        card4
-                    ], width=3)
-                ], id='card-row')])
-
-            # Graph__________________________________________
-            fig = go.Figure(data=[go.Candlestick(
-                x=frame.index,
-                open=frame.Open,
-                high=frame.High,
-                low=frame.Low,
-                close=frame.Close,
-                showlegend=False
-            )])
-            fig.update_xaxes(showgrid=False, linecolor=linecolor)
-            fig.update_yaxes(showgrid=False, linecolor=linecolor)
-            fig.update_layout({'plot_bgcolor': plot_bgcolor, 'paper_bgcolor': paper_bgcolor},
-                              xaxis_rangeslider_visible=False, yaxis=dict(color=linecolor),
-                              xaxis=dict(color=linecolor),legend_title_text='Select Moving Average',
-                              legend=dict(title_font_family='Times New Roman', font=dict(size=12, color='white'), bordercolor='white', borderwidth=2))
-            fig.add_trace(go.Scatter(x=frame.index, y=frame['SMA_10'], name='10 SMA', line=dict(color='#a5f2f1'), visible='legendonly'))
-            fig.add_trace(go.Scatter(x=frame.index, y=frame['SMA_20'], name='20 SMA', line=dict(color='#f0ee8d'), visible='legendonly'))
-            fig.add_trace(go.Scatter(x=frame.index, y=frame['SMA_50'], name='50 SMA', line=dict(color='#f5a887'), visible='legendonly'))
-            fig.add_trace(go.Scatter(x=frame.index, y=frame['SMA_100'], name='100 SMA', line=dict(color='#78e874'), visible='legendonly'))
-
-            ending = datetime.date.today()
-            difference = relativedelta(weeks=52)
-            starting = ending - difference
-            new = nse.get_history(value, starting, ending)
-
-            row2 = dbc.Container([
-                dbc.Row([
-                    dbc.Col([
-                        dcc.Graph(id='chart', figure=fig),
-                    ], width=8),
-                    dbc.Col([
-                        dbc.Card([
-                            dbc.ListGroup([
-                                dbc.ListGroupItem('52 Week High'),
-                                dbc.ListGroupItem(new.High.max(), style={'fontSize': ticker_card_font_size,
-                                                                         'color': high_card_font_col}, color=card_bg_color),
-                                dbc.ListGroupItem('52 Week Low'),
-                                dbc.ListGroupItem(new.Low.min(), style={'fontSize': ticker_card_font_size,
-                                                                        'color': low_card_font_col}, color=card_bg_color),
-                                dbc.ListGroupItem('Average Volume (6 Months)'),
-                                dbc.ListGroupItem(frame.Volume.mean().round(2),
-                                                  style={'fontSize': ticker_card_font_size,
-                                                         'color': ind_card_font_col}, color=card_bg_color),
-                                dbc.ListGroupItem('Average VWAP (6 Months)'),
-                                dbc.ListGroupItem(frame.VWAP.mean().round(2), style={'fontSize': ticker_card_font_size,
-                                                                                     'color': ticker_card_font_col}, color=card_bg_color)
-                            ])
-                        ], style={'textAlign':'center'})
-                    ], width=4)
-                ], id='graph-row', style={'columnCount':2})
-            ])
-            return row1, row2
-
-# 1 YEAR________________________________________________________________________________________________________________
-        if '1year' in changed_id:
-            end = datetime.date.today()
-            diff = relativedelta(years=1)
-            start = end - diff
-            frame = nse.get_history(value, start, end)
-            frame['SMA_10'] = frame.Close.rolling(10, min_periods=1).mean()
-            frame['SMA_20'] = frame.Close.rolling(20, min_periods=1).mean()
-            frame['SMA_50'] = frame.Close.rolling(50, min_periods=1).mean()
-            frame['SMA_100'] = frame.Close.rolling(100, min_periods=1).mean()
-
-            # Cards____________________
-            card1 = dbc.Card([
-                dbc.CardHeader('Ticker'),
-                dbc.CardBody(value, style={'fontSize':ticker_card_font_size, 'color':ticker_card_font_col})
-            ], id='ticker', style={'textAlign':'center','height':130}, color=card_bg_color)
-
-            card2 = dbc.Card([
-                dbc.CardHeader('Industry'),
-                dbc.CardBody(zipped_ind.loc[zipped_ind[0]==value, 1], style={'fontSize':ind_card_font_size, 'color':ind_card_font_col})
-            ], id='industry', style={'textAlign':'center', 'height':130}, color=card_bg_color)
-
-            card3 = dbc.Card([
-                dbc.CardHeader('1 Year High'),
-                dbc.CardBody(frame['High'].max(), style={'fontSize':high_card_font_size, 'color':high_card_font_col})
-            ], id='time-max', style={'textAlign':'center', 'height':130}, color=card_bg_color)
-
-            card4 = dbc.Card([
-                dbc.CardHeader('1 Year Low'),
-                dbc.CardBody(frame['Low'].min(), style={'fontSize':low_card_font_size, 'color':low_card_font_col})
-            ], id='time-min', style={'textAlign':'center', 'height':130}, color=card_bg_color)
-
-            row1 = dbc.Container([
-                dbc.Row(children=[
-                    dbc.Col([
-                        card1,
-                    ], width=3),
-                    dbc.Col([
-                        card2,
-                    ], width=3),
-                    dbc.Col([
-                        card3,
-                    ], width=3),
-                    dbc.Col([
-                        card4
-                    ], width=3)
-                ], id='card-row')])
-
-            # Graph__________________________________________
-            fig = go.Figure(data=[go.Candlestick(
-                x=frame.index,
-                open=frame.Open,
-                high=frame.High,
-                low=frame.Low,
-                close=frame.Close,
-                showlegend=False
-            )])
-            fig.update_xaxes(showgrid=False, linecolor=linecolor)
-            fig.update_yaxes(showgrid=False, linecolor=linecolor)
-            fig.update_layout({'plot_bgcolor': plot_bgcolor, 'paper_bgcolor': paper_bgcolor},
-                              xaxis_rangeslider_visible=False, yaxis=dict(color=linecolor),
-                              xaxis=dict(color=linecolor), legend_title_text='Select Moving Average',
-                              legend=dict(title_font_family='Times New Roman', font=dict(size=12, color='white'), bordercolor='white', borderwidth=2))
-            fig.add_trace(go.Scatter(x=frame.index, y=frame['SMA_10'], name='10 SMA', line=dict(color='#a5f2f1'), visible='legendonly'))
-            fig.add_trace(go.Scatter(x=frame.index, y=frame['SMA_20'], name='20 SMA', line=dict(color='#f0ee8d'), visible='legendonly'))
-            fig.add_trace(go.Scatter(x=frame.index, y=frame['SMA_50'], name='50 SMA', line=dict(color='#f5a887'), visible='legendonly'))
-            fig.add_trace(go.Scatter(x=frame.index, y=frame['SMA_100'], name='100 SMA', line=dict(color='#78e874'), visible='legendonly'))
-
-            ending = datetime.date.today()
-            difference = relativedelta(weeks=52)
-            starting = ending - difference
-            new = nse.get_history(value, starting, ending)
-
-            row2 = dbc.Container([
-                dbc.Row([
-                    dbc.Col([
-                        dcc.Graph(id='chart', figure=fig),
-                    ], width=8),
-                    dbc.Col([
-                        dbc.Card([
-                            dbc.ListGroup([
-                                dbc.ListGroupItem('52 Week High'),
-                                dbc.ListGroupItem(new.High.max(), style={'fontSize': ticker_card_font_size,
-                                                                         'color': high_card_font_col}, color=card_bg_color),
-                                dbc.ListGroupItem('52 Week Low'),
-                                dbc.ListGroupItem(new.Low.min(), style={'fontSize': ticker_card_font_size,
-                                                                        'color': low_card_font_col}, color=card_bg_color),
-                                dbc.ListGroupItem('Average Volume (1 Year)'),
-                                dbc.ListGroupItem(frame.Volume.mean().round(2),
-                                                  style={'fontSize': ticker_card_font_size,
-                                                         'color': ind_card_font_col}, color=card_bg_color),
-                                dbc.ListGroupItem('Average VWAP (1 Year)'),
-                                dbc.ListGroupItem(frame.VWAP.mean().round(2), style={'fontSize': ticker_card_font_size,
-                                                                                     'color': ticker_card_font_col}, color=card_bg_color)
-                            ])
-                        ], style={'textAlign':'center'})
-                    ], width=4)
-                ], id='graph-row', style={'columnCount':2})
-            ])
-            return row1, row2
+    trigger = changed_id.split('.')[0]
+    if trigger == 'page-poll':
+        if not request:
+            raise PreventUpdate
+        value, timeframe = request['symbol'], request['timeframe']
+    elif trigger == 'custom-range':
+        if not start_date or not end_date:
+            raise PreventUpdate
+        timeframe = custom_window(datetime.date.fromisoformat(start_date[:10]),
+                                  datetime.date.fromisoformat(end_date[:10]))
+    else:
+        timeframe = trigger
+    if not value or (timeframe not in TIMEFRAMES and RANGE_SEPARATOR not in timeframe):
+        raise PreventUpdate
+
+    # Computed page values are shared between users until the next market close.
+    key = (value, timeframe, last_closed_session())
+    model = page_cache.get(key)
+    if model is None and not store.needs_fetch(value, *plan_range(timeframe)):
+        # Bars already stored: building is a few ms of CPU, do it in the request.
+        model = page_cache.put(key, page_model(value, timeframe))
+    if model is None:
+        # Upstream fetch needed. Duplicate clicks (and polls) for the same view join one background build.
+        future = page_jobs.run(key, lambda: page_cache.put(key, page_model(value, timeframe)),
+                               wait_for=PAGE_WAIT)
+        if not future.done():
+            loading = [dbc.Spinner(size='sm'), ' Loading %s (%s)' % (value, timeframe_info(timeframe)['span'])]
+            return [dash.no_update] * 15 + [loading, {'symbol': value, 'timeframe': timeframe}, False]
+        if future.exception() is not None:
+            error = dbc.Alert('Could not load %s: %s' % (value, future.exception()), color='danger')
+            return [dash.no_update] * 15 + [error, None, True]
+        model = future.result()
+    if model['candles'] is None:
+        notice = dbc.Alert('No trading days in %s' % timeframe_info(timeframe)['span'], color='warning')
+        return [dash.no_update] * 15 + [notice, None, True]
+    return render_page(model, state) + [None, None, True]
+
+
+def background_result(key, build, label, hold=False):
+    """Run ``build`` as a page job, waiting at most PAGE_WAIT: (result, status, keep polling).
+
+    While the job runs, ``status`` is a spinner and the caller should poll;
+    if it failed, an alert (reported once, the next call retries). ``hold``
+    is for builds that don't cache their result; see JobQueue.
+    """
+    future = page_jobs.run(key, build, wait_for=PAGE_WAIT, hold=hold)
+    if not future.done():
+        return None, [dbc.Spinner(size='sm'), ' %s' % label], True
+    if future.exception() is not None:
+        return None, dbc.Alert('%s failed: %s' % (label, future.exception()), color='danger'), False
+    return future.result(), None, False
+
+
+def window_smas(plan, timeframe, windows):
+    # SMAs come from the symbol's incremental engine, which only processes bars it
+    # has not seen; the sliced result is shared with the other workers for the session.
+    key = ('sma', plan.symbol, timeframe, windows, last_closed_session())
+
+    def compute():
+        overlays = indicator_book.for_symbol(plan.symbol, plan.history)
+        overlays = overlays.reindex(plan.window(timeframe).index)
+        return {n: overlays['SMA_%d' % n] for n in windows}
+
+    return shared_cache.get_or_compute(key, compute, ttl=seconds_to_close())
+
+
+def chart_view(frame, sma):
+    # Multi-year windows are drawn as weekly/monthly candles with LTTB-thinned
+    # overlays, so the figure stays within CHART_POINT_BUDGET points.
+    rule = choose_rule(len(frame))
+    if rule == 'D':
+        return rule, frame[['Open', 'High', 'Low', 'Close']], sma
+    candles = resample_ohlcv(frame[['Open', 'High', 'Low', 'Close', 'Volume', 'VWAP']], rule)
+    return rule, candles[['Open', 'High', 'Low', 'Close']], {n: lttb_series(line) for n, line in sma.items()}
+
+
+def page_model(value, timeframe):
+    # One superset fetch per symbol; the window and the 52-week range are slices of it.
+    with timed('plan'):
+        plan = load_plan(store, value, window=timeframe)
+    frame = plan.window(timeframe)
+    if frame.empty:
+        # A custom range of holidays, or one before the listing: nothing to draw.
+        return {'symbol': value, 'timeframe': timeframe, 'candles': None}
+    new = plan.window('52week')
+    with timed('indicators'):
+        sma = window_smas(plan, timeframe, SMA_WINDOWS)
+    with timed('downsample'):
+        rule, candles, sma = chart_view(frame, sma)
+    return {
+        'symbol': value,
+        'timeframe': timeframe,
+        'industry': registry.industry_of(value),
+        'high': frame['High'].max(),
+        'low': frame['Low'].min(),
+        'high_52w': new.High.max(),
+        'low_52w': new.Low.min(),
+        'avg_volume': frame.Volume.mean().round(2),
+        'avg_vwap': frame.VWAP.mean().round(2),
+        'rule': rule,
+        'candles': candles,
+        'sma': sma,
+    }
+
+
+def x_range(candles):
+    if candles.empty:
+        return None
+    half_day = pd.Timedelta(hours=12)
+    return [candles.index[0] - half_day, candles.index[-1] + half_day]
+
+
+def y_range(model):
+    if model['candles'].empty:
+        return None
+    pad = (model['high'] - model['low']) * 0.05
+    return [model['low'] - pad, model['high'] + pad]
+
+
+def timeframe_info(timeframe):
+    """TIMEFRAMES entry for ``timeframe``; a custom range gets one built from its dates."""
+    if timeframe in TIMEFRAMES:
+        return TIMEFRAMES[timeframe]
+    start, end = window_bounds(timeframe, datetime.date.today())
+    label = '%s - %s' % (start.strftime('%d %b %Y'), end.strftime('%d %b %Y'))
+    sessions = len(pd.bdate_range(start, end))
+    return {'button': None, 'label': label, 'span': label, 'smas': tuple(n for n in SMA_WINDOWS if n < sessions)}
+
+
+def sma_visibility(timeframe, n):
+    return 'legendonly' if n in timeframe_info(timeframe)['smas'] else False
+
+
+def build_figure(model):
+    candles = model['candles']
+    x = epoch_ms(candles.index)
+    fig = go.Figure(data=[go.Candlestick(
+        x=x,
+        open=typed_array(candles.Open),
+        high=typed_array(candles.High),
+        low=typed_array(candles.Low),
+        close=typed_array(candles.Close)
+    )])
+    for n in SMA_WINDOWS:
+        line = model['sma'][n]
+        fig.add_trace(go.Scatter(x=epoch_ms(line.index), y=typed_array(line), name='%d SMA' % n,
+                                 line=dict(color=SMA_COLORS[n]), visible=sma_visibility(model['timeframe'], n)))
+    fig.update_xaxes(showgrid=False, linecolor=linecolor)
+    fig.update_yaxes(showgrid=False, linecolor=linecolor)
+    fig.update_layout({'plot_bgcolor':plot_bgcolor, 'paper_bgcolor':paper_bgcolor},
+                      xaxis_rangeslider_visible=False, yaxis=dict(color=linecolor, range=y_range(model)),
+                      xaxis=dict(color=linecolor, type='date', range=x_range(candles)))
+    return fig
+
+
+def patch_figure(model, state):
+    """Patch for a chart already showing this symbol's bars from ``loaded_from`` to ``loaded_to``.
+
+    A window inside the dates the browser already has, at the same candle
+    resolution, is just a new axis range over them; only one reaching past
+    them, or a change of resolution, sends bars.
+    """
+    candles = model['candles']
+    patch = Patch()
+    loaded_from, loaded_to = state['loaded_from'], state.get('loaded_to', '')
+    resampled = model['rule'] != state.get('rule', 'D')
+    if not candles.empty and (resampled or str(candles.index[0].date()) < loaded_from
+                              or str(candles.index[-1].date()) > loaded_to):
+        patch['data'][0]['x'] = epoch_ms(candles.index)
+        for column in ('open', 'high', 'low', 'close'):
+            patch['data'][0][column] = typed_array(candles[column.capitalize()])
+        for i, n in enumerate(SMA_WINDOWS, start=1):
+            line = model['sma'][n]
+            patch['data'][i]['x'] = epoch_ms(line.index)
+            patch['data'][i]['y'] = typed_array(line)
+        loaded_from, loaded_to = str(candles.index[0].date()), str(candles.index[-1].date())
+    for i, n in enumerate(SMA_WINDOWS, start=1):
+        visible = sma_visibility(model['timeframe'], n)
+        if visible != sma_visibility(state['timeframe'], n):
+            patch['data'][i]['visible'] = visible
+    patch['layout']['xaxis']['range'] = x_range(candles)
+    patch['layout']['yaxis']['range'] = y_range(model)
+    return patch, loaded_from, loaded_to
+
+
+def render_page(model, state):
+    """Callback outputs for ``model``, leaving unchanged outputs untouched."""
+    tf = timeframe_info(model['timeframe'])
+    same_symbol = bool(state) and state.get('symbol') == model['symbol']
+    with timed('figure'):
+        if same_symbol:
+            figure, loaded_from, loaded_to = patch_figure(model, state)
+        else:
+            figure = build_figure(model)
+            candles = model['candles']
+            loaded_from = str(candles.index[0].date()) if not candles.empty else ''
+            loaded_to = str(candles.index[-1].date()) if not candles.empty else ''
+
+    def per_symbol(output):
+        return dash.no_update if same_symbol else output
+
+    return [
+        per_symbol(False),
+        per_symbol(model['symbol']),
+        per_symbol(model['industry']),
+        '%s High' % tf['label'],
+        model['high'],
+        '%s Low' % tf['label'],
+        model['low'],
+        figure,
+        per_symbol(model['high_52w']),
+        per_symbol(model['low_52w']),
+        'Average Volume (%s)' % tf['span'],
+        model['avg_volume'],
+        'Average VWAP (%s)' % tf['span'],
+        model['avg_vwap'],
+        {'symbol': model['symbol'], 'timeframe': model['timeframe'], 'rule': model['rule'],
+         'loaded_from': loaded_from, 'loaded_to': loaded_to},
+    ]
+
+
+@app.callback(
+    [Output('live-chart', 'figure'),
+     Output('live-chart', 'extendData'),
+     Output('live-cursor', 'data'),
+     Output('live-tick', 'disabled'),
+     Output('live-row', 'hidden')],
+    [Input('live-mode', 'value'),
+     Input('stock-search', 'value'),
+     Input('live-interval', 'value'),
+     Input('live-tick', 'n_intervals')],
+    [State('live-cursor', 'data')]
+)
+def update_live(on, value, interval, n_intervals, cursor):
+    if not on or not value or live_feed is None:
+        return [dash.no_update, dash.no_update, None, True, True]
+    changed_id = [p['prop_id'] for p in dash.callback_context.triggered][0]
+    current_view = bool(cursor) and cursor['symbol'] == value and cursor['interval'] == interval
+    if not changed_id.startswith('live-tick') or not current_view:
+        position, closed, forming = live_candles.since(value, interval)
+        return [live_figure(closed, forming), dash.no_update,
+                {'symbol': value, 'interval': interval, 'cursor': position}, False, False]
+
+    # Closed candles are appended to trace 0; trace 1 holds only the forming candle. The cursor
+    # is the start of the newest closed candle sent, so any worker's feed can answer the next poll.
+    position, closed, forming = live_candles.since(value, interval, cursor['cursor'])
+    if not closed['x'] and forming is None:
+        raise PreventUpdate
+    fields = ('x', 'open', 'high', 'low', 'close')
+    update = {f: [closed[f], [forming[f]] if forming else []] for f in fields}
+    max_points = {f: [live_candles.capacity, 1] for f in fields}
+    return [dash.no_update, [update, [0, 1], max_points],
+            {'symbol': value, 'interval': interval, 'cursor': position}, dash.no_update, dash.no_update]
+
+
+def live_figure(closed, forming):
+    # Plain lists, not typed arrays: extendData can only extend arrays of the same kind.
+    last = {f: [forming[f]] if forming else [] for f in ('x', 'open', 'high', 'low', 'close')}
+    fig = go.Figure(data=[
+        go.Candlestick(x=closed['x'], open=closed['open'], high=closed['high'], low=closed['low'],
+                       close=closed['close'], name='Closed'),
+        go.Candlestick(x=last['x'], open=last['open'], high=last['high'], low=last['low'],
+                       close=last['close'], name='Forming', opacity=0.6)
+    ])
+    fig.update_xaxes(showgrid=False, linecolor=linecolor)
+    fig.update_yaxes(showgrid=False, linecolor=linecolor)
+    fig.update_layout({'plot_bgcolor':plot_bgcolor, 'paper_bgcolor':paper_bgcolor},
+                      xaxis_rangeslider_visible=False, showlegend=False, uirevision='live',
+                      yaxis=dict(color=linecolor), xaxis=dict(color=linecolor, type='date'))
+    return fig
+
+
+@app.callback(
+    [Output('backtest-row', 'children'),
+     Output('backtest-poll', 'disabled')],
+    [Input('backtest-strategy', 'value'),
+     Input('stock-search', 'value'),
+     Input('backtest-window', 'value'),
+     Input('backtest-poll', 'n_intervals')]
+)
+def update_backtest(preset, value, window, n_intervals):
+    if not preset or not value:
+        return [], True
+    strategy, params = PRESETS[preset]
+    end = last_closed_session()
+    key = ('backtest', value, preset, window, end)
+
+    def build():
+        with timed('backtest'):
+            plan = load_plan(store, value, end=end, window=window)
+            result = run_backtest(plan.window(window), strategy, params, symbol=value)
+        return page_cache.put(key, {'equity': result.frame(), 'stats': result.stats})
+
+    result = page_cache.get(key)
+    if result is None and not store.needs_fetch(value, *plan_range(window, end)):
+        # Bars already stored: as in update_page, build in the request.
+        result = build()
+    if result is None:
+        # A multi-decade window on a cold symbol waits on nsepy in a page job instead.
+        result, status, polling = background_result(key, build, 'Loading %s (%s)' % (value, TIMEFRAMES[window]['span']))
+        if result is None:
+            return status, not polling
+
+    equity = result['equity']
+    colors = {'Strategy': ticker_card_font_col, 'Buy & Hold': linecolor}
+    fig = go.Figure()
+    for name in equity.columns:
+        line = lttb_series(equity[name])
+        fig.add_trace(go.Scatter(x=epoch_ms(line.index), y=typed_array(line), name=name,
+                                 line=dict(color=colors[name])))
+    fig.update_xaxes(showgrid=False, linecolor=linecolor)
+    fig.update_yaxes(showgrid=False, linecolor=linecolor)
+    fig.update_layout({'plot_bgcolor':plot_bgcolor, 'paper_bgcolor':paper_bgcolor},
+                      yaxis=dict(color=linecolor, title='Equity (start = 100)'),
+                      xaxis=dict(color=linecolor, type='date'))
+
+    stats = pd.DataFrame({'Statistic': list(result['stats']),
+                          'Value': [round(float(v), 2) for v in result['stats'].values()]})
+    return dbc.Container([
+        dbc.Row([
+            dbc.Col([
+                dcc.Graph(id='backtest-chart', figure=fig),
+            ], width=8),
+            dbc.Col([
+                dbc.Table.from_dataframe(stats, color='dark', bordered=False, size='sm')
+            ], width=4)
+        ])
+    ]), True
+
+
+@app.callback(
+    [Output('compare-row', 'children'),
+     Output('compare-poll', 'disabled')],
+    [Input('compare-search', 'value'),
+     Input('compare-window', 'value'),
+     Input('compare-poll', 'n_intervals')]
+)
+def update_compare(symbols, window, n_intervals):
+    if not symbols or len(symbols) < 2:
+        return [], True
+    shown = sorted(symbols[:MAX_SYMBOLS])
+    end = last_closed_session()
+    key = ('compare', tuple(shown), window, end)
+    comparison = page_cache.get(key)
+    if comparison is None:
+        # One concurrent fetch for the whole set in the background, shared between users
+        # for the session. A set with failed symbols is shown once, not cached, so the next view retries.
+        def build():
+            comparison = Comparison.load(store, shown, window_start(window, end), end)
+            return comparison if comparison.failures else page_cache.put(key, comparison)
+
+        comparison, status, polling = background_result(key, build, 'Loading %s' % ', '.join(shown), hold=True)
+        if comparison is None:
+            return status, not polling
+
+    x = epoch_ms(comparison.dates)
+    fig = go.Figure(data=[go.Scatter(x=x, y=typed_array(line), name=symbol)
+                          for symbol, line in zip(comparison.symbols, comparison.rebased())])
+    fig.update_xaxes(showgrid=False, linecolor=linecolor)
+    fig.update_yaxes(showgrid=False, linecolor=linecolor)
+    fig.update_layout({'plot_bgcolor':plot_bgcolor, 'paper_bgcolor':paper_bgcolor},
+                      yaxis=dict(color=linecolor, title='Rebased to 100'),
+                      xaxis=dict(color=linecolor, type='date'))
+
+    corr = comparison.correlation()
+    heatmap = go.Figure(data=[go.Heatmap(z=corr.values, x=corr.columns, y=corr.index, zmin=-1, zmax=1,
+                                         colorscale='RdYlGn', texttemplate='%{z:.2f}')])
+    heatmap.update_layout({'plot_bgcolor':plot_bgcolor, 'paper_bgcolor':paper_bgcolor},
+                          yaxis=dict(color=linecolor, autorange='reversed'), xaxis=dict(color=linecolor))
+
+    summary = comparison.summary()
+    notice = []
+    if len(symbols) > MAX_SYMBOLS:
+        notice = [dbc.Alert('Showing the first %d of %d symbols.' % (MAX_SYMBOLS, len(symbols)), color='warning')]
+    if comparison.failures:
+        notice.append(dbc.Alert('Could not load %s: %s' % (', '.join(sorted(comparison.failures)),
+                                                           next(iter(comparison.failures.values()))),
+                                color='warning'))
+    if not comparison.symbols:
+        return notice, True
+    return dbc.Container(notice + [
+        dbc.Row([
+            dbc.Col([
+                dcc.Graph(id='compare-chart', figure=fig),
+            ], width=8),
+            dbc.Col([
+                dcc.Graph(id='compare-correlation', figure=heatmap),
+            ], width=4)
+        ]),
+        dbc.Row([
+            dbc.Col([
+                dbc.Table.from_dataframe(summary.reset_index(), color='dark', bordered=False, size='sm')
+            ], width=12)
+        ])
+    ]), True
 
 
+@app.callback(
+    Output('screener-query', 'value'),
+    [Input('screener-preset', 'value')]
+)
+def pick_screen(query):
+    if not query:
+        raise PreventUpdate
+    return query
 
 
+@app.callback(
+    [Output('screener-row', 'children'),
+     Output('screener-poll', 'disabled')],
+    [Input('screener-query', 'value'),
+     Input('screener-sort', 'value'),
+     Input('screener-poll', 'n_intervals')]
+)
+def update_screener(query, sort, n_intervals):
+    if not query:
+        return [], True
+    try:
+        conditions = parse_query(query)
+    except ValueError as err:
+        return dbc.Alert(str(err), color='danger'), True
+    end = last_closed_session()
+    table, status, polling = screener.table, None, False
+    if screener.needs_refresh(end):
+        # The last session's table answers queries, under the build's status, while the next one is built.
+        table, status, polling = background_result(
+            ('screener', end), lambda: screener.refresh(end),
+            'Building the factor table for %d symbols' % len(screener.industries))
+        table = table or screener.table
+        if table is None:
+            return status, not polling
+    rows = table.query(conditions, sort=sort)
+    result = table.frame(rows[:SCREENER_LIMIT]).round(2).reset_index()
+    caption = '%d of %d symbols match, as of %s' % (len(rows), len(table), table.date.date())
+    return dbc.Container([
+        html.Div(status),
+        html.P(caption),
+        dbc.Table.from_dataframe(result, color='dark', bordered=False, hover=True, size='sm')
+    ]), not polling
+
+
+@app.callback(
+    [Output('industry-row', 'children'),
+     Output('industry-poll', 'disabled')],
+    [Input('industry-search', 'value'),
+     Input('industry-weighting', 'value'),
+     Input('industry-poll', 'n_intervals')]
+)
+def update_industry(industry, kind, n_intervals):
+    if not industry:
+        return [], True
+    end = last_closed_session()
+    aggregates, status, polling = industry_board.aggregates, None, False
+    if industry_board.needs_refresh(end):
+        # The last session's aggregates are shown, under the build's status, while the next one is folded in.
+        aggregates, status, polling = background_result(
+            ('industry', end), lambda: industry_board.refresh(end),
+            'Building sector indices for %d symbols' % len(industry_board.industries))
+        aggregates = aggregates or industry_board.aggregates
+        if aggregates is None:
+            return status, not polling
+    index = aggregates.index_series(industry, kind)
+    extremes = aggregates.extremes(industry, kind)
+    returns = aggregates.constituent_returns(industry)
+
+    fig = go.Figure(data=[go.Scatter(x=index.index, y=index.values, name=industry,
+                                     line=dict(color=ind_card_font_col))])
+    fig.update_xaxes(showgrid=False, linecolor=linecolor)
+    fig.update_yaxes(showgrid=False, linecolor=linecolor)
+    fig.update_layout({'plot_bgcolor':plot_bgcolor, 'paper_bgcolor':paper_bgcolor},
+                      yaxis=dict(color=linecolor), xaxis=dict(color=linecolor))
+
+    heatmap = go.Figure(data=[go.Heatmap(z=returns.T.values, x=returns.index, y=returns.columns,
+                                         colorscale='RdYlGn', zmid=0, colorbar=dict(title='%'))])
+    heatmap.update_layout({'plot_bgcolor':plot_bgcolor, 'paper_bgcolor':paper_bgcolor},
+                          yaxis=dict(color=linecolor), xaxis=dict(color=linecolor))
+
+    return dbc.Container([
+        html.Div(status),
+        dbc.Row([
+            dbc.Col([
+                dcc.Graph(id='industry-chart', figure=fig),
+            ], width=8),
+            dbc.Col([
+                dbc.Card([
+                    dbc.ListGroup([
+                        dbc.ListGroupItem('Index 52 Week High'),
+                        dbc.ListGroupItem(round(extremes['high'], 2), style={'fontSize': ticker_card_font_size, 'color':high_card_font_col}, color=card_bg_color),
+                        dbc.ListGroupItem('Index 52 Week Low'),
+                        dbc.ListGroupItem(round(extremes['low'], 2), style={'fontSize': ticker_card_font_size, 'color':low_card_font_col}, color=card_bg_color),
+                        dbc.ListGroupItem('At 52 Week High / Low'),
+                        dbc.ListGroupItem('%d / %d of %d' % (extremes['at_high'], extremes['at_low'], extremes['constituents']),
+                                          style={'fontSize': ticker_card_font_size, 'color':ind_card_font_col}, color=card_bg_color)
+                    ])
+                ], style={'textAlign':'center'})
+            ], width=4)
+        ]),
+        dbc.Row([
+            dbc.Col([
+                dcc.Graph(id='industry-heatmap', figure=heatmap)
+            ], width=12)
+        ])
+    ]), not polling
+
+
+def start_background():
+    """Start this process's threads: the store prefetcher (if enabled) and the live tick replay."""
+    if os.environ.get('STOCKVIEW_PREFETCH') == '1':
+        prefetcher.start()
+    if live_feed is not None:
+        live_feed.start()
+
+
+def preload():
+    """One-off work every worker would otherwise repeat, done before gunicorn forks them.
+
+    With preload_app (see gunicorn.conf.py) the master imports this module
+    with STOCKVIEW_PRELOAD=1; workers inherit the registry, the layout,
+    nsepy and plotly's trace validators (~100 ms on the first figure)
+    copy-on-write, and start their own threads from post_fork.
+    """
+    import nsepy  # noqa: F401
+    figure = go.Figure(data=[go.Candlestick(), go.Scatter(), go.Heatmap()])
+    figure.update_layout(xaxis=dict(type='date'), yaxis=dict(color=linecolor)).to_plotly_json()
+    client = server.test_client()
+    for path in ('/', '/_dash-layout', '/_dash-dependencies'):
+        client.get(path)
+    # Keep the collector from touching (and so copying) the preloaded objects in every worker.
+    gc.freeze()
+
+
+if os.environ.get('STOCKVIEW_PRELOAD') == '1':
+    preload()
+else:
+    start_background()
+
 
 if __name__ == '__main__':
+    prefetcher.start()
     app.run_server(debug=False, port=8000)
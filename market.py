@@ -0,0 +1,42 @@
+import datetime
+from zoneinfo import ZoneInfo
+
+# NSE trading calendar helpers. Holidays are not modelled: a fetch for a holiday
+# simply returns no bar, which the callers treat the same as an already-known day.
+MARKET_TZ = ZoneInfo('Asia/Kolkata')
+MARKET_OPEN = datetime.time(9, 15)
+MARKET_CLOSE = datetime.time(15, 30)
+# Bhavcopy data for the day is usually published a little after the close.
+SETTLE_DELAY = datetime.timedelta(minutes=30)
+
+
+def market_now():
+    return datetime.datetime.now(MARKET_TZ)
+
+
+def _previous_weekday(day):
+    while day.weekday() >= 5:
+        day -= datetime.timedelta(days=1)
+    return day
+
+
+def last_closed_session(now=None):
+    """Most recent trading day whose end-of-day bar is final."""
+    now = now or market_now()
+    today = now.date()
+    settled = datetime.datetime.combine(today, MARKET_CLOSE, MARKET_TZ) + SETTLE_DELAY
+    if today.weekday() < 5 and now >= settled:
+        return today
+    return _previous_weekday(today - datetime.timedelta(days=1))
+
+
+def next_close(now=None):
+    """Datetime of the next point at which a new daily bar becomes final."""
+    now = now or market_now()
+    day = now.date()
+    while True:
+        if day.weekday() < 5:
+            settled = datetime.datetime.combine(day, MARKET_CLOSE, MARKET_TZ) + SETTLE_DELAY
+            if settled > now:
+                return settled
+        day += datetime.timedelta(days=1)
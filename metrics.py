@@ -0,0 +1,197 @@
+import bisect
+import json
+import logging
+import threading
+import time
+from contextlib import ContextDecorator
+
+# In-process counters and histograms, exposed in the Prometheus text format
+# on the Flask server's /metrics route. Each gunicorn worker keeps its own
+# registry, so scrape every worker (or aggregate by instance) to see the host.
+
+log = logging.getLogger('stockview.trace')
+
+# Upper bounds, in seconds, of the latency histograms.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format(name, labels, value):
+    if labels:
+        name += '{%s}' % ','.join('%s="%s"' % (k, _escape(v)) for k, v in labels)
+    return '%s %s' % (name, repr(float(value)))
+
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, help, labelnames=(), registry=None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+        (REGISTRY if registry is None else registry).register(self)
+
+    def _key(self, labels):
+        return tuple(labels[n] for n in self.labelnames)
+
+    def render(self):
+        lines = ['# HELP %s %s' % (self.name, self.help), '# TYPE %s %s' % (self.name, self.kind)]
+        lines.extend(_format(name, labels, value) for name, labels, value in self.samples())
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._series.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            series = list(self._series.items())
+        for key, value in series:
+            yield self.name, list(zip(self.labelnames, key)), value
+
+
+class Gauge(Metric):
+    """Read at scrape time from ``collect``, e.g. a cache's stats()."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, help, collect, registry=None):
+        self.collect = collect
+        super().__init__(name, help, registry=registry)
+
+    def samples(self):
+        yield self.name, [], self.collect()
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS, registry=None):
+        self.buckets = tuple(buckets)
+        super().__init__(name, help, labelnames, registry)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][slot] += 1
+            series[1] += value
+
+    def count(self, **labels):
+        series = self._series.get(self._key(labels))
+        return sum(series[0]) if series else 0
+
+    def samples(self):
+        with self._lock:
+            series = [(key, list(counts), total) for key, (counts, total) in self._series.items()]
+        for key, counts, total in series:
+            labels = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float('inf'),), counts):
+                cumulative += n
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                yield self.name + '_bucket', labels + [('le', le)], cumulative
+            yield self.name + '_sum', labels, total
+            yield self.name + '_count', labels, cumulative
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = Histogram('stockview_stage_seconds', 'Time spent in each stage of a page build.', ('stage',))
+REQUEST_SECONDS = Histogram('stockview_callback_request_seconds',
+                            'Wall time of Dash callback requests, including serialization.')
+UPSTREAM_FETCHES = Counter('stockview_upstream_fetches_total',
+                           'Calls to the upstream history fetcher by outcome (ok, empty, error).', ('outcome',))
+CACHE_LOOKUPS = Counter('stockview_cache_lookups_total', 'Cache lookups by cache and result (hit, miss).',
+                        ('cache', 'result'))
+
+_trace = threading.local()
+
+
+class timed(ContextDecorator):
+    """Record the duration of the block (or decorated function) under ``stage``."""
+
+    __slots__ = ('stage', 'start')
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def _recreate_cm(self):
+        # Each decorated call gets its own timer, so concurrent calls don't share ``start``.
+        return timed(self.stage)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        STAGE_SECONDS.observe(elapsed, stage=self.stage)
+        spans = getattr(_trace, 'spans', None)
+        if spans is not None:
+            spans.append((self.stage, round(elapsed * 1000, 3)))
+        return False
+
+
+def mount_metrics(server, trace=False, registry=REGISTRY):
+    """Mount /metrics on the Flask ``server`` and time its Dash callback requests.
+
+    With ``trace`` on, every callback request also logs one JSON line to the
+    ``stockview.trace`` logger with the stages it ran on the request thread.
+    """
+    from flask import Response, request
+
+    @server.route('/metrics')
+    def metrics():
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+    @server.before_request
+    def start_timer():
+        if request.path.endswith('/_dash-update-component'):
+            _trace.start = time.perf_counter()
+            _trace.spans = [] if trace else None
+
+    @server.after_request
+    def stop_timer(response):
+        start = getattr(_trace, 'start', None)
+        if start is not None:
+            elapsed = time.perf_counter() - start
+            REQUEST_SECONDS.observe(elapsed)
+            if _trace.spans is not None:
+                body = request.get_json(silent=True) or {}
+                log.info(json.dumps({'changed': body.get('changedPropIds'), 'status': response.status_code,
+                                     'ms': round(elapsed * 1000, 3), 'stages': _trace.spans}))
+            _trace.start = _trace.spans = None
+        return response
+
+    return server
@@ -0,0 +1,83 @@
+import datetime
+
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+# Look-back of every window the dashboard can show. The fetch planner loads one
+# history that covers the longest of the SUPERSET windows and serves the rest as
+# slices of it; the multi-year ranges, and custom ranges that start earlier,
+# extend that history only when asked for.
+WINDOWS = {
+    '1week': relativedelta(weeks=1),
+    '1month': relativedelta(months=1),
+    '3month': relativedelta(months=3),
+    '6month': relativedelta(months=6),
+    # Absolute month and day: 1 January of the end date's year.
+    'ytd': relativedelta(month=1, day=1),
+    '1year': relativedelta(years=1),
+    '52week': relativedelta(weeks=52),
+    '5year': relativedelta(years=5),
+    '10year': relativedelta(years=10),
+    # Absolute fields: subtracting this from any end date lands on NSE's first session.
+    'max': relativedelta(year=1994, month=11, day=3),
+}
+SUPERSET = ('1week', '1month', '3month', '6month', '1year', '52week')
+# Separates the dates of a custom window: '2021-03-01..2021-06-30'.
+RANGE_SEPARATOR = '..'
+
+
+def custom_window(start, end):
+    """Window name for an arbitrary date range, usable wherever a WINDOWS name is."""
+    if start > end:
+        start, end = end, start
+    return '%s%s%s' % (start.isoformat(), RANGE_SEPARATOR, end.isoformat())
+
+
+def window_bounds(window, end):
+    """(start, end) of ``window`` as of ``end``; a custom window never runs past ``end``."""
+    if RANGE_SEPARATOR in window:
+        first, last = (datetime.date.fromisoformat(part) for part in window.split(RANGE_SEPARATOR))
+        return first, min(last, end)
+    return end - WINDOWS[window], end
+
+
+def window_start(window, end):
+    return window_bounds(window, end)[0]
+
+
+def superset_start(end, windows=SUPERSET):
+    return min(window_start(window, end) for window in windows)
+
+
+class HistoryPlan:
+    """One superset history for a symbol, sliced per window without copying."""
+
+    def __init__(self, symbol, history, end):
+        self.symbol = symbol
+        self.history = history
+        self.end = end
+
+    def window(self, window):
+        # Label slicing on a sorted DatetimeIndex returns a view of the superset.
+        start, end = window_bounds(window, self.end)
+        return self.history.loc[pd.Timestamp(start):pd.Timestamp(end)]
+
+    def extremes(self, window='52week'):
+        frame = self.window(window)
+        return frame.High.max(), frame.Low.min()
+
+
+def plan_range(window=None, end=None):
+    """Dates a plan for ``window`` loads: the superset, widened for longer windows."""
+    end = end or datetime.date.today()
+    start = superset_start(end)
+    if window is not None:
+        start = min(start, window_start(window, end))
+    return start, end
+
+
+def load_plan(store, symbol, end=None, window=None):
+    """Fetch (or read from the store) the superset history once per symbol."""
+    start, end = plan_range(window, end)
+    history = store.get_history(symbol, start, end)
+    return HistoryPlan(symbol, history, end)
@@ -0,0 +1,154 @@
+import datetime
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from market import last_closed_session, market_now, next_close
+from planner import superset_start
+
+log = logging.getLogger(__name__)
+# Seconds between attempts to take over prefetching while another process has it.
+ELECTION_SECONDS = 60
+
+
+class RateLimiter:
+    """Token bucket allowing ``rate`` calls per second with bursts of ``burst``."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class PrefetchScheduler:
+    """Warms the store for a whole universe at startup and after every close.
+
+    Symbols are fetched through ``store.ensure`` by a bounded thread pool, each
+    upstream attempt passing through a shared rate limiter and failed symbols
+    retried with exponential backoff. ``on_warm`` callables run after each
+    pass, e.g. to fold the new bars into precomputed aggregates.
+
+    With several worker processes only one should prefetch, or the upstream
+    rate is multiplied by the worker count. ``elect`` returns a lease (kept
+    while the process lives) when this process should be the one, or None;
+    the others keep retrying every ELECTION_SECONDS in case it exits.
+    """
+
+    def __init__(self, store, symbols, max_workers=4, rate=4.0, retries=3, backoff=2.0, on_warm=(),
+                 elect=lambda: True):
+        self.store = store
+        self.elect = elect
+        self._lease = None
+        self.on_warm = list(on_warm)
+        self.symbols = list(symbols)
+        self.max_workers = max_workers
+        self.limiter = RateLimiter(rate, burst=max_workers)
+        self.retries = retries
+        self.backoff = backoff
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._progress = {'total': len(self.symbols), 'done': 0, 'failed': [],
+                          'running': False, 'started_at': None, 'finished_at': None}
+
+    def _warm_symbol(self, symbol, end):
+        start = superset_start(end)
+        if not self.store.needs_fetch(symbol, start, end):
+            return True
+        for attempt in range(self.retries + 1):
+            if self._stop.is_set():
+                return False
+            self.limiter.acquire()
+            try:
+                self.store.ensure(symbol, start, end)
+                return True
+            except Exception:
+                log.warning('prefetch of %s failed (attempt %d)', symbol, attempt + 1, exc_info=True)
+                self._stop.wait(self.backoff * 2 ** attempt)
+        return False
+
+    def _record(self, symbol, ok):
+        with self._lock:
+            self._progress['done'] += 1
+            if not ok:
+                self._progress['failed'].append(symbol)
+            done = self._progress['done']
+        if done % 50 == 0 or done == len(self.symbols):
+            log.info('prefetch %d/%d symbols', done, len(self.symbols))
+
+    def warm(self):
+        """Run one pass over the universe; blocks until it finishes."""
+        end = datetime.date.today()
+        with self._lock:
+            self._progress.update(done=0, failed=[], running=True,
+                                  started_at=market_now(), finished_at=None)
+        with ThreadPoolExecutor(self.max_workers, thread_name_prefix='prefetch') as pool:
+            for symbol, ok in zip(self.symbols, pool.map(lambda s: self._warm_symbol(s, end), self.symbols)):
+                self._record(symbol, ok)
+        with self._lock:
+            self._progress.update(running=False, finished_at=market_now())
+        failed, summary = len(self.progress()['failed']), self.staleness_summary()
+        log.info('prefetch pass finished: %d failed, %d symbols not stored, max staleness %s days',
+                 failed, summary['missing'], summary['max_days'])
+        for hook in self.on_warm:
+            try:
+                hook()
+            except Exception:
+                log.exception('post-prefetch hook failed')
+        return self.progress()
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self._lease is None:
+                self._lease = self.elect()
+                if self._lease is None:
+                    self._stop.wait(ELECTION_SECONDS)
+                    continue
+                log.info('prefetching for this process group')
+            self.warm()
+            wait = (next_close() - market_now()).total_seconds()
+            self._stop.wait(max(wait, 1.0))
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='prefetch', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def progress(self):
+        with self._lock:
+            return dict(self._progress, failed=list(self._progress['failed']), leader=self._lease is not None)
+
+    def staleness(self):
+        """Calendar days each symbol's stored bars lag the last closed session."""
+        target = last_closed_session()
+        result = {}
+        for symbol in self.symbols:
+            covered = self.store.covered_through(symbol)
+            result[symbol] = None if covered is None else max((target - covered).days, 0)
+        return result
+
+    def staleness_summary(self):
+        """Worst and 95th-percentile staleness in days, and symbols with nothing stored."""
+        days = sorted(d for d in self.staleness().values() if d is not None)
+        return {'max_days': days[-1] if days else 0,
+                'p95_days': days[int(0.95 * (len(days) - 1))] if days else 0,
+                'missing': len(self.symbols) - len(days)}
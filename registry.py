@@ -0,0 +1,111 @@
+import bisect
+import csv
+from array import array
+
+
+class SymbolRecord:
+    __slots__ = ('symbol', 'name', 'industry', 'series', 'isin')
+
+    def __init__(self, symbol, name, industry, series, isin):
+        self.symbol = symbol
+        self.name = name
+        self.industry = industry
+        self.series = series
+        self.isin = isin
+
+    def __repr__(self):
+        return 'SymbolRecord(%r, %r)' % (self.symbol, self.name)
+
+
+class SymbolRegistry:
+    """Immutable index of the tradable universe, loaded once from the CSV.
+
+    Symbol, ISIN and company-name lookups are dict hits. Prefix search runs
+    a bisect over sorted, case-folded keys. Industries are interned:
+    each record's industry is stored as a small integer code, so
+    symbol -> industry and industry -> members are array/tuple lookups.
+    """
+
+    __slots__ = ('_records', '_by_symbol', '_by_isin', '_by_name', '_prefix_keys', '_prefix_rows',
+                 '_industries', '_industry_codes', '_members')
+
+    def __init__(self, records):
+        records = tuple(records)
+        self._records = records
+        self._by_symbol = {r.symbol: i for i, r in enumerate(records)}
+        self._by_isin = {r.isin: i for i, r in enumerate(records)}
+        self._by_name = {r.name.casefold(): i for i, r in enumerate(records)}
+        keys = sorted({(r.symbol.casefold(), i) for i, r in enumerate(records)} |
+                      {(r.name.casefold(), i) for i, r in enumerate(records)})
+        self._prefix_keys = [k for k, _ in keys]
+        self._prefix_rows = array('H', [i for _, i in keys])
+        self._industries = tuple(sorted({r.industry for r in records}))
+        code = {name: c for c, name in enumerate(self._industries)}
+        self._industry_codes = array('B', [code[r.industry] for r in records])
+        members = [[] for _ in self._industries]
+        for i, r in enumerate(records):
+            members[code[r.industry]].append(r.symbol)
+        self._members = tuple(tuple(m) for m in members)
+
+    @classmethod
+    def from_csv(cls, path):
+        with open(path, newline='') as fh:
+            rows = list(csv.DictReader(fh))
+        return cls(SymbolRecord(row['Symbol'], row['Company Name'], row['Industry'],
+                                row['Series'], row['ISIN Code']) for row in rows)
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def __contains__(self, symbol):
+        return symbol in self._by_symbol
+
+    def get(self, symbol):
+        i = self._by_symbol.get(symbol)
+        return None if i is None else self._records[i]
+
+    def by_isin(self, isin):
+        i = self._by_isin.get(isin)
+        return None if i is None else self._records[i]
+
+    def by_name(self, name):
+        i = self._by_name.get(name.casefold())
+        return None if i is None else self._records[i]
+
+    def industry_of(self, symbol):
+        i = self._by_symbol.get(symbol)
+        return None if i is None else self._industries[self._industry_codes[i]]
+
+    def industries(self):
+        return self._industries
+
+    def members(self, industry):
+        try:
+            return self._members[self._industries.index(industry)]
+        except ValueError:
+            return ()
+
+    def symbols(self):
+        return [r.symbol for r in self._records]
+
+    def industry_map(self):
+        return {r.symbol: self._industries[c] for r, c in zip(self._records, self._industry_codes)}
+
+    def prefix(self, text, limit=None):
+        """Records whose symbol or company name starts with ``text`` (case-insensitive)."""
+        text = text.casefold()
+        lo = bisect.bisect_left(self._prefix_keys, text)
+        seen, out = set(), []
+        for pos in range(lo, len(self._prefix_keys)):
+            if not self._prefix_keys[pos].startswith(text):
+                break
+            i = self._prefix_rows[pos]
+            if i not in seen:
+                seen.add(i)
+                out.append(self._records[i])
+                if limit and len(out) >= limit:
+                    break
+        return out
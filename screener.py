@@ -0,0 +1,242 @@
+import re
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from batch import UniverseMatrix, last_valid, rolling_mean
+from industry import RETRY_SECONDS, YEAR_SESSIONS
+
+# Sessions kept for the factor window: a year for the 52-week range, plus a day
+# so returns and crossovers can look one session back.
+LOOKBACK_SESSIONS = YEAR_SESSIONS + 1
+QUARTER_SESSIONS = 63
+
+# Factor column -> display label. Every column is a float array over the universe.
+FACTORS = {
+    'close': 'Close',
+    'change_1d': '1D %',
+    'change_1w': '1W %',
+    'change_1m': '1M %',
+    'high_52w': '52W High',
+    'low_52w': '52W Low',
+    'from_high_52w': 'From 52W High %',
+    'from_low_52w': 'From 52W Low %',
+    'sma_20': '20 SMA',
+    'sma_50': '50 SMA',
+    'sma_20_above_50': '20 > 50 SMA',
+    'sma_20_cross_50': '20/50 SMA Cross',
+    'volume': 'Volume',
+    'avg_volume_3m': '3M Avg Volume',
+    'volume_ratio': 'Volume / 3M Avg',
+}
+
+# Ready-made screens, written in the query syntax accepted by parse_query.
+SCREENS = {
+    'Within 5% of 52-week high': 'from_high_52w >= -5',
+    'Within 5% of 52-week low': 'from_low_52w <= 5',
+    '20 SMA crossed above 50 SMA today': 'sma_20_cross_50 == 1',
+    '20 SMA crossed below 50 SMA today': 'sma_20_cross_50 == -1',
+    'Volume > 2x 3-month average': 'volume_ratio > 2',
+}
+
+_CONDITION = re.compile(r'^\s*(\w+)\s*(>=|<=|==|>|<)\s*(.+?)\s*$')
+# Quoted values are single tokens, so an 'and' inside one doesn't split the query.
+_TOKEN = re.compile(r'\'[^\']*\'|"[^"]*"|[^\s\'"]+|[\'"]')
+
+
+def compute_factors(matrix):
+    """Factor columns for every symbol of ``matrix`` as of its last day."""
+    close, high, low, volume = matrix['Close'], matrix['High'], matrix['Low'], matrix['Volume']
+    with np.errstate(all='ignore'):
+        latest = last_valid(close)
+        high_52w = np.nanmax(high[:, -YEAR_SESSIONS:], axis=1)
+        low_52w = np.nanmin(low[:, -YEAR_SESSIONS:], axis=1)
+        sma_20, sma_50 = rolling_mean(close, 20), rolling_mean(close, 50)
+        above = np.sign(sma_20[:, -1] - sma_50[:, -1])
+        before = np.sign(sma_20[:, -2] - sma_50[:, -2]) if close.shape[1] > 1 else above
+        # +1 crossed above today, -1 crossed below, 0 otherwise.
+        cross = np.where(above != before, above, 0.0)
+        avg_volume = np.nanmean(volume[:, -QUARTER_SESSIONS - 1:-1], axis=1)
+
+        def change(n):
+            if close.shape[1] <= n:
+                return np.full(len(close), np.nan)
+            return (close[:, -1] / close[:, -1 - n] - 1) * 100
+
+        return {
+            'close': latest,
+            'change_1d': change(1),
+            'change_1w': change(5),
+            'change_1m': change(21),
+            'high_52w': high_52w,
+            'low_52w': low_52w,
+            'from_high_52w': (latest / high_52w - 1) * 100,
+            'from_low_52w': (latest / low_52w - 1) * 100,
+            'sma_20': sma_20[:, -1],
+            'sma_50': sma_50[:, -1],
+            'sma_20_above_50': (above > 0).astype(float),
+            'sma_20_cross_50': np.nan_to_num(cross),
+            'volume': volume[:, -1],
+            'avg_volume_3m': avg_volume,
+            'volume_ratio': volume[:, -1] / avg_volume,
+        }
+
+
+def parse_query(text):
+    """``"from_high_52w >= -5 and industry == 'Information Technology'"`` -> conditions.
+
+    Raises ValueError naming the part that could not be read.
+    """
+    parts, current = [], []
+    for token in _TOKEN.findall(text):
+        if token in ('\'', '"'):
+            raise ValueError('unterminated quote in %r' % text)
+        if token.casefold() == 'and':
+            parts.append(' '.join(current))
+            current = []
+        else:
+            current.append(token)
+    parts.append(' '.join(current))
+    conditions = []
+    for part in parts:
+        if not part:
+            continue
+        match = _CONDITION.match(part)
+        if not match:
+            raise ValueError('cannot read condition %r' % part)
+        column, op, raw = match.groups()
+        if column == 'industry':
+            if op != '==':
+                raise ValueError('industry can only be matched with ==, not %s' % op)
+            value = raw.strip('\'"')
+        else:
+            if column not in FACTORS:
+                raise ValueError('unknown factor %r' % column)
+            try:
+                value = float(raw)
+            except ValueError:
+                raise ValueError('%r is not a number' % raw)
+        conditions.append((column, op, value))
+    return conditions
+
+
+class FactorTable:
+    """Immutable columnar table of factors with one sorted index per column.
+
+    A range condition is two ``searchsorted`` calls on the column's sorted
+    values and yields a contiguous run of its argsort; conditions combine as
+    boolean masks over the universe. NaNs sort last and never match.
+    """
+
+    def __init__(self, symbols, industries, columns, date):
+        self.symbols = np.array(symbols)
+        self.industries = np.array([industries.get(s, '') for s in symbols])
+        self._industry_keys = np.array([name.casefold() for name in self.industries])
+        self.columns = columns
+        self.date = date
+        self._order = {}
+        self._sorted = {}
+        for name, values in columns.items():
+            order = np.argsort(values, kind='stable')
+            self._order[name] = order
+            self._sorted[name] = values[order]
+
+    @classmethod
+    def from_matrix(cls, matrix, industries):
+        date = matrix.dates[-1] if len(matrix.dates) else None
+        return cls(matrix.symbols, industries, compute_factors(matrix), date)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def rows(self, column, op, value):
+        """Row numbers of symbols whose ``column`` satisfies ``op value``."""
+        if column == 'industry':
+            if op != '==':
+                raise ValueError('industry can only be matched with ==, not %s' % op)
+            return np.flatnonzero(self._industry_keys == value.casefold())
+        ordered = self._sorted[column]
+        valid = len(ordered) - np.count_nonzero(np.isnan(ordered))
+        lo, hi = 0, valid
+        if op in ('>', '>='):
+            lo = np.searchsorted(ordered[:valid], value, side='right' if op == '>' else 'left')
+        elif op in ('<', '<='):
+            hi = np.searchsorted(ordered[:valid], value, side='left' if op == '<' else 'right')
+        else:
+            lo = np.searchsorted(ordered[:valid], value, side='left')
+            hi = np.searchsorted(ordered[:valid], value, side='right')
+        return self._order[column][lo:hi]
+
+    def query(self, conditions, sort=None, descending=True, limit=None):
+        mask = np.ones(len(self), dtype=bool)
+        for column, op, value in conditions:
+            keep = np.zeros(len(self), dtype=bool)
+            keep[self.rows(column, op, value)] = True
+            mask &= keep
+        if sort is None:
+            rows = np.flatnonzero(mask)
+        else:
+            # Walk the sort column's index instead of sorting the matches.
+            order = self._order[sort]
+            valid = len(order) - np.count_nonzero(np.isnan(self._sorted[sort]))
+            ranked = order[:valid][::-1] if descending else order[:valid]
+            rows = np.concatenate([ranked, order[valid:]])
+            rows = rows[mask[rows]]
+        return rows[:limit] if limit else rows
+
+    def frame(self, rows):
+        out = pd.DataFrame({FACTORS[name]: values[rows] for name, values in self.columns.items()},
+                           index=pd.Index(self.symbols[rows], name='Symbol'))
+        out.insert(0, 'Industry', self.industries[rows])
+        return out
+
+
+class Screener:
+    """Keeps a FactorTable for the universe current, one session at a time.
+
+    The first refresh loads LOOKBACK_SESSIONS of bars for every symbol from
+    the store; after each close only the new session is read and folded into
+    the trailing window before the factors are recomputed. Refreshing is slow
+    on a cold store, so it runs off the request path (the prefetcher's
+    ``on_warm`` or a background job) and queries read ``table``, which stays
+    None until the first build. If any symbol failed to load, a refresh
+    RETRY_SECONDS later reloads the whole universe instead.
+    """
+
+    def __init__(self, store, industries, lookback_start):
+        self.store = store
+        self.industries = dict(industries)
+        self.lookback_start = lookback_start
+        self.table = None
+        self.through = None
+        self._matrix = None
+        self._attempted = 0.0
+        self._lock = threading.Lock()
+
+    def needs_refresh(self, end):
+        if self.table is None or end > self.through:
+            return True
+        return bool(self._matrix.failures) and time.monotonic() - self._attempted >= RETRY_SECONDS
+
+    def refresh(self, end):
+        with self._lock:
+            if not self.needs_refresh(end):
+                return self.table
+            self._attempted = time.monotonic()
+            if self._matrix is None or self._matrix.failures:
+                matrix = UniverseMatrix.from_store(self.store, list(self.industries),
+                                                   self.lookback_start(end), end)
+                if not len(matrix):
+                    raise RuntimeError('no bars could be loaded for any of %d symbols' % len(self.industries))
+                if len(matrix.dates) > LOOKBACK_SESSIONS:
+                    matrix = matrix.since(matrix.dates[-LOOKBACK_SESSIONS])
+            else:
+                since = self._matrix.dates[-1].date()
+                latest = UniverseMatrix.from_store(self.store, self._matrix.symbols, since, end)
+                matrix = self._matrix.extend(latest, keep=LOOKBACK_SESSIONS)
+            # Nothing is kept unless the table builds, so a failed refresh leaves the last one in place.
+            table = FactorTable.from_matrix(matrix, self.industries)
+            self._matrix, self.table, self.through = matrix, table, end
+            return table
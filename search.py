@@ -0,0 +1,57 @@
+from collections import Counter, defaultdict
+
+
+def trigrams(text):
+    text = ' %s ' % text.casefold()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SymbolSearch:
+    """Type-ahead search over a SymbolRegistry.
+
+    Prefix matches on symbol or company name rank first. Remaining slots are
+    filled from a trigram index, ranked by shared trigrams, so substrings and
+    small typos ("infosys", "relaince") still find their company.
+    """
+
+    def __init__(self, registry):
+        self.registry = registry
+        self.records = list(registry)
+        postings = defaultdict(list)
+        for i, record in enumerate(self.records):
+            for gram in trigrams(record.symbol) | trigrams(record.name):
+                postings[gram].append(i)
+        self.postings = {gram: tuple(rows) for gram, rows in postings.items()}
+
+    def search(self, text, limit=20):
+        text = text.strip()
+        if not text:
+            return []
+        found = self.registry.prefix(text, limit)
+        if len(found) >= limit or len(text) < 3:
+            return found
+        seen = {record.symbol for record in found}
+        grams = trigrams(text)
+        scores = Counter()
+        for gram in grams:
+            scores.update(self.postings.get(gram, ()))
+        # Require a reasonable share of the query's trigrams to cut noise.
+        floor = max(2, len(grams) // 2)
+        for i, score in scores.most_common():
+            if score < floor or len(found) >= limit:
+                break
+            record = self.records[i]
+            if record.symbol not in seen:
+                seen.add(record.symbol)
+                found.append(record)
+        return found
+
+    def options(self, text, limit=20):
+        """Dropdown options for ``text``.
+
+        dcc.Dropdown filters the options it receives again in the browser, by
+        substring of value, label and ``search``. Each option's ``search`` is
+        the typed text itself, so trigram matches ("relaince") stay visible.
+        """
+        text = text.strip()
+        return [{'label': r.name, 'value': r.symbol, 'search': text} for r in self.search(text, limit)]
@@ -0,0 +1,234 @@
+import datetime
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from cache_backend import MemoryBackend
+from market import last_closed_session
+from metrics import UPSTREAM_FETCHES, timed
+
+ONE_DAY = datetime.timedelta(days=1)
+# Days after the last stored bar stay unconfirmed while they are within this of
+# the last closed session: nsepy returns nothing for a session that has settled
+# but not been published yet, the same as for a holiday. Unconfirmed days are
+# asked for again at most every RECHECK_SECONDS.
+RECHECK = datetime.timedelta(days=5)
+RECHECK_SECONDS = 15 * 60
+# Symbols whose bars stay in the in-process mirror; the least recently read go first.
+MIRROR_SYMBOLS = 64
+
+
+def _as_date(value):
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    return value
+
+
+class OHLCVStore:
+    """Persistent per-symbol store of daily bars.
+
+    Each symbol is kept as ``<root>/<SYMBOL>.parquet`` next to a small JSON
+    sidecar recording which date range has already been asked of the upstream
+    fetcher. Recent days that came back empty are not counted as covered until
+    a bar confirms them or they are RECHECK old. Reads are served from an
+    in-process mirror of the most recently read files, and the fetcher
+    (``nse.get_history`` in production) is only called for the part of a
+    requested range that has never been covered.
+
+    Upstream fetches are serialized per symbol through ``backend.lock``; with a
+    shared backend, several workers asking for the same cold symbol trigger a
+    single fetch and the others pick the result up from disk.
+    """
+
+    def __init__(self, root, fetcher, backend=None, mirror_symbols=MIRROR_SYMBOLS):
+        self.root = root
+        self.fetcher = fetcher
+        self.backend = backend or MemoryBackend()
+        self.mirror_symbols = mirror_symbols
+        self._mirror = OrderedDict()
+        self._mirror_lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    # Paths and on-disk state_____________________________________
+    def _data_path(self, symbol):
+        return os.path.join(self.root, symbol + '.parquet')
+
+    def _meta_path(self, symbol):
+        return os.path.join(self.root, symbol + '.json')
+
+    def _read_meta(self, symbol):
+        try:
+            with open(self._meta_path(symbol)) as fh:
+                raw = json.load(fh)
+        except FileNotFoundError:
+            return None
+        meta = {'from': datetime.date.fromisoformat(raw['from']),
+                'to': datetime.date.fromisoformat(raw['to'])}
+        if 'checked_to' in raw:
+            meta['checked_to'] = datetime.date.fromisoformat(raw['checked_to'])
+            meta['checked_at'] = raw['checked_at']
+        return meta
+
+    def _load(self, symbol):
+        """Return (frame, meta), re-reading disk only if another process wrote it."""
+        try:
+            mtime = os.stat(self._meta_path(symbol)).st_mtime_ns
+        except FileNotFoundError:
+            return None, None
+        with self._mirror_lock:
+            cached = self._mirror.get(symbol)
+            if cached and cached[0] == mtime:
+                self._mirror.move_to_end(symbol)
+                return cached[1], cached[2]
+        meta = self._read_meta(symbol)
+        if os.path.exists(self._data_path(symbol)):
+            frame = pd.read_parquet(self._data_path(symbol))
+        else:
+            frame = None
+        self._remember(symbol, mtime, frame, meta)
+        return frame, meta
+
+    def _remember(self, symbol, mtime, frame, meta):
+        with self._mirror_lock:
+            self._mirror[symbol] = (mtime, frame, meta)
+            self._mirror.move_to_end(symbol)
+            while len(self._mirror) > self.mirror_symbols:
+                self._mirror.popitem(last=False)
+
+    def _write(self, symbol, frame, meta):
+        if frame is not None:
+            tmp = self._data_path(symbol) + '.tmp'
+            frame.to_parquet(tmp)
+            os.replace(tmp, self._data_path(symbol))
+        tmp = self._meta_path(symbol) + '.tmp'
+        with open(tmp, 'w') as fh:
+            raw = {'from': meta['from'].isoformat(), 'to': meta['to'].isoformat()}
+            if 'checked_to' in meta:
+                raw.update(checked_to=meta['checked_to'].isoformat(), checked_at=meta['checked_at'])
+            json.dump(raw, fh)
+        os.replace(tmp, self._meta_path(symbol))
+        self._remember(symbol, os.stat(self._meta_path(symbol)).st_mtime_ns, frame, meta)
+
+    # Fetching____________________________________________________
+    def _fetch(self, symbol, start, end):
+        if start > end:
+            return None
+        try:
+            with timed('upstream'):
+                frame = self.fetcher(symbol, start, end)
+        except Exception:
+            UPSTREAM_FETCHES.inc(outcome='error')
+            raise
+        if frame is None or frame.empty:
+            UPSTREAM_FETCHES.inc(outcome='empty')
+            return None
+        UPSTREAM_FETCHES.inc(outcome='ok')
+        frame = frame.copy()
+        frame.index = pd.to_datetime(frame.index)
+        frame.index.name = 'Date'
+        return frame
+
+    def _missing_ranges(self, meta, start, end):
+        if meta is None:
+            return [(start, end)]
+        ranges = []
+        if start < meta['from']:
+            ranges.append((start, meta['from'] - ONE_DAY))
+        if end > meta['to'] and not self._recently_checked(meta, end):
+            ranges.append((meta['to'] + ONE_DAY, end))
+        return ranges
+
+    @staticmethod
+    def _recently_checked(meta, end):
+        return ('checked_to' in meta and end <= meta['checked_to']
+                and time.time() - meta['checked_at'] < RECHECK_SECONDS)
+
+    @staticmethod
+    def _covered(meta, frame, start, end):
+        """Sidecar after asking upstream for ``[start, end]``."""
+        last = frame.index[-1].date() if frame is not None and len(frame) else None
+        to = end
+        if last is None or last < end:
+            # Trailing days without a bar only count as covered once they are RECHECK old.
+            to = max(last or start - ONE_DAY, min(end, last_closed_session() - RECHECK))
+        covered = {'from': start, 'to': to}
+        if meta is not None:
+            covered = {'from': min(meta['from'], start), 'to': max(meta['to'], to)}
+        if covered['to'] < end:
+            covered.update(checked_to=end, checked_at=time.time())
+        return covered
+
+    def needs_fetch(self, symbol, start, end):
+        end = min(_as_date(end), last_closed_session())
+        _, meta = self._load(symbol)
+        return bool(self._missing_ranges(meta, _as_date(start), end))
+
+    def ensure(self, symbol, start, end):
+        """Make sure bars for ``[start, end]`` are stored; return the full frame."""
+        start = _as_date(start)
+        # Bars after the last settled session are not final yet, so never
+        # count them as covered.
+        end = min(_as_date(end), last_closed_session())
+        frame, meta = self._load(symbol)
+        if not self._missing_ranges(meta, start, end):
+            return frame
+        with self.backend.lock(('fetch', symbol)):
+            frame, meta = self._load(symbol)
+            missing = self._missing_ranges(meta, start, end)
+            if not missing:
+                return frame
+            parts = [frame] if frame is not None else []
+            for lo, hi in missing:
+                fetched = self._fetch(symbol, lo, hi)
+                if fetched is not None:
+                    parts.append(fetched.loc[:pd.Timestamp(end)])
+            if parts:
+                frame = pd.concat(parts)
+                frame = frame[~frame.index.duplicated(keep='last')].sort_index()
+            self._write(symbol, frame, self._covered(meta, frame, start, end))
+            return frame
+
+    # Public reads________________________________________________
+    def get_history(self, symbol, start, end):
+        """Drop-in replacement for ``nse.get_history`` served from the store."""
+        frame = self.ensure(symbol, start, end)
+        if frame is None:
+            return self._empty()
+        return frame.loc[pd.Timestamp(_as_date(start)):pd.Timestamp(_as_date(end))]
+
+    def read(self, symbol, start, end, columns=None):
+        """Stored bars for ``[start, end]``, without fetching and without caching.
+
+        Only the requested rows and columns are read from the symbol's parquet
+        file, and the in-process mirror is left alone, so a scan over the whole
+        universe holds one symbol in memory at a time.
+        """
+        path = self._data_path(symbol)
+        if not os.path.exists(path):
+            empty = self._empty()
+            return empty if columns is None else empty[list(columns)]
+        filters = [('Date', '>=', pd.Timestamp(_as_date(start))), ('Date', '<=', pd.Timestamp(_as_date(end)))]
+        return pd.read_parquet(path, columns=columns, filters=filters)
+
+    def last_bar_date(self, symbol):
+        frame, _ = self._load(symbol)
+        if frame is None or frame.empty:
+            return None
+        return frame.index[-1].date()
+
+    def covered_through(self, symbol):
+        # Sidecar only: staleness scans call this for the whole universe.
+        meta = self._read_meta(symbol)
+        return meta['to'] if meta else None
+
+    def symbols(self):
+        return sorted(name[:-5] for name in os.listdir(self.root) if name.endswith('.json'))
+
+    @staticmethod
+    def _empty():
+        return pd.DataFrame(columns=['Open', 'High', 'Low', 'Close', 'VWAP', 'Volume'],
+                            index=pd.DatetimeIndex([], name='Date'))
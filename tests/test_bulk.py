@@ -0,0 +1,59 @@
+import asyncio
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from bulk import FetchTimeout, bulk_fetch, bulk_fetch_async
+from fakes import FakeFetcher
+
+START = datetime.date(2020, 3, 2)
+END = datetime.date(2020, 6, 30)
+SYMBOLS = ['TCS', 'INFY', 'BAD', 'SLOW', 'SBIN', 'ITC']
+TIMEOUT = 0.3
+
+
+class FlakyFetcher(FakeFetcher):
+    """Raises for BAD and hangs on SLOW until ``release`` is set."""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def __call__(self, symbol, start, end):
+        if symbol == 'BAD':
+            raise ConnectionError('upstream refused %s' % symbol)
+        if symbol == 'SLOW':
+            self.release.wait(10)
+        return super().__call__(symbol, start, end)
+
+
+def run_threads(fetcher, pool):
+    return bulk_fetch(SYMBOLS, START, END, fetcher, max_workers=4, timeout=TIMEOUT, executor=pool)
+
+
+def run_asyncio(fetcher, pool):
+    return asyncio.run(bulk_fetch_async(SYMBOLS, START, END, fetcher, max_workers=4, timeout=TIMEOUT,
+                                        executor=pool))
+
+
+@pytest.mark.parametrize('run', [run_threads, run_asyncio], ids=['threads', 'asyncio'])
+def test_failures_are_collected_without_aborting_the_batch(run):
+    fetcher = FlakyFetcher()
+    pool = ThreadPoolExecutor(4)
+    try:
+        result = run(fetcher, pool)
+    finally:
+        fetcher.release.set()
+        pool.shutdown()
+
+    assert sorted(result.frames) == ['INFY', 'ITC', 'SBIN', 'TCS']
+    assert all(len(frame) for frame in result.frames.values())
+    assert sorted(result.failures) == ['BAD', 'SLOW']
+    assert isinstance(result.failures['BAD'], ConnectionError)
+    assert isinstance(result.failures['SLOW'], FetchTimeout)
+    # The hung symbol costs its timeout, not the whole batch.
+    assert result.elapsed < TIMEOUT + 2
+    assert result.stacked().index.get_level_values('Symbol').nunique() == 4
+    assert result.summary().startswith('4 ok, 2 failed')
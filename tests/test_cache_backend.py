@@ -0,0 +1,72 @@
+import os
+import threading
+import time
+
+import pytest
+
+import cache_backend
+from cache_backend import FileBackend, MemoryBackend
+
+
+@pytest.fixture(params=['memory', 'file'])
+def backend(request, tmp_path):
+    return MemoryBackend() if request.param == 'memory' else FileBackend(str(tmp_path))
+
+
+def test_distinct_names_never_wait_on_each_other(backend):
+    # A compute lock must not queue behind a long fetch of an unrelated symbol.
+    held, release = threading.Event(), threading.Event()
+
+    def fetch():
+        with backend.lock(('fetch', 'TCS')):
+            held.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=fetch)
+    thread.start()
+    held.wait(5)
+    started = time.monotonic()
+    for n in range(300):
+        with backend.lock(('sma', 'INFY', n)):
+            pass
+    release.set()
+    thread.join()
+    assert time.monotonic() - started < 1
+
+
+def test_same_name_is_exclusive(backend):
+    inside, overlaps = [], []
+
+    def work():
+        for _ in range(50):
+            with backend.lock('key'):
+                inside.append(1)
+                if len(inside) > 1:
+                    overlaps.append(1)
+                inside.pop()
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not overlaps
+
+
+def test_sweep_removes_idle_lock_files_only(tmp_path, monkeypatch):
+    backend = FileBackend(str(tmp_path))
+    with backend.lock('old'):
+        pass
+    locks = tmp_path / 'locks'
+    (idle,) = locks.iterdir()
+    os.utime(idle, (0, 0))
+
+    monkeypatch.setattr(cache_backend, 'SWEEP_SECONDS', 0)
+    with backend.lock('busy'):
+        for path in locks.iterdir():
+            os.utime(path, (0, 0))
+        backend.sweep()
+        assert len(list(locks.iterdir())) == 1
+    assert not idle.exists()
+    with backend.lock('old'):
+        assert len(list(locks.iterdir())) == 2
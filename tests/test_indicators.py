@@ -0,0 +1,77 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fakes import synthetic_history
+from indicators import IndicatorBook, IndicatorEngine, indicator_columns, pandas_reference
+
+# The streaming engine must match the pandas reference to floating-point tolerance.
+RTOL = 1e-12
+
+
+def history(symbol='TCS', start=datetime.date(2010, 1, 1), end=datetime.date(2020, 12, 31)):
+    frame = synthetic_history(symbol, start, end)
+    frame.index = pd.DatetimeIndex(frame.index, name='Date')
+    return frame
+
+
+def assert_matches(frame, reference):
+    assert list(frame.columns) == indicator_columns()
+    assert frame.index.equals(reference.index)
+    for column in indicator_columns():
+        np.testing.assert_allclose(frame[column].to_numpy(), reference[column].to_numpy(),
+                                   rtol=RTOL, atol=0, equal_nan=True, err_msg=column)
+
+
+@pytest.mark.parametrize('symbol', ['TCS', 'INFY', 'MRF'])
+def test_engine_matches_pandas_reference(symbol):
+    bars = history(symbol)
+    engine = IndicatorEngine()
+    engine.extend(bars)
+    assert_matches(engine.frame(), pandas_reference(bars))
+
+
+def test_incremental_extend_matches_one_pass():
+    bars = history()
+    engine = IndicatorEngine()
+    seen = 0
+    for end in (1, 2, 30, 400, 401, len(bars)):
+        # Only bars newer than the last one seen are processed.
+        assert engine.extend(bars.iloc[:end]) == end - seen
+        seen = end
+    assert_matches(engine.frame(), pandas_reference(bars))
+
+
+def test_flat_prices():
+    # No losses: RSI is 100 once prices rise and undefined while they are flat.
+    bars = history().iloc[:60].copy()
+    bars['Close'] = np.r_[np.full(30, 100.0), np.linspace(100.0, 130.0, 30)]
+    engine = IndicatorEngine()
+    engine.extend(bars)
+    assert_matches(engine.frame(), pandas_reference(bars))
+
+
+def test_book_restarts_on_earlier_history():
+    bars = history()
+    book = IndicatorBook()
+    recent = book.for_symbol('TCS', bars.loc['2018':])
+    assert_matches(recent, pandas_reference(bars.loc['2018':]))
+    # A back-filled history starting earlier is recomputed from its first bar.
+    full = book.for_symbol('TCS', bars)
+    assert_matches(full, pandas_reference(bars))
+    # A later start is served from the same engine.
+    assert book.for_symbol('TCS', bars.loc['2019':]) is full
+
+
+def test_book_keeps_the_most_recent_symbols():
+    bars = history().iloc[:100]
+    book = IndicatorBook(max_symbols=2)
+    first = book.for_symbol('TCS', bars)
+    book.for_symbol('INFY', bars)
+    assert book.for_symbol('TCS', bars) is first
+    book.for_symbol('SBIN', bars)
+    # INFY was the least recently used; TCS keeps its engine.
+    assert list(book._engines) == ['TCS', 'SBIN']
+    assert book.for_symbol('TCS', bars) is first
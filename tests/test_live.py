@@ -0,0 +1,100 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fakes import TickReplay, synthetic_ticks
+from live import FIELDS, CandleRing, LiveAggregator
+
+DAY = datetime.date(2024, 3, 4)
+SYMBOLS = ['TCS', 'INFY', 'SBIN']
+
+
+@pytest.fixture(scope='module')
+def ticks():
+    return synthetic_ticks(SYMBOLS, DAY, per_minute=4)
+
+
+def expected_candles(ticks, symbol, seconds):
+    frame = ticks[ticks.symbol == symbol]
+    groups = frame.groupby(frame.ts - frame.ts % seconds)
+    return pd.DataFrame({'open': groups.price.first(), 'high': groups.price.max(), 'low': groups.price.min(),
+                         'close': groups.price.last(), 'volume': groups.qty.sum()})
+
+
+def as_frame(closed, current):
+    frame = pd.DataFrame(closed)
+    if current is not None:
+        frame = pd.concat([frame, pd.DataFrame([current])], ignore_index=True)
+    return frame.set_index(frame.x // 1000)[list(FIELDS)]
+
+
+@pytest.mark.parametrize('interval, seconds', [('1m', 60), ('5m', 300)])
+def test_replay_matches_groupby(ticks, interval, seconds):
+    candles = LiveAggregator()
+    replay = TickReplay(ticks, candles.on_ticks, speed=0).start()
+    replay.join(10)
+    assert replay.emitted == len(ticks) == candles.ticks
+
+    for symbol in SYMBOLS:
+        _, closed, current = candles.since(symbol, interval)
+        got = as_frame(closed, current)
+        expected = expected_candles(ticks, symbol, seconds)
+        assert list(got.index) == list(expected.index)
+        np.testing.assert_allclose(got.to_numpy(dtype=float), expected.to_numpy(dtype=float))
+
+
+def test_late_ticks_leave_closed_candles_alone():
+    ring = CandleRing(60)
+    ring.add(60, 10.0, 1)
+    ring.add(125, 11.0, 1)
+    ring.add(70, 99.0, 5)  # belongs to the candle that closed at 120
+    ring.add(110, 11.5, 2)
+    _, closed, current = ring.since()
+    assert closed == {'x': [60000], 'open': [10.0], 'high': [10.0], 'low': [10.0], 'close': [10.0], 'volume': [1.0]}
+    assert current['x'] == 120000 and current['high'] == 11.0 and current['volume'] == 1
+
+
+def test_ring_keeps_the_newest_capacity_candles():
+    ring = CandleRing(60, capacity=5)
+    for minute in range(13):
+        ring.add(minute * 60, float(minute))
+    assert ring.closed == 12
+
+    cursor, closed, current = ring.since()
+    assert closed['x'] == [m * 60000 for m in range(7, 12)]
+    assert closed['close'] == [float(m) for m in range(7, 12)]
+    assert cursor == 11 * 60 and current['x'] == 12 * 60000
+
+    # A cursor older than anything held gets everything held, not a wrapped slice.
+    _, closed, _ = ring.since(2 * 60)
+    assert closed['x'] == [m * 60000 for m in range(7, 12)]
+    _, closed, current = ring.since(cursor)
+    assert closed['x'] == [] and current['x'] == 12 * 60000
+
+
+def test_readers_alternating_between_aggregators_see_every_candle_once(ticks):
+    # Two workers fold the same feed but started at different times; a chart's
+    # polls land on either one.
+    first = LiveAggregator()
+    second = LiveAggregator()
+    start = ticks.ts.iloc[0] - ticks.ts.iloc[0] % 60
+    minute = (ticks.ts - start) // 60
+
+    seen, cursor = [], None
+    for m in range(int(minute.max()) + 1):
+        batch = ticks[minute == m]
+        columns = [batch[c].tolist() for c in ('symbol', 'ts', 'price', 'qty')]
+        first.on_ticks(*columns)
+        if m >= 10:
+            second.on_ticks(*columns)
+        if m >= 20:
+            worker = first if m % 2 else second
+            cursor, closed, _ = worker.since('TCS', '1m', cursor)
+            seen.extend(closed['x'])
+
+    # The first poll lands on the later worker, whose history starts at minute 10.
+    _, closed, _ = first.since('TCS', '1m', start + 9 * 60)
+    assert seen == closed['x']
+    assert seen[-1] == (start + int(minute.max()) * 60 - 60) * 1000
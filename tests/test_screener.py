@@ -0,0 +1,83 @@
+import operator
+
+import numpy as np
+import pytest
+
+from screener import FactorTable, parse_query
+
+OPS = {'>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le, '==': operator.eq}
+
+
+def test_quoted_industry_is_one_value():
+    assert parse_query("industry == 'PAPER AND JUTE' AND close > 5") == [
+        ('industry', '==', 'PAPER AND JUTE'), ('close', '>', 5.0)]
+    assert parse_query('volume_ratio>2 and industry=="METALS and MINING"') == [
+        ('volume_ratio', '>', 2.0), ('industry', '==', 'METALS and MINING')]
+
+
+@pytest.mark.parametrize('query', [
+    "industry == 'PAPER AND JUTE",
+    'close > 5 and industry == "IT',
+    "industry > 'IT'",
+    'industry <= IT',
+    'price > 5',
+    'close > five',
+    'close 5',
+])
+def test_unreadable_queries_raise(query):
+    with pytest.raises(ValueError):
+        parse_query(query)
+
+
+@pytest.fixture(scope='module')
+def table():
+    rng = np.random.default_rng(7)
+    n = 300
+    # Rounded values give ties; NaNs are symbols without enough history.
+    a = rng.normal(0, 10, n).round()
+    b = rng.uniform(0, 5, n).round(1)
+    a[rng.choice(n, 30, replace=False)] = np.nan
+    b[rng.choice(n, 10, replace=False)] = np.nan
+    symbols = ['S%03d' % i for i in range(n)]
+    industries = {s: ('IT', 'Metals', 'PAPER AND JUTE')[i % 3] for i, s in enumerate(symbols)}
+    return FactorTable(symbols, industries, {'close': a, 'volume_ratio': b}, None)
+
+
+def brute_force(table, conditions):
+    mask = np.ones(len(table), dtype=bool)
+    for column, op, value in conditions:
+        if column == 'industry':
+            mask &= np.char.lower(table.industries.astype(str)) == value.casefold()
+        else:
+            with np.errstate(invalid='ignore'):
+                mask &= OPS[op](table.columns[column], value)
+    return mask
+
+
+@pytest.mark.parametrize('op', sorted(OPS))
+def test_rows_match_a_mask(table, op):
+    for value in (-100.0, -3.0, 0.0, 2.5, 4.0, 100.0):
+        for column in ('close', 'volume_ratio'):
+            rows = table.rows(column, op, value)
+            assert sorted(rows) == list(np.flatnonzero(brute_force(table, [(column, op, value)])))
+
+
+def test_query_combines_and_sorts(table):
+    conditions = [('close', '>=', -5.0), ('volume_ratio', '<', 4.0), ('industry', '==', 'metals')]
+    expected = np.flatnonzero(brute_force(table, conditions))
+    assert len(expected)
+    assert list(table.query(conditions)) == list(expected)
+
+    ranked = table.query(conditions, sort='volume_ratio')
+    assert sorted(ranked) == list(expected)
+    values = table.columns['volume_ratio'][ranked]
+    present = values[~np.isnan(values)]
+    assert (np.diff(present) <= 0).all()
+    # Symbols without a value come after every ranked one.
+    assert np.isnan(values[len(present):]).all()
+    assert list(table.query(conditions, sort='volume_ratio', limit=5)) == list(ranked[:5])
+
+
+def test_industry_rejects_range_operators(table):
+    with pytest.raises(ValueError):
+        table.rows('industry', '>', 'IT')
@@ -0,0 +1,109 @@
+import datetime
+import threading
+
+import pytest
+
+import store as store_module
+from cache_backend import FileBackend
+from fakes import FakeFetcher, synthetic_history
+from market import last_closed_session
+from store import OHLCVStore
+
+START = datetime.date(2020, 3, 2)
+END = datetime.date(2020, 6, 30)
+DAY = datetime.timedelta(days=1)
+
+
+@pytest.fixture
+def fetcher():
+    return FakeFetcher()
+
+
+@pytest.fixture
+def store(tmp_path, fetcher):
+    return OHLCVStore(str(tmp_path / 'ohlcv'), fetcher)
+
+
+def test_fetches_only_missing_ranges(store, fetcher):
+    store.get_history('TCS', START, END)
+    assert fetcher.calls == [('TCS', START, END)]
+
+    store.get_history('TCS', START - datetime.timedelta(days=30), END + datetime.timedelta(days=30))
+    assert fetcher.calls[1:] == [('TCS', START - datetime.timedelta(days=30), START - DAY),
+                                 ('TCS', END + DAY, END + datetime.timedelta(days=30))]
+
+    frame = store.get_history('TCS', START, END)
+    assert len(fetcher.calls) == 3
+    expected = synthetic_history('TCS', START, END)
+    assert list(frame.index.date) == list(expected.index)
+    assert (frame.Close.to_numpy() == expected.Close.to_numpy()).all()
+
+
+def test_survives_restart(tmp_path, fetcher):
+    OHLCVStore(str(tmp_path), fetcher).get_history('TCS', START, END)
+    reopened = OHLCVStore(str(tmp_path), fetcher)
+    assert not reopened.needs_fetch('TCS', START, END)
+    assert len(reopened.get_history('TCS', START, END)) == len(synthetic_history('TCS', START, END))
+    assert len(fetcher.calls) == 1
+
+
+def test_open_session_is_never_covered(store, fetcher):
+    settled = last_closed_session()
+    store.ensure('TCS', settled - datetime.timedelta(days=10), settled + datetime.timedelta(days=3))
+    assert fetcher.calls[0][2] == settled
+    assert store.covered_through('TCS') <= settled
+    assert store.last_bar_date('TCS') <= settled
+
+
+def test_unpublished_session_is_asked_again(store, fetcher, monkeypatch):
+    settled = last_closed_session()
+    start = settled - datetime.timedelta(days=60)
+    # Upstream has not published the last session yet.
+    fetcher.history = lambda symbol, lo, hi: synthetic_history(symbol, lo, min(hi, settled - DAY))
+    store.ensure('TCS', start, settled)
+    covered = store.covered_through('TCS')
+    assert covered < settled
+    # Within RECHECK_SECONDS the empty day is not asked for again...
+    assert not store.needs_fetch('TCS', start, settled)
+
+    fetcher.history = synthetic_history
+    now = store_module.time.time() + store_module.RECHECK_SECONDS + 1
+    monkeypatch.setattr(store_module.time, 'time', lambda: now)
+    # ...after it, only the unconfirmed days are fetched.
+    assert store.needs_fetch('TCS', start, settled)
+    store.ensure('TCS', start, settled)
+    assert fetcher.calls[-1] == ('TCS', covered + DAY, settled)
+    assert store.last_bar_date('TCS') == settled
+    assert store.covered_through('TCS') == settled
+
+
+def test_days_without_bars_are_covered_once_old(store, fetcher):
+    # A range ending on a weekend long ago: the empty days are past RECHECK.
+    sunday = datetime.date(2020, 6, 28)
+    store.ensure('TCS', START, sunday)
+    assert store.covered_through('TCS') == sunday
+    assert not store.needs_fetch('TCS', START, sunday)
+
+
+def test_single_flight_across_processes(tmp_path):
+    fetcher = FakeFetcher(latency=0.2)
+    backend = FileBackend(str(tmp_path / 'cache'))
+    # Two stores on one directory stand in for two workers.
+    stores = [OHLCVStore(str(tmp_path / 'ohlcv'), fetcher, backend=backend) for _ in range(2)]
+    threads = [threading.Thread(target=stores[i % 2].get_history, args=('TCS', START, END)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert fetcher.calls == [('TCS', START, END)]
+    assert all(len(s.get_history('TCS', START, END)) for s in stores)
+
+
+def test_mirror_keeps_the_most_recent_symbols(tmp_path, fetcher):
+    store = OHLCVStore(str(tmp_path / 'ohlcv'), fetcher, mirror_symbols=2)
+    for symbol in ('TCS', 'INFY', 'SBIN', 'TCS'):
+        store.get_history(symbol, START, END)
+    assert list(store._mirror) == ['SBIN', 'TCS']
+    # Evicted symbols are read back from disk, not fetched again.
+    assert len(store.get_history('INFY', START, END)) and len(fetcher.calls) == 3
+    assert list(store._mirror) == ['TCS', 'INFY']